@@ -0,0 +1 @@
+"""Ad-hoc benchmarks; run with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,106 @@
+"""
+Compare serial and concurrent item processing against stubbed backends.
+
+HTTP is served by ``httpx.MockTransport`` and OpenAI by a fake client, each with a
+fixed artificial latency, so the numbers reflect orchestration overhead only.
+
+    python -m benchmarks.bench_concurrency --items 60 --fetch-latency 0.2 --summary-latency 0.8
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, List
+
+import httpx
+
+from raindrop_digest.models import RaindropItem
+from raindrop_digest.orchestrator import _process_targets
+from raindrop_digest.summarizer import Summarizer
+from raindrop_digest.text_extractor import fetch_html
+
+ARTICLE_HTML = """
+<html><head><title>Bench</title><meta property="og:image" content="/hero.png" /></head>
+<body><article><h1>Bench article</h1>{paragraphs}</article></body></html>
+"""
+
+
+def _html_transport(latency: float) -> httpx.MockTransport:
+    body = ARTICLE_HTML.format(
+        paragraphs="".join(f"<p>Paragraph {i} of a benchmark article body.</p>" for i in range(40))
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency)
+        return httpx.Response(200, request=request, text=body)
+
+    return httpx.MockTransport(handler)
+
+
+class _SlowOpenAI:
+    def __init__(self, latency: float):
+        outer = self
+
+        class Completions:
+            def create(self, model: str, messages: List[Any], **kwargs: Any) -> Any:
+                time.sleep(outer.latency)
+                message = type("msg", (), {"content": "要約"})
+                choice = type("choice", (), {"message": message})
+                return type("response", (), {"choices": [choice]})
+
+        self.latency = latency
+        self.chat = type("chat", (), {"completions": Completions()})
+
+
+def _items(count: int) -> List[RaindropItem]:
+    now = datetime.now(timezone.utc)
+    return [
+        RaindropItem(id=i, link=f"https://bench.example/{i}", title=str(i), created=now, tags=[])
+        for i in range(count)
+    ]
+
+
+def _run(items: List[RaindropItem], args: argparse.Namespace, fetch: int, summary: int) -> float:
+    summarizer = Summarizer(api_key="bench", client=_SlowOpenAI(args.summary_latency))
+    fetcher = functools.partial(fetch_html, transport=_html_transport(args.fetch_latency))
+    started = time.perf_counter()
+    results = _process_targets(
+        items,
+        summarizer,
+        fetch_concurrency=fetch,
+        summary_concurrency=summary,
+        fetcher=fetcher,
+    )
+    elapsed = time.perf_counter() - started
+    assert all(r.is_success() for r in results)
+    return elapsed
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--fetch-latency", type=float, default=0.1)
+    parser.add_argument("--summary-latency", type=float, default=0.3)
+    parser.add_argument("--fetch-concurrency", type=int, default=8)
+    parser.add_argument("--summary-concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    items = _items(args.items)
+    serial = _run(items, args, 1, 1)
+    concurrent = _run(items, args, args.fetch_concurrency, args.summary_concurrency)
+    print(f"items={args.items} fetch_latency={args.fetch_latency}s summary_latency={args.summary_latency}s")
+    print(f"serial:     {serial:.2f}s")
+    print(
+        f"concurrent: {concurrent:.2f}s "
+        f"(fetch={args.fetch_concurrency} summary={args.summary_concurrency}, "
+        f"speedup x{serial / concurrent:.1f})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Compare the legacy three-parse extraction with the single-parse path of parse_html.
+
+Pass a directory of saved pages (``*.html``) with ``--corpus``; without one a
+synthetic news-like corpus is generated. Reports mean wall time per page and the
+peak traced allocation per page for each path. tracemalloc only sees the Python
+heap; the libxml2 trees saved by parsing once are visible in the wall time instead.
+
+Both paths stop at the extracted text, so the comparison covers parsing only.
+parse_html then compacts that text (text_compactor), which the legacy code never
+did; its cost is reported on a separate line. On the synthetic corpus the two
+paths are within run-to-run noise of each other in both time and allocation:
+parsing is about 0.3 ms of roughly 20 ms per page, and readability's own scoring
+dominates. What the single parse removes is the second and third libxml2 tree,
+which tracemalloc does not see.
+
+    python -m benchmarks.bench_extraction --corpus ~/saved-pages --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+from urllib.parse import urljoin
+
+from lxml import html
+from readability import Document
+
+from raindrop_digest.text_compactor import compact_text
+from raindrop_digest.text_extractor import (
+    _extract_page_metadata,
+    _extract_readability,
+    _is_probably_tracking_image,
+    _parse_document,
+)
+
+PAGE_URL = "https://bench.example/article"
+
+
+def _legacy_extract(html_text: str, url: str) -> Tuple[str, str | None]:
+    """The pre-single-parse implementation, kept here for comparison."""
+    summary_html = Document(html_text, url=url).summary(html_partial=True)
+    text = html.fromstring(summary_html).text_content()
+    tree = html.fromstring(html_text)
+    candidates: List[str] = []
+    candidates.extend(tree.xpath("//meta[@property='og:image']/@content"))
+    candidates.extend(tree.xpath("//meta[@property='og:image:url']/@content"))
+    candidates.extend(tree.xpath("//meta[@property='og:image:secure_url']/@content"))
+    candidates.extend(tree.xpath("//meta[@name='twitter:image']/@content"))
+    candidates.extend(tree.xpath("//meta[@name='twitter:image:src']/@content"))
+    candidates.extend(tree.xpath("//link[@rel='image_src']/@href"))
+    hero = None
+    for raw in candidates:
+        absolute = urljoin(url, raw)
+        if raw and not _is_probably_tracking_image(absolute):
+            hero = absolute
+            break
+    return text, hero
+
+
+def _single_parse_extract(html_text: str, url: str) -> Tuple[str, str | None]:
+    """parse_html up to the extracted text, before compaction."""
+    tree = _parse_document(html_text)
+    metadata = _extract_page_metadata(tree, url)
+    return _extract_readability(tree, url), metadata.hero_image_url
+
+
+def _compact(html_text: str, url: str) -> Tuple[str, str | None]:
+    text = _single_parse_extract(html_text, url)[0]
+    return compact_text(text.strip()).text, None
+
+
+def _synthetic_corpus(pages: int) -> List[str]:
+    corpus = []
+    for page in range(pages):
+        head = "".join(f'<meta name="keyword{i}" content="k{i}" />' for i in range(40))
+        nav = "".join(f'<li><a href="/nav/{i}">Section {i}</a></li>' for i in range(80))
+        body = "".join(
+            f"<p>Paragraph {i} of article {page}. " + "Lorem ipsum dolor sit amet. " * 12 + "</p>"
+            for i in range(60)
+        )
+        corpus.append(
+            f"<html><head><title>Article {page}</title>{head}"
+            f'<meta property="og:image" content="/img/{page}.png" /></head>'
+            f"<body><nav><ul>{nav}</ul></nav><article>{body}</article>"
+            f"<footer>{nav}</footer></body></html>"
+        )
+    return corpus
+
+
+def _load_corpus(directory: Path) -> List[str]:
+    pages = [p.read_text(encoding="utf-8", errors="replace") for p in sorted(directory.glob("*.html"))]
+    if not pages:
+        raise SystemExit(f"No *.html files found in {directory}")
+    return pages
+
+
+def _measure(fn: Callable[[str, str], object], corpus: List[str], repeat: int) -> Tuple[float, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for page in corpus:
+            fn(page, PAGE_URL)
+        timings.append((time.perf_counter() - started) / len(corpus))
+
+    peaks = []
+    for page in corpus:
+        tracemalloc.start()
+        fn(page, PAGE_URL)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.mean(timings), statistics.mean(peaks)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=None)
+    parser.add_argument("--pages", type=int, default=20, help="synthetic pages when --corpus is unset")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    corpus = _load_corpus(args.corpus) if args.corpus else _synthetic_corpus(args.pages)
+    for page in corpus:
+        # Both paths must agree before their costs are worth comparing.
+        assert _legacy_extract(page, PAGE_URL)[1] == _single_parse_extract(page, PAGE_URL)[1]
+
+    legacy_time, legacy_peak = _measure(_legacy_extract, corpus, args.repeat)
+    single_time, single_peak = _measure(_single_parse_extract, corpus, args.repeat)
+    compact_time, compact_peak = _measure(_compact, corpus, args.repeat)
+    print(f"pages={len(corpus)} repeat={args.repeat}")
+    print(f"legacy:       {legacy_time * 1000:.1f} ms/page, peak alloc {legacy_peak / 1024:.0f} KiB/page")
+    print(f"single-parse: {single_time * 1000:.1f} ms/page, peak alloc {single_peak / 1024:.0f} KiB/page")
+    print(f"time saved: {(1 - single_time / legacy_time) * 100:.0f}%")
+    print(
+        f"+ compaction: {(compact_time - single_time) * 1000:.1f} ms/page, "
+        f"peak alloc {compact_peak / 1024:.0f} KiB/page (extraction plus compact_text)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compare one-request-per-item and packed summarization of short articles.
+
+OpenAI is replaced by a fake client whose latency is a fixed round trip plus a
+per-output-token generation time, and whose token usage is estimated from the
+request, so the comparison shows what packing saves in round trips and in resent
+system prompts. Packed answers take longer to generate, which the model reflects.
+
+    python -m benchmarks.bench_packing --items 40 --pack 5 --round-trip 0.4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from typing import Any, List, Tuple
+
+from raindrop_digest.models import TokenUsage
+from raindrop_digest.packed_summarizer import PackedSummarizer
+from raindrop_digest.summarizer import Summarizer
+from raindrop_digest.utils import estimate_tokens
+
+SUMMARY_TOKENS = 150
+
+
+class _TimedOpenAI:
+    def __init__(self, round_trip: float, per_token: float):
+        outer = self
+
+        class Completions:
+            def create(self, model: str, messages: List[Any], **kwargs: Any) -> Any:
+                user = messages[-1]["content"]
+                if kwargs.get("response_format"):
+                    ids = [article["id"] for article in json.loads(user)["articles"]]
+                    content = json.dumps(
+                        {"summaries": [{"id": i, "summary": "要約" * (SUMMARY_TOKENS // 2)} for i in ids]},
+                        ensure_ascii=False,
+                    )
+                else:
+                    content = "要約" * (SUMMARY_TOKENS // 2)
+                completion_tokens = estimate_tokens(content)
+                time.sleep(outer.round_trip + completion_tokens * outer.per_token)
+                usage = type(
+                    "usage",
+                    (),
+                    {
+                        "prompt_tokens": sum(estimate_tokens(m["content"]) for m in messages),
+                        "completion_tokens": completion_tokens,
+                    },
+                )
+                message = type("msg", (), {"content": content})
+                choice = type("choice", (), {"message": message})
+                return type("response", (), {"choices": [choice], "usage": usage})
+
+        self.round_trip = round_trip
+        self.per_token = per_token
+        self.chat = type("chat", (), {"completions": Completions()})
+
+
+def _texts(count: int) -> List[str]:
+    return [f"短いお知らせ{i}。" + "新しいバージョンを公開しました。" * 20 for i in range(count)]
+
+
+def _per_item(texts: List[str], args: argparse.Namespace) -> Tuple[float, TokenUsage]:
+    summarizer = Summarizer(api_key="bench", client=_TimedOpenAI(args.round_trip, args.per_token))
+    total = TokenUsage()
+    started = time.perf_counter()
+    for text in texts:
+        _summary, usage = summarizer.summarize_with_usage(text)
+        total.add(usage)
+    return time.perf_counter() - started, total
+
+
+def _packed(texts: List[str], args: argparse.Namespace) -> Tuple[float, TokenUsage]:
+    summarizer = Summarizer(api_key="bench", client=_TimedOpenAI(args.round_trip, args.per_token))
+    packer = PackedSummarizer(summarizer, max_items=args.pack)
+    total = TokenUsage()
+    started = time.perf_counter()
+    for outcome in packer.summarize_many(texts):
+        assert not isinstance(outcome, Exception)
+        total.add(outcome[1])
+    return time.perf_counter() - started, total
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--pack", type=int, default=5)
+    parser.add_argument("--round-trip", type=float, default=0.3, help="fixed seconds per request")
+    parser.add_argument("--per-token", type=float, default=0.0005, help="seconds per output token")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    texts = _texts(args.items)
+    single_time, single_usage = _per_item(texts, args)
+    packed_time, packed_usage = _packed(texts, args)
+    print(f"items={args.items} pack={args.pack} round_trip={args.round_trip}s per_token={args.per_token}s")
+    for label, elapsed, usage in (
+        ("per-item", single_time, single_usage),
+        ("packed  ", packed_time, packed_usage),
+    ):
+        print(
+            f"{label}: {elapsed:.2f}s ({elapsed / args.items * 1000:.0f} ms/item) "
+            f"calls={usage.calls} prompt={usage.prompt_tokens} completion={usage.completion_tokens}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import logging
 import sys
 
@@ -8,6 +9,13 @@ from raindrop_digest.orchestrator import run
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize recent Raindrop bookmarks and mail a digest.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the unfinished run recorded in CACHE_DIR/run_journal.jsonl instead of starting over",
+    )
+    args = parser.parse_args()
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s %(levelname)s %(name)s - %(message)s",
@@ -19,7 +27,7 @@ def main() -> None:
         sys.exit(1)
 
     try:
-        results = run(settings)
+        results = run(settings, resume=args.resume)
     except Exception as exc:  # noqa: BLE001
         logging.exception("Batch run failed: %s", exc)
         sys.exit(1)
@@ -4,9 +4,24 @@ __all__ = [
     "config",
     "models",
     "raindrop_client",
+    "raindrop_mirror",
+    "writeback",
     "text_extractor",
+    "text_compactor",
+    "async_fetcher",
+    "http_cache",
     "summarizer",
+    "batch_summarizer",
+    "chunked_summarizer",
+    "packed_summarizer",
+    "model_router",
+    "failover",
+    "near_duplicates",
+    "summary_cache",
+    "rate_limiter",
     "mailer",
     "email_formatter",
     "orchestrator",
+    "pipeline",
+    "run_journal",
 ]
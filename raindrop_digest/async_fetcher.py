@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Sequence, Union
+from urllib.parse import urlparse
+
+import httpx
+
+from .http_cache import HttpCache
+from .models import ExtractedContent
+from .text_extractor import (
+    ExtractionError,
+    _handle_cacheable_response,
+    _http2_available,
+    _request_headers,
+    _user_agent_candidates,
+    ensure_supported_source,
+    parse_html,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHtmlFetcher:
+    """
+    asyncio counterpart of HtmlFetcher built on httpx.AsyncClient.
+
+    Concurrency is limited globally and per host, so many bookmarks can be fetched
+    at once without sending a burst of parallel requests to a single site. The
+    403/406 User-Agent fallback is the same as the synchronous fetcher's.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = 10,
+        per_host_concurrency: int = 2,
+        transport: httpx.AsyncBaseTransport | None = None,
+        http2: bool = False,
+        timeout: float = 20.0,
+        cache: HttpCache | None = None,
+    ):
+        self._cache = cache
+        if max_concurrency < 1 or per_host_concurrency < 1:
+            raise ValueError("Fetch concurrency limits must be >= 1.")
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self._max_concurrency = max_concurrency
+        self._per_host_concurrency = per_host_concurrency
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            transport=transport,
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_concurrency),
+        )
+        # Semaphores bind to the running loop on first use, so create them lazily.
+        self._global_limit: asyncio.Semaphore | None = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "AsyncHtmlFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def fetch(self, url: str) -> str:
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self._max_concurrency)
+        host = (urlparse(url).hostname or "").lower()
+        host_limit = self._host_limits.setdefault(
+            host, asyncio.Semaphore(self._per_host_concurrency)
+        )
+        cache = self._cache
+        cached = await asyncio.to_thread(cache.get, url) if cache is not None else None
+        if cached is not None and cache is not None and cache.is_fresh(cached):
+            logger.info("Using cached page (within TTL): %s", url)
+            return cached.text
+        async with host_limit, self._global_limit:
+            logger.info("Fetching URL: %s", url)
+            user_agents = _user_agent_candidates()
+            for idx, user_agent in enumerate(user_agents, start=1):
+                headers = _request_headers(user_agent)
+                if cached is not None:
+                    headers.update(cached.validators())
+                try:
+                    response = await self._client.get(url, headers=headers)
+                except httpx.RequestError as exc:
+                    raise ExtractionError(f"HTTP request failed: {exc}") from exc
+                text = await asyncio.to_thread(
+                    _handle_cacheable_response, cache, cached, response, url, idx, len(user_agents)
+                )
+                if text is not None:
+                    return text
+        raise ExtractionError("HTTP fetch failed: no User-Agent candidates")
+
+    async def extract(self, url: str) -> ExtractedContent:
+        source = ensure_supported_source(url)
+        html_text = await self.fetch(url)
+        # Parsing is CPU-bound; keep it off the event loop.
+        return await asyncio.to_thread(parse_html, html_text, url, source)
+
+
+async def fetch_html_async(url: str, *, fetcher: AsyncHtmlFetcher | None = None) -> str:
+    if fetcher is not None:
+        return await fetcher.fetch(url)
+    async with AsyncHtmlFetcher() as one_off:
+        return await one_off.fetch(url)
+
+
+async def extract_text_async(url: str, *, fetcher: AsyncHtmlFetcher | None = None) -> ExtractedContent:
+    if fetcher is not None:
+        return await fetcher.extract(url)
+    async with AsyncHtmlFetcher() as one_off:
+        return await one_off.extract(url)
+
+
+def extract_texts(
+    urls: Sequence[str],
+    *,
+    max_concurrency: int = 10,
+    per_host_concurrency: int = 2,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> List[Union[ExtractedContent, ExtractionError]]:
+    """
+    Synchronously extract many URLs concurrently.
+
+    Returns one entry per URL in input order: the content, or the ExtractionError
+    that URL raised.
+    """
+
+    async def run_all() -> List[Union[ExtractedContent, ExtractionError]]:
+        async with AsyncHtmlFetcher(
+            max_concurrency=max_concurrency,
+            per_host_concurrency=per_host_concurrency,
+            transport=transport,
+        ) as fetcher:
+            outcomes = await asyncio.gather(
+                *(fetcher.extract(url) for url in urls), return_exceptions=True
+            )
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(outcome, ExtractionError):
+                raise outcome
+        return list(outcomes)  # type: ignore[arg-type]
+
+    return asyncio.run(run_all())
+
+
+class BackgroundFetcher:
+    """
+    Blocking facade over an AsyncHtmlFetcher running on a background event loop.
+
+    ``fetch`` can be called from any number of threads (e.g. the pipeline's fetch
+    stage workers); the requests share one AsyncClient and its concurrency limits.
+    """
+
+    def __init__(self, **fetcher_kwargs: object):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="async-fetcher", daemon=True
+        )
+        self._thread.start()
+        self._fetcher = self._call(self._create(fetcher_kwargs))
+
+    @staticmethod
+    async def _create(fetcher_kwargs: Dict[str, object]) -> AsyncHtmlFetcher:
+        return AsyncHtmlFetcher(**fetcher_kwargs)  # type: ignore[arg-type]
+
+    def _call(self, coro):  # type: ignore[no-untyped-def]
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def fetch(self, url: str) -> str:
+        return self._call(self._fetcher.fetch(url))
+
+    def close(self) -> None:
+        try:
+            self._call(self._fetcher.aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .models import TokenUsage
+from .summarizer import Summarizer, SummaryError
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+BatchOutcome = Union[Tuple[str, TokenUsage], SummaryError]
+SyncSummarize = Callable[[int, str], Tuple[str, TokenUsage]]
+
+
+def _custom_id(item_id: int) -> str:
+    return f"raindrop-{item_id}"
+
+
+class BatchSummarizer:
+    """
+    Summarize many texts through the OpenAI Batch API.
+
+    All prompts are written to one JSONL file, uploaded and submitted as a batch,
+    which is then polled until it finishes or ``deadline_seconds`` pass. Results are
+    mapped back to Raindrop item ids via ``custom_id``, together with the token
+    usage each output line reports. A batch still running at the
+    deadline is cancelled, and whatever it finished before the cancel is read from
+    its partial output (waiting up to ``cancel_wait_seconds`` for the cancel to
+    settle). Anything the batch did not answer (or answered with an error) goes
+    through a synchronous summarizer instead (``summarize_many``'s ``fallback``,
+    by default the wrapped ``Summarizer``), ``concurrency`` calls at a time, so no
+    item is lost to a slow batch.
+    """
+
+    def __init__(
+        self,
+        summarizer: Summarizer,
+        *,
+        deadline_seconds: float = 3600,
+        poll_interval_seconds: float = 30,
+        cancel_wait_seconds: float = 120,
+        concurrency: int = 1,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._summarizer = summarizer
+        self._client = summarizer.client
+        self._deadline_seconds = deadline_seconds
+        self._poll_interval_seconds = poll_interval_seconds
+        self._cancel_wait_seconds = cancel_wait_seconds
+        self._concurrency = max(1, concurrency)
+        self._sleep = sleep
+        self._clock = clock
+
+    def summarize_many(
+        self,
+        requests: Sequence[Tuple[int, str]],
+        fallback: Optional[SyncSummarize] = None,
+    ) -> Dict[int, BatchOutcome]:
+        """
+        Return ``(summary, usage)`` or the SummaryError for each ``(item_id, text)``.
+
+        ``fallback(item_id, text)`` summarizes what the batch left unanswered.
+        """
+        outcomes: Dict[int, BatchOutcome] = {}
+        texts: Dict[int, str] = {}
+        for item_id, text in requests:
+            cached = self._summarizer.cached_summary(text)
+            if cached is not None:
+                outcomes[item_id] = (cached, TokenUsage())
+            else:
+                texts[item_id] = text
+
+        if texts:
+            try:
+                answered = self._run_batch(texts)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Batch API run failed; falling back to synchronous calls: %s", exc)
+                answered = {}
+            for item_id, (summary, usage) in answered.items():
+                self._summarizer.remember(texts[item_id], summary)
+                outcomes[item_id] = (summary, usage)
+
+        pending = [item_id for item_id in texts if item_id not in outcomes]
+        if pending:
+            logger.info(
+                "Summarizing %s items synchronously after the batch (concurrency=%s)",
+                len(pending),
+                self._concurrency,
+            )
+            summarize = fallback or (lambda _item_id, text: self._summarizer.summarize_with_usage(text))
+            with ThreadPoolExecutor(
+                max_workers=min(self._concurrency, len(pending)), thread_name_prefix="batch-fallback"
+            ) as executor:
+                for item_id, outcome in zip(
+                    pending,
+                    executor.map(lambda item_id: _summarize_sync(summarize, item_id, texts[item_id]), pending),
+                ):
+                    outcomes[item_id] = outcome
+        return outcomes
+
+    def _run_batch(self, texts: Dict[int, str]) -> Dict[int, Tuple[str, TokenUsage]]:
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": _custom_id(item_id),
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": self._summarizer.build_request(text),
+                },
+                ensure_ascii=False,
+            )
+            for item_id, text in texts.items()
+        ]
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+        input_file = self._client.files.create(
+            file=("raindrop-digest-batch.jsonl", payload), purpose="batch"
+        )
+        batch = self._client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        logger.info("Submitted batch %s with %s requests", batch.id, len(lines))
+
+        try:
+            batch = self._wait(batch)
+        except BaseException:
+            # Do not leave a batch running (and billed) that nobody will read.
+            logger.warning("Polling batch %s failed; cancelling it", batch.id)
+            try:
+                self._client.batches.cancel(batch.id)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Failed to cancel batch %s: %s", batch.id, exc)
+            raise
+
+        logger.info("Batch %s finished with status=%s", batch.id, batch.status)
+        # Cancelled and expired batches still carry the requests they finished.
+        output_file_id = getattr(batch, "output_file_id", None)
+        if batch.status == "failed" or not output_file_id:
+            return {}
+        output = self._client.files.content(output_file_id).text
+        answered = _parse_batch_output(output, set(texts))
+        if batch.status != "completed":
+            logger.info("Batch %s answered %s of %s requests before it stopped", batch.id, len(answered), len(texts))
+        return answered
+
+    def _wait(self, batch: Any) -> Any:
+        """Poll ``batch`` until it finishes, cancelling it at the deadline; returns its last state."""
+        deadline = self._clock() + self._deadline_seconds
+        while batch.status not in _TERMINAL_STATUSES:
+            if self._clock() >= deadline:
+                logger.warning(
+                    "Batch %s not finished within %ss (status=%s); cancelling",
+                    batch.id,
+                    self._deadline_seconds,
+                    batch.status,
+                )
+                return self._cancel(batch)
+            self._sleep(self._poll_interval_seconds)
+            batch = self._client.batches.retrieve(batch.id)
+        return batch
+
+    def _cancel(self, batch: Any) -> Any:
+        """Cancel ``batch`` and wait briefly for its partial output; returns the last batch state seen."""
+        try:
+            batch = self._client.batches.cancel(batch.id)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to cancel batch %s: %s", batch.id, exc)
+            return batch
+        settle_by = self._clock() + self._cancel_wait_seconds
+        try:
+            while batch.status not in _TERMINAL_STATUSES and self._clock() < settle_by:
+                self._sleep(min(self._poll_interval_seconds, self._cancel_wait_seconds))
+                batch = self._client.batches.retrieve(batch.id)
+        except Exception as exc:  # noqa: BLE001
+            # The cancel went through; only its partial output is lost.
+            logger.warning("Failed to poll cancelled batch %s: %s", batch.id, exc)
+        return batch
+
+
+def _summarize_sync(summarize: SyncSummarize, item_id: int, text: str) -> BatchOutcome:
+    try:
+        return summarize(item_id, text)
+    except SummaryError as exc:
+        return exc
+
+
+def _parse_batch_output(output: str, expected_ids: set[int]) -> Dict[int, Tuple[str, TokenUsage]]:
+    by_custom_id = {_custom_id(item_id): item_id for item_id in expected_ids}
+    answered: Dict[int, Tuple[str, TokenUsage]] = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            logger.warning("Skipping malformed batch output line")
+            continue
+        item_id = by_custom_id.get(record.get("custom_id"))
+        if item_id is None:
+            continue
+        content = _content_from_record(record)
+        if content is None:
+            logger.warning("Batch returned no summary for %s: %s", record.get("custom_id"), record.get("error"))
+            continue
+        answered[item_id] = (content, _usage_from_record(record))
+    return answered
+
+
+def _content_from_record(record: Dict[str, Any]) -> Optional[str]:
+    response = record.get("response") or {}
+    if response.get("status_code") != 200:
+        return None
+    choices: List[Dict[str, Any]] = (response.get("body") or {}).get("choices") or []
+    if not choices:
+        return None
+    content = (choices[0].get("message") or {}).get("content")
+    if not content or not content.strip():
+        return None
+    return content.strip()
+
+
+def _usage_from_record(record: Dict[str, Any]) -> TokenUsage:
+    usage = ((record.get("response") or {}).get("body") or {}).get("usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    return TokenUsage(
+        prompt_tokens=usage.get("prompt_tokens") or 0,
+        completion_tokens=usage.get("completion_tokens") or 0,
+        calls=1,
+        cached_tokens=details.get("cached_tokens") or 0,
+    )
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from .config import CHUNK_SYSTEM_PROMPT
+from .failover import FailoverSummarizer
+from .models import TokenUsage
+from .summarizer import Summarizer
+from .utils import split_text_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkedSummarizer:
+    """
+    Map-reduce summarization for articles longer than one chunk.
+
+    The text is split on paragraph/sentence boundaries into chunks of at most
+    ``chunk_chars`` characters, each chunk is summarized in parallel with
+    ``CHUNK_SYSTEM_PROMPT`` (map), and the partial summaries are merged into the
+    final summary with the regular system prompt (reduce). Short texts take the
+    plain single-call path. Every call goes through the wrapped Summarizer, so the
+    cache, rate limiter and retries apply to chunks as well.
+    """
+
+    def __init__(self, summarizer: Summarizer | FailoverSummarizer, *, chunk_chars: int = 8000, max_workers: int = 4):
+        self._summarizer = summarizer
+        self._chunk_chars = chunk_chars
+        self._max_workers = max(1, max_workers)
+
+    def summarize(self, text: str) -> str:
+        summary, _usage = self.summarize_with_usage(text)
+        return summary
+
+    def summarize_with_usage(self, text: str) -> Tuple[str, TokenUsage]:
+        if len(text) <= self._chunk_chars:
+            return self._summarizer.summarize_with_usage(text)
+
+        chunks = split_text_chunks(text, self._chunk_chars)
+        logger.info("Long article (%s chars): summarizing %s chunks", len(text), len(chunks))
+        usage = TokenUsage()
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(chunks))) as executor:
+            partials: List[Tuple[str, TokenUsage]] = list(executor.map(self._summarize_chunk, chunks))
+        for _partial, chunk_usage in partials:
+            usage.add(chunk_usage)
+
+        merged = "\n\n".join(
+            f"[{idx}/{len(partials)}]\n{partial}" for idx, (partial, _usage) in enumerate(partials, start=1)
+        )
+        summary, reduce_usage = self._summarizer.summarize_with_usage(merged)
+        usage.add(reduce_usage)
+        return summary, usage
+
+    def _summarize_chunk(self, chunk: str) -> Tuple[str, TokenUsage]:
+        return self._summarizer.summarize_with_usage(chunk, system_prompt=CHUNK_SYSTEM_PROMPT)
@@ -27,15 +27,183 @@ def _env_int(name: str, default: int, *, min_value: int | None = None) -> int:
     return parsed
 
 
+def _env_float(
+    name: str,
+    default: float | None,
+    *,
+    min_value: float | None = None,
+    max_value: float | None = None,
+) -> float | None:
+    raw_value = os.getenv(name)
+    if raw_value is None or not raw_value.strip():
+        return default
+
+    try:
+        parsed = float(raw_value.strip())
+    except ValueError as exc:
+        raise ValueError(
+            f"Environment variable {name} must be a number, got {raw_value!r}."
+        ) from exc
+
+    if min_value is not None and parsed < min_value:
+        raise ValueError(
+            f"Environment variable {name} must be >= {min_value}, got {parsed}."
+        )
+
+    if max_value is not None and parsed > max_value:
+        raise ValueError(
+            f"Environment variable {name} must be <= {max_value}, got {parsed}."
+        )
+
+    return parsed
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw_value = os.getenv(name)
+    if raw_value is None or not raw_value.strip():
+        return default
+
+    lowered = raw_value.strip().lower()
+    if lowered in {"1", "true", "yes", "on"}:
+        return True
+    if lowered in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(
+        f"Environment variable {name} must be a boolean (true/false), got {raw_value!r}."
+    )
+
+
+def _env_str(name: str) -> str | None:
+    raw_value = os.getenv(name)
+    if raw_value is None or not raw_value.strip():
+        return None
+    return raw_value.strip()
+
+
 # --------------------------------
 # 設定値
 
 # 何日前までのリンクを処理するか（日数）
 BATCH_LOOKBACK_DAYS = _env_int("BATCH_LOOKBACK_DAYS", default=1, min_value=1)
 
+# 記事取得（HTML 取得）の並列数
+FETCH_CONCURRENCY = _env_int("FETCH_CONCURRENCY", default=1, min_value=1)
+
+# 記事取得を asyncio（httpx.AsyncClient）で行うか
+ASYNC_FETCH = _env_bool("ASYNC_FETCH", default=False)
+
+# 記事取得の同一ホストあたり同時接続数（ASYNC_FETCH 時）
+FETCH_PER_HOST_CONCURRENCY = _env_int("FETCH_PER_HOST_CONCURRENCY", default=2, min_value=1)
+
+# 記事取得で HTTP/2 を使うか（h2 パッケージが必要）
+HTTP2_ENABLED = _env_bool("HTTP2_ENABLED", default=False)
+
+# 実行間で使い回すキャッシュの保存先ディレクトリ。未設定ならキャッシュしない
+CACHE_DIR = _env_str("CACHE_DIR")
+
+# 記事HTMLキャッシュの上限サイズ（MB）。超えたら古いものから削除
+HTTP_CACHE_MAX_MB = _env_int("HTTP_CACHE_MAX_MB", default=200, min_value=1)
+
+# 記事HTMLキャッシュを再検証なしで使う秒数。0 なら毎回 ETag/Last-Modified で再検証
+HTTP_CACHE_TTL_SECONDS = _env_int("HTTP_CACHE_TTL_SECONDS", default=0, min_value=0)
+
+# 要約キャッシュ（CACHE_DIR/summaries.sqlite3）の保持日数と最大件数
+SUMMARY_CACHE_MAX_AGE_DAYS = _env_int("SUMMARY_CACHE_MAX_AGE_DAYS", default=30, min_value=1)
+SUMMARY_CACHE_MAX_ENTRIES = _env_int("SUMMARY_CACHE_MAX_ENTRIES", default=5000, min_value=1)
+
+# 本文解析（readability）の並列数
+PARSE_CONCURRENCY = _env_int("PARSE_CONCURRENCY", default=1, min_value=1)
+
+# 本文解析を別プロセス（ProcessPoolExecutor）で実行するか
+PARSE_PROCESS_POOL = _env_bool("PARSE_PROCESS_POOL", default=False)
+
+# 本文解析プロセス数。0 なら CPU コア数から自動決定
+PARSE_PROCESSES = _env_int("PARSE_PROCESSES", default=0, min_value=0)
+
+# 本文がほぼ同じ記事（転載・AMP/モバイル版・ミラーなど）をまとめ、1件だけ要約して共有するか
+NEAR_DUPLICATE_DETECTION = _env_bool("NEAR_DUPLICATE_DETECTION", default=False)
+
+# ほぼ同じとみなす本文の類似度（MinHash で推定した Jaccard 係数、0〜1）
+NEAR_DUPLICATE_THRESHOLD = _env_float("NEAR_DUPLICATE_THRESHOLD", default=0.8, min_value=0.0, max_value=1.0)
+
+# 過去の実行で要約した記事と照合する日数（CACHE_DIR 設定時のみ）
+NEAR_DUPLICATE_DAYS = _env_int("NEAR_DUPLICATE_DAYS", default=14, min_value=1)
+
+# 要約（OpenAI 呼び出し）の並列数
+SUMMARY_CONCURRENCY = _env_int("SUMMARY_CONCURRENCY", default=1, min_value=1)
+
+# OpenAI のレート制限（1分あたりのリクエスト数・トークン数）。0 ならレスポンスヘッダから学習する
+OPENAI_REQUESTS_PER_MINUTE = _env_int("OPENAI_REQUESTS_PER_MINUTE", default=0, min_value=0)
+OPENAI_TOKENS_PER_MINUTE = _env_int("OPENAI_TOKENS_PER_MINUTE", default=0, min_value=0)
+
+# OpenAI 呼び出しの最大試行回数（429 / 5xx / 接続エラー時にバックオフして再試行）
+OPENAI_MAX_ATTEMPTS = _env_int("OPENAI_MAX_ATTEMPTS", default=4, min_value=1)
+
+# 要約をストリーミングで受け取るか（最初のトークンの待ち時間・途中の停止を検知して打ち切り、再試行する）
+OPENAI_STREAM = _env_bool("OPENAI_STREAM", default=False)
+
+# ストリーミング時、リクエストから最初のトークンが届くまで待つ秒数
+OPENAI_FIRST_TOKEN_TIMEOUT_SECONDS = _env_int("OPENAI_FIRST_TOKEN_TIMEOUT_SECONDS", default=30, min_value=1)
+
+# ストリーミング時、トークンが途切れてから停止とみなすまでの秒数
+OPENAI_STALL_TIMEOUT_SECONDS = _env_int("OPENAI_STALL_TIMEOUT_SECONDS", default=15, min_value=1)
+
+# システムプロンプトとモデルから作ったキーを prompt_cache_key として送るか（同じ接頭辞のリクエストをプロンプトキャッシュに当てやすくする。openai 1.98.0 以降が必要）
+OPENAI_PROMPT_CACHE_KEY = _env_bool("OPENAI_PROMPT_CACHE_KEY", default=False)
+
+# 実行ごとの推定コストの計算に使う単価（100万トークンあたりの USD。キャッシュ済み入力は未設定なら通常の入力単価）
+OPENAI_INPUT_COST_PER_MTOK = _env_float("OPENAI_INPUT_COST_PER_MTOK", default=0.0, min_value=0.0)
+OPENAI_CACHED_INPUT_COST_PER_MTOK = _env_float("OPENAI_CACHED_INPUT_COST_PER_MTOK", default=None, min_value=0.0)
+OPENAI_OUTPUT_COST_PER_MTOK = _env_float("OPENAI_OUTPUT_COST_PER_MTOK", default=0.0, min_value=0.0)
+
+# 本文の長さ・ソースで要約モデルを切り替えるルール（JSON の配列。上から順に判定し、最後の要素は既定の振り分け先）
+# 例: [{"name": "fast", "model": "gpt-4.1-nano", "max_chars": 2000}, {"name": "strong", "model": "gpt-4.1"}]
+MODEL_ROUTES = _env_str("MODEL_ROUTES")
+
+# 429・接続エラー・5xx が続いたときに切り替える予備のモデル／プロバイダ（JSON の配列。上から順に試す）
+# 例: [{"name": "mini", "model": "gpt-4.1-mini"}, {"name": "azure", "base_url": "https://example.openai.azure.com/openai/v1", "api_key_env": "AZURE_OPENAI_API_KEY"}]
+OPENAI_FALLBACKS = _env_str("OPENAI_FALLBACKS")
+
+# 連続で何回失敗したら、そのバックエンドを一時的に使わない（サーキットを開く）か
+CIRCUIT_BREAKER_FAILURES = _env_int("CIRCUIT_BREAKER_FAILURES", default=3, min_value=1)
+
+# サーキットを開いてから再びバックエンドを試すまでの秒数
+CIRCUIT_BREAKER_RESET_SECONDS = _env_int("CIRCUIT_BREAKER_RESET_SECONDS", default=60, min_value=1)
+
+# OpenAI Batch API で要約するか（安価だが完了まで時間がかかる。週次の振り返り向け）
+OPENAI_BATCH_API = _env_bool("OPENAI_BATCH_API", default=False)
+
+# Batch API の完了を待つ上限（分）。超えたら残りを通常の API 呼び出しで要約する
+OPENAI_BATCH_DEADLINE_MINUTES = _env_int("OPENAI_BATCH_DEADLINE_MINUTES", default=60, min_value=1)
+
+# Batch API の状態確認の間隔（秒）
+OPENAI_BATCH_POLL_SECONDS = _env_int("OPENAI_BATCH_POLL_SECONDS", default=30, min_value=1)
+
 # 抽出する最大文字数
 MAX_EXTRACT_CHARS = 10_000
 
+# 抽出する最大トークン数（推定値。CJK は1文字≒1トークン、それ以外は4文字≒1トークン）
+# 既定値は MAX_EXTRACT_CHARS と同じにし、日本語の記事も従来の文字数上限より短くは切らない
+MAX_EXTRACT_TOKENS = _env_int("MAX_EXTRACT_TOKENS", default=MAX_EXTRACT_CHARS, min_value=100)
+
+# 短い記事（SHORT_ARTICLE_CHAR_THRESHOLD 未満）を複数まとめて1回の OpenAI 呼び出しで要約するか
+PACK_SHORT_ITEMS = _env_bool("PACK_SHORT_ITEMS", default=False)
+
+# 1回の呼び出しにまとめる短い記事の最大件数
+PACK_MAX_ITEMS = _env_int("PACK_MAX_ITEMS", default=5, min_value=2)
+
+# 長文モード（本文を分割して並列に要約し、最後に1つの要約へまとめる）
+LONG_DOC_SUMMARY = _env_bool("LONG_DOC_SUMMARY", default=False)
+
+# 長文モードで抽出する最大文字数（MAX_EXTRACT_CHARS の代わりに使う）
+LONG_DOC_MAX_CHARS = _env_int("LONG_DOC_MAX_CHARS", default=60_000, min_value=1)
+
+# 長文モードの1チャンクの最大文字数（これ以下の本文は分割しない）
+LONG_DOC_CHUNK_CHARS = _env_int("LONG_DOC_CHUNK_CHARS", default=8_000, min_value=500)
+
+# 長文モードで1記事のチャンクを同時に要約する数
+LONG_DOC_CONCURRENCY = _env_int("LONG_DOC_CONCURRENCY", default=4, min_value=1)
+
 # 要約の最大文字数
 SUMMARY_CHAR_LIMIT = 500
 
@@ -58,6 +226,23 @@ Always respond in Japanese.
 2) 要点（箇条書き3〜6行）
 """.strip()
 
+# 長文モードで各チャンクを要約するときのプロンプト（最終要約は DEFAULT_SYSTEM_PROMPT 等で行う）
+CHUNK_SYSTEM_PROMPT = """
+You are a Japanese summarization bot.
+The user message is one part of a longer article.
+Summarize only the facts and key points of this part in Japanese, within 400 characters.
+Do not add introductions, conclusions or opinions; the parts will be merged later.
+""".strip()
+
+# 短い記事をまとめて要約するときにシステムプロンプトの後ろに付ける指示
+PACKED_PROMPT_SUFFIX = """
+# 複数記事の同時要約
+The user message is a JSON object {"articles": [{"id": "...", "text": "..."}]}.
+Summarize each article independently, following all the rules above.
+Respond only with a JSON object {"summaries": [{"id": "...", "summary": "..."}]}
+containing exactly one entry per article id.
+""".strip()
+
 # Raindrop.io のタグ
 TAG_CONFIRMED = "確認済み"
 TAG_DELIVERED = "配信済み"
@@ -65,6 +250,22 @@ TAG_FAILED = "要約失敗"
 
 # Raindrop API の未整理コレクションID
 UNSORTED_COLLECTION_ID = -1
+
+# Raindrop API のゴミ箱コレクションID
+TRASH_COLLECTION_ID = -99
+
+# 対象期間と除外タグの絞り込みを Raindrop の search パラメータでサーバー側にも任せるか（取得件数を減らす）
+RAINDROP_SEARCH_FILTER = _env_bool("RAINDROP_SEARCH_FILTER", default=False)
+# 未整理一覧の2ページ目以降を同時に取得するページ数（1ページ目の総件数からページ数を求める）
+RAINDROP_PAGE_CONCURRENCY = _env_int("RAINDROP_PAGE_CONCURRENCY", default=4, min_value=1)
+# メール送信後の Raindrop への note 書き戻しの並列数（タグ付与・重複削除は一括APIで行う）
+RAINDROP_WRITE_CONCURRENCY = _env_int("RAINDROP_WRITE_CONCURRENCY", default=4, min_value=1)
+# Raindrop API への1分あたりのリクエスト上限（取得・更新・削除で共有。応答ヘッダの値で補正する）
+RAINDROP_REQUESTS_PER_MINUTE = _env_int("RAINDROP_REQUESTS_PER_MINUTE", default=120, min_value=1)
+# 未整理アイテムを CACHE_DIR の SQLite にミラーし、前回同期以降に追加された分だけを取得するか
+RAINDROP_MIRROR = _env_bool("RAINDROP_MIRROR", default=False)
+# ミラーの前回同期からこの分数以内なら一覧取得を省略する（失敗した実行のやり直しを速くする）
+RAINDROP_MIRROR_MAX_AGE_MINUTES = _env_int("RAINDROP_MIRROR_MAX_AGE_MINUTES", default=30, min_value=0)
 # --------------------------------
 
 
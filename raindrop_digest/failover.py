@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .models import TokenUsage
+from .summarizer import (
+    Summarizer,
+    SummaryConnectionError,
+    SummaryError,
+    SummaryRateLimitError,
+    SummaryServerError,
+)
+
+logger = logging.getLogger(__name__)
+
+# Errors that say "this backend cannot serve right now", not "this input is bad".
+_FAILOVER_ERRORS = (SummaryRateLimitError, SummaryConnectionError, SummaryServerError)
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one backend.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and the
+    backend is skipped for ``reset_seconds``; then a single trial call is let
+    through, and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 3,
+        reset_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or self._clock() - self._opened_at < self._reset_seconds:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._trial_in_flight or self._consecutive_failures >= self._failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+@dataclass
+class BackendConfig:
+    """One entry of ``OPENAI_FALLBACKS``; the API key is read from ``api_key_env``."""
+
+    name: str
+    model: Optional[str] = None
+    base_url: Optional[str] = None
+    api_key_env: Optional[str] = None
+
+
+@dataclass
+class BackendStats:
+    name: str
+    successes: int = 0
+    failures: int = 0
+    skipped: int = 0
+
+    @property
+    def success_rate(self) -> float:
+        attempts = self.successes + self.failures
+        return self.successes / attempts if attempts else 0.0
+
+
+def parse_fallback_backends(raw: str) -> List[BackendConfig]:
+    """Parse ``OPENAI_FALLBACKS``: a JSON list of BackendConfig objects."""
+    try:
+        entries = json.loads(raw)
+    except ValueError as exc:
+        raise ValueError(f"OPENAI_FALLBACKS must be a JSON list: {exc}") from exc
+    if not isinstance(entries, list):
+        raise ValueError("OPENAI_FALLBACKS must be a JSON list of backend objects.")
+    backends: List[BackendConfig] = []
+    for idx, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not any(entry.get(k) for k in ("model", "base_url", "api_key_env")):
+            raise ValueError(
+                f"OPENAI_FALLBACKS[{idx}] must be an object with 'model', 'base_url' or 'api_key_env'."
+            )
+        unknown = set(entry) - set(BackendConfig.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"OPENAI_FALLBACKS[{idx}] has unknown keys: {sorted(unknown)}")
+        entry = dict(entry)
+        entry.setdefault("name", f"fallback-{idx + 1}")
+        backends.append(BackendConfig(**entry))
+    return backends
+
+
+class FailoverSummarizer:
+    """
+    Try an ordered chain of Summarizers until one answers.
+
+    A rate limit, connection failure or persistent 5xx on one backend (after its
+    own retries) moves the item to the next backend instead of failing it; other
+    errors, which would fail everywhere, are raised at once. Each backend has a
+    CircuitBreaker so a backend that keeps failing is skipped until it recovers.
+    Exposes the same summarizing interface as Summarizer, delegating the cache and
+    prompt to the primary backend.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Tuple[str, Summarizer]],
+        *,
+        failure_threshold: int = 3,
+        reset_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not backends:
+            raise ValueError("FailoverSummarizer requires at least one backend.")
+        self._backends = list(backends)
+        self._breakers = {
+            name: CircuitBreaker(failure_threshold=failure_threshold, reset_seconds=reset_seconds, clock=clock)
+            for name, _summarizer in self._backends
+        }
+        self._stats = {name: BackendStats(name) for name, _summarizer in self._backends}
+        self._lock = threading.Lock()
+        self.failovers = 0
+
+    @property
+    def primary(self) -> Summarizer:
+        return self._backends[0][1]
+
+    @property
+    def client(self) -> Any:
+        return self.primary.client
+
+    @property
+    def system_prompt(self) -> str:
+        return self.primary.system_prompt
+
+    @property
+    def stats(self) -> List[BackendStats]:
+        return list(self._stats.values())
+
+    def cached_summary(self, text: str, system_prompt: Optional[str] = None) -> Optional[str]:
+        return self.primary.cached_summary(text, system_prompt)
+
+    def remember(self, text: str, summary: str, system_prompt: Optional[str] = None) -> None:
+        self.primary.remember(text, summary, system_prompt)
+
+    def summarize(self, text: str) -> str:
+        summary, _usage = self.summarize_with_usage(text)
+        return summary
+
+    def summarize_with_usage(
+        self, text: str, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> Tuple[str, TokenUsage]:
+        summary, usage, _backend = self.summarize_with_backend(text, system_prompt, **kwargs)
+        return summary, usage
+
+    def summarize_with_backend(
+        self, text: str, system_prompt: Optional[str] = None, **kwargs: Any
+    ) -> Tuple[str, TokenUsage, Summarizer]:
+        """summarize_with_usage plus the backend that answered, for callers that cache the result themselves."""
+        last_error: Optional[SummaryError] = None
+        for position, (name, summarizer) in enumerate(self._backends):
+            breaker = self._breakers[name]
+            if not breaker.allow():
+                self._count(name, "skipped")
+                continue
+            settled = False
+            try:
+                summary, usage = summarizer.summarize_with_usage(text, system_prompt, **kwargs)
+                settled = True
+            except _FAILOVER_ERRORS as exc:
+                settled = True
+                breaker.record_failure()
+                self._count(name, "failures")
+                last_error = exc
+                if position + 1 < len(self._backends):
+                    with self._lock:
+                        self.failovers += 1
+                    logger.warning("Backend %s failed (%s); failing over to the next backend", name, exc)
+                continue
+            except SummaryError:
+                # The backend answered; the request itself is the problem.
+                settled = True
+                breaker.record_success()
+                raise
+            finally:
+                if not settled:
+                    # Any other exception still ends a half-open trial; without this
+                    # the circuit would stay open for good.
+                    breaker.record_failure()
+            breaker.record_success()
+            self._count(name, "successes")
+            return summary, usage, summarizer
+        if last_error is not None:
+            raise last_error
+        raise SummaryConnectionError("All summarization backends are unavailable (circuits open).")
+
+    def _count(self, name: str, field_name: str) -> None:
+        with self._lock:
+            stats = self._stats[name]
+            setattr(stats, field_name, getattr(stats, field_name) + 1)
+
+    def log_stats(self, log: Any = logger) -> None:
+        log.info("Summarization failovers: %s", self.failovers)
+        for stat in self.stats:
+            log.info(
+                "Backend %s: successes=%s failures=%s skipped=%s success_rate=%.0f%%%s",
+                stat.name,
+                stat.successes,
+                stat.failures,
+                stat.skipped,
+                stat.success_rate * 100,
+                " (circuit open)" if self._breakers[stat.name].is_open else "",
+            )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .utils import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+_ENTRY_SUFFIX = ".json.gz"
+# Eviction trims the cache to this share of max_bytes, so the next stores do not
+# immediately trigger another directory scan.
+_EVICT_TO_RATIO = 0.9
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that let the server answer 304."""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    Persistent cache of fetched article pages.
+
+    Entries are keyed by ``canonicalize_url`` and stored as one gzip-compressed JSON
+    file each (body plus ``ETag``/``Last-Modified``), so the directory can be saved
+    and restored between GitHub Actions runs as-is. Within ``ttl_seconds`` a cached
+    page is served without contacting the site; after that it is revalidated with a
+    conditional request. The least recently used entries are evicted once the
+    directory grows beyond ``max_bytes``. The directory size is kept as a running
+    total (scanned once, then adjusted per write), so only an eviction walks it.
+    """
+
+    def __init__(self, directory: str | Path, *, max_bytes: int = 200 * 1024 * 1024, ttl_seconds: float = 0):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+        return self._directory / f"{key}{_ENTRY_SUFFIX}"
+
+    def get(self, url: str) -> CachedPage | None:
+        path = self._path(url)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fp:
+                entry = CachedPage(**json.load(fp))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as exc:
+            logger.warning("Dropping unreadable HTTP cache entry %s: %s", path.name, exc)
+            self._drop(path)
+            return None
+        self._touch(path)
+        return entry
+
+    def is_fresh(self, entry: CachedPage) -> bool:
+        return self._ttl_seconds > 0 and time.time() - entry.stored_at < self._ttl_seconds
+
+    def store(self, url: str, response: httpx.Response) -> None:
+        entry = CachedPage(
+            url=url,
+            text=response.text,
+            stored_at=time.time(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        self._write(entry)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _mtime, size, _path in self._entries())
+            if self._size > self._max_bytes:
+                self._evict()
+
+    def revalidated(self, entry: CachedPage) -> None:
+        """Record a 304: the cached body is current as of now."""
+        entry.stored_at = time.time()
+        self._write(entry)
+
+    def _write(self, entry: CachedPage) -> None:
+        path = self._path(entry.url)
+        fd, tmp_name = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as fp:
+                json.dump(asdict(entry), fp, ensure_ascii=False)
+            new_size = os.path.getsize(tmp_name)
+            with self._lock:
+                try:
+                    old_size = path.stat().st_size
+                except FileNotFoundError:
+                    old_size = 0
+                os.replace(tmp_name, path)
+                if self._size is not None:
+                    self._size += new_size - old_size
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def _drop(self, path: Path) -> None:
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            if self._size is not None:
+                self._size -= size
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        # mtime doubles as the LRU timestamp (atime is often disabled).
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for path in self._directory.glob(f"*{_ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        # Called with the lock held. The scan also corrects any drift in the running total.
+        entries = self._entries()
+        total = sum(size for _mtime, size, _path in entries)
+        target = int(self._max_bytes * _EVICT_TO_RATIO)
+        entries.sort()
+        evicted = 0
+        for _mtime, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        self._size = total
+        if evicted:
+            logger.info("HTTP cache evicted %s entries (now %.1f MiB)", evicted, total / 1024 / 1024)
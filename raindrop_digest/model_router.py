@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+from .chunked_summarizer import ChunkedSummarizer
+from .failover import FailoverSummarizer
+from .models import TokenPrices, TokenUsage
+from .summarizer import Summarizer, SummaryError
+from .utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+TierSummarizer = Union[Summarizer, FailoverSummarizer, ChunkedSummarizer]
+
+
+@dataclass
+class ModelTier:
+    """
+    One routing rule. A text matches when it is within every limit that is set;
+    tiers are tried in order and the last one also takes whatever matched nothing.
+    Costs are USD per million tokens and only feed the run statistics; cached
+    input tokens are charged at ``cached_input_cost_per_mtok`` when it is set.
+    """
+
+    name: str
+    model: str
+    max_chars: Optional[int] = None
+    max_tokens: Optional[int] = None
+    sources: Optional[List[str]] = None
+    input_cost_per_mtok: float = 0.0
+    output_cost_per_mtok: float = 0.0
+    cached_input_cost_per_mtok: Optional[float] = None
+
+    def matches(self, text: str, source: str, tokens: int) -> bool:
+        if self.max_chars is not None and len(text) > self.max_chars:
+            return False
+        if self.max_tokens is not None and tokens > self.max_tokens:
+            return False
+        if self.sources is not None and source not in self.sources:
+            return False
+        return True
+
+    def cost_usd(self, usage: TokenUsage) -> float:
+        return TokenPrices(
+            input_per_mtok=self.input_cost_per_mtok,
+            output_per_mtok=self.output_cost_per_mtok,
+            cached_input_per_mtok=self.cached_input_cost_per_mtok,
+        ).cost_usd(usage)
+
+
+@dataclass
+class TierStats:
+    name: str
+    model: str
+    items: int = 0
+    failures: int = 0
+    latency_seconds: float = 0.0
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    cost_usd: float = 0.0
+
+    @property
+    def average_latency(self) -> float:
+        attempts = self.items + self.failures
+        return self.latency_seconds / attempts if attempts else 0.0
+
+
+def parse_model_routes(raw: str) -> List[ModelTier]:
+    """Parse ``MODEL_ROUTES``: a JSON list of objects with ModelTier's fields."""
+    try:
+        entries = json.loads(raw)
+    except ValueError as exc:
+        raise ValueError(f"MODEL_ROUTES must be a JSON list: {exc}") from exc
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("MODEL_ROUTES must be a non-empty JSON list of route objects.")
+    tiers: List[ModelTier] = []
+    for idx, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("model"):
+            raise ValueError(f"MODEL_ROUTES[{idx}] must be an object with a 'model'.")
+        unknown = set(entry) - set(ModelTier.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"MODEL_ROUTES[{idx}] has unknown keys: {sorted(unknown)}")
+        entry = dict(entry)
+        entry.setdefault("name", entry["model"])
+        tiers.append(ModelTier(**entry))
+    return tiers
+
+
+class ModelRouter:
+    """
+    Send each text to the summarizer of the first tier it matches.
+
+    Cheap, fast models can take short announcements while long or difficult
+    sources go to a stronger model. Per-tier item counts, latency, tokens and
+    estimated cost are collected so the routing rules can be tuned from the logs.
+    """
+
+    def __init__(self, routes: Sequence[Tuple[ModelTier, TierSummarizer]]):
+        if not routes:
+            raise ValueError("ModelRouter requires at least one route.")
+        self._routes = list(routes)
+        self._stats = {tier.name: TierStats(tier.name, tier.model) for tier, _summarizer in self._routes}
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> List[TierStats]:
+        return list(self._stats.values())
+
+    def route(self, text: str, source: str = "web") -> Tuple[ModelTier, TierSummarizer]:
+        tokens = estimate_tokens(text)
+        for tier, summarizer in self._routes:
+            if tier.matches(text, source, tokens):
+                return tier, summarizer
+        return self._routes[-1]
+
+    def summarize(self, text: str, source: str = "web") -> str:
+        summary, _usage = self.summarize_with_usage(text, source=source)
+        return summary
+
+    def summarize_with_usage(self, text: str, source: str = "web") -> Tuple[str, TokenUsage]:
+        tier, summarizer = self.route(text, source)
+        logger.info("Routing %s chars (source=%s) to tier=%s model=%s", len(text), source, tier.name, tier.model)
+        started = time.perf_counter()
+        try:
+            summary, usage = summarizer.summarize_with_usage(text)
+        except SummaryError:
+            self._record(tier, time.perf_counter() - started, None)
+            raise
+        self._record(tier, time.perf_counter() - started, usage)
+        return summary, usage
+
+    def _record(self, tier: ModelTier, elapsed: float, usage: Optional[TokenUsage]) -> None:
+        with self._lock:
+            stats = self._stats[tier.name]
+            stats.latency_seconds += elapsed
+            if usage is None:
+                stats.failures += 1
+                return
+            stats.items += 1
+            stats.usage.add(usage)
+            stats.cost_usd += tier.cost_usd(usage)
+
+    def log_stats(self, log: Any = logger) -> None:
+        for stat in self.stats:
+            log.info(
+                "Model tier %s (model=%s): items=%s failures=%s avg_latency=%.2fs "
+                "prompt=%s cached=%s completion=%s cost=$%.4f",
+                stat.name,
+                stat.model,
+                stat.items,
+                stat.failures,
+                stat.average_latency,
+                stat.usage.prompt_tokens,
+                stat.usage.cached_tokens,
+                stat.usage.completion_tokens,
+                stat.cost_usd,
+            )
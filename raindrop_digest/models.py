@@ -21,6 +21,50 @@ class ExtractedContent:
     source: str  # e.g., "youtube", "x", "web"
     length: int
     hero_image_url: Optional[str] = None
+    title: Optional[str] = None
+    # What text compaction removed before trimming (for logging).
+    chars_saved: int = 0
+    tokens_saved: int = 0
+
+
+@dataclass
+class TokenUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+    # Part of prompt_tokens served from the provider's prompt cache.
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def add(self, other: "TokenUsage") -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.calls += other.calls
+        self.cached_tokens += other.cached_tokens
+
+
+@dataclass
+class TokenPrices:
+    """USD per million tokens; cached input defaults to the full input price."""
+
+    input_per_mtok: float = 0.0
+    output_per_mtok: float = 0.0
+    cached_input_per_mtok: Optional[float] = None
+
+    def cost_usd(self, usage: TokenUsage) -> float:
+        cached_price = self.input_per_mtok if self.cached_input_per_mtok is None else self.cached_input_per_mtok
+        return (
+            (usage.prompt_tokens - usage.cached_tokens) * self.input_per_mtok
+            + usage.cached_tokens * cached_price
+            + usage.completion_tokens * self.output_per_mtok
+        ) / 1_000_000
 
 
 @dataclass
@@ -31,6 +75,10 @@ class SummaryResult:
     error: Optional[str] = None
     hero_image_url: Optional[str] = None
     source_length: Optional[int] = None
+    token_usage: Optional[TokenUsage] = None
+    # Set when the text nearly matched another item and that item's summary is shared.
+    duplicate_of: Optional[RaindropItem] = None
+    duplicate_similarity: Optional[float] = None
 
     def is_success(self) -> bool:
         return self.status == "success"
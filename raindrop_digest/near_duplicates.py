@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .models import RaindropItem, SummaryResult
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed so signatures stored by earlier runs stay comparable.
+_PERMUTATION_SEED = 20240601
+
+# Shorter texts (error pages, teasers) share too much boilerplate to compare safely.
+MIN_FINGERPRINT_CHARS = 200
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """
+    Character n-grams of ``text`` after NFKC normalization, lowercasing and
+    removing whitespace. Character shingles need no word segmentation, so they
+    work the same for Japanese and English and ignore line-wrapping differences
+    between copies of an article.
+    """
+    normalized = _WHITESPACE.sub("", unicodedata.normalize("NFKC", text).lower())
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures whose agreement rate estimates the Jaccard similarity of shingle sets."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5):
+        rng = random.Random(_PERMUTATION_SEED)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> Signature:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+            for shingle in shingles(text, self.shingle_size)
+        ]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in self._permutations
+        )
+
+
+def similarity(left: Signature, right: Signature) -> float:
+    if not left or len(left) != len(right):
+        return 0.0
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+class LshIndex:
+    """
+    Locality-sensitive hashing over MinHash signatures.
+
+    Signatures are cut into ``bands``; two texts become candidates when any band
+    matches exactly, which finds pairs above roughly (1/bands)^(rows per band)
+    similarity without comparing every pair. Candidates are then checked against
+    the full signature.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands}).")
+        self._rows = num_perm // bands
+        self._bands = bands
+        self._buckets: Dict[Tuple[int, Signature], List[str]] = {}
+        self._signatures: Dict[str, Signature] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Signature) -> List[Tuple[int, Signature]]:
+        return [(band, signature[band * self._rows : (band + 1) * self._rows]) for band in range(self._bands)]
+
+    def add(self, key: str, signature: Signature) -> None:
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def query(self, signature: Signature, threshold: float) -> Optional[Tuple[str, float]]:
+        """Most similar indexed key at or above ``threshold``."""
+        candidates: Set[str] = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        best: Optional[Tuple[str, float]] = None
+        for key in candidates:
+            score = similarity(signature, self._signatures[key])
+            if score >= threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+
+@dataclass
+class Fingerprint:
+    item: RaindropItem
+    signature: Signature
+    summary: Optional[str] = None
+    previous_run: bool = False
+
+
+@dataclass
+class DuplicateMatch:
+    """The item whose summary a near-duplicate shares."""
+
+    original: RaindropItem
+    similarity: float
+    # Set when the original was summarized by an earlier run.
+    summary: Optional[str] = None
+
+    @property
+    def previous_run(self) -> bool:
+        return self.summary is not None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    item_id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    item_created_at REAL NOT NULL,
+    signature BLOB NOT NULL,
+    summary TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_recorded_at ON fingerprints (recorded_at);
+"""
+
+
+class NearDuplicateStore:
+    """SQLite store of summarized items' signatures, kept for ``max_age_days``."""
+
+    def __init__(self, path: str | Path, *, max_age_days: int = 14):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM fingerprints WHERE recorded_at < ?", (time.time() - max_age_days * 24 * 60 * 60,)
+            )
+            self._conn.commit()
+
+    def load(self) -> List[Fingerprint]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id, link, title, item_created_at, signature, summary FROM fingerprints"
+            ).fetchall()
+        fingerprints = []
+        for item_id, link, title, created_at, blob, summary in rows:
+            item = RaindropItem(
+                id=item_id,
+                link=link,
+                title=title,
+                created=datetime.fromtimestamp(created_at, tz=timezone.utc),
+                tags=[],
+            )
+            signature = struct.unpack(f"<{len(blob) // 4}I", blob)
+            fingerprints.append(Fingerprint(item, signature, summary, previous_run=True))
+        return fingerprints
+
+    def save(self, fingerprints: Sequence[Fingerprint]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints "
+                "(item_id, link, title, item_created_at, signature, summary, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        fp.item.id,
+                        fp.item.link,
+                        fp.item.title,
+                        fp.item.created.timestamp(),
+                        struct.pack(f"<{len(fp.signature)}I", *fp.signature),
+                        fp.summary,
+                        now,
+                    )
+                    for fp in fingerprints
+                    if fp.summary
+                ],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class NearDuplicateDetector:
+    """
+    Group items whose extracted text is nearly the same (syndicated copies, AMP
+    or mobile variants, mirrors) so only the first one is summarized.
+
+    ``check`` is called once per item in arrival order: the first item of a
+    group is indexed and summarized, later ones get a DuplicateMatch pointing at
+    it. With a ``store`` the summaries of earlier runs are matched as well and
+    reused directly, and this run's summaries are saved by ``record``.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.8,
+        store: Optional[NearDuplicateStore] = None,
+        hasher: Optional[MinHasher] = None,
+        bands: int = 16,
+    ):
+        self._threshold = threshold
+        self._store = store
+        self._hasher = hasher or MinHasher()
+        self._index = LshIndex(self._hasher.num_perm, bands)
+        self._fingerprints: Dict[str, Fingerprint] = {}
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.in_run_duplicates = 0
+        self.previous_run_duplicates = 0
+        if store is not None:
+            for fingerprint in store.load():
+                self._add(fingerprint)
+            logger.info("Loaded %s fingerprints from earlier runs", len(self._fingerprints))
+
+    def _add(self, fingerprint: Fingerprint) -> None:
+        key = str(fingerprint.item.id)
+        self._fingerprints[key] = fingerprint
+        self._index.add(key, fingerprint.signature)
+
+    def check(self, item: RaindropItem, text: str) -> Optional[DuplicateMatch]:
+        if len(text) < MIN_FINGERPRINT_CHARS:
+            return None
+        signature = self._hasher.signature(text)
+        with self._lock:
+            self.checked += 1
+            found = self._index.query(signature, self._threshold)
+            if found is not None:
+                fingerprint = self._fingerprints[found[0]]
+                # The same bookmark seen again (e.g. after a failed send) is not a duplicate.
+                if fingerprint.item.id != item.id:
+                    if fingerprint.previous_run:
+                        self.previous_run_duplicates += 1
+                        return DuplicateMatch(fingerprint.item, found[1], fingerprint.summary)
+                    self.in_run_duplicates += 1
+                    return DuplicateMatch(fingerprint.item, found[1])
+            self._add(Fingerprint(item, signature))
+            return None
+
+    def record(self, results: Sequence[SummaryResult]) -> None:
+        """Persist this run's summarized originals for later runs."""
+        if self._store is None:
+            return
+        with self._lock:
+            fresh = []
+            for result in results:
+                fingerprint = self._fingerprints.get(str(result.item.id))
+                if fingerprint is None or fingerprint.previous_run or result.duplicate_of is not None:
+                    continue
+                if result.is_success() and result.summary:
+                    fingerprint.summary = result.summary
+                    fresh.append(fingerprint)
+        self._store.save(fresh)
+
+    def log_stats(self, log: logging.Logger = logger) -> None:
+        log.info(
+            "Near-duplicates: checked=%s in_run=%s previous_runs=%s",
+            self.checked,
+            self.in_run_duplicates,
+            self.previous_run_duplicates,
+        )
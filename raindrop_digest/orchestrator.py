@@ -1,45 +1,161 @@
 from __future__ import annotations
 
+import functools
+import itertools
 import logging
-from typing import Dict, List, Tuple
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sized, Tuple, Union
 
 from . import config
-from .config import BATCH_LOOKBACK_DAYS, TAG_DELIVERED, TAG_FAILED
+from .async_fetcher import BackgroundFetcher
+from .batch_summarizer import BatchSummarizer
+from .chunked_summarizer import ChunkedSummarizer
+from .packed_summarizer import PackedSummarizer
+from .config import (
+    BATCH_LOOKBACK_DAYS,
+    MAX_EXTRACT_CHARS,
+    MAX_EXTRACT_TOKENS,
+    TAG_DELIVERED,
+    TAG_FAILED,
+)
+from .failover import FailoverSummarizer, parse_fallback_backends
 from .email_formatter import build_email_body, build_email_subject
+from .http_cache import HttpCache
 from .mailer import MailError, build_mailer
-from .models import RaindropItem, SummaryResult
-from .raindrop_client import RaindropApiError, RaindropClient, RaindropConnectionError
+from .model_router import ModelRouter, parse_model_routes
+from .models import ExtractedContent, RaindropItem, SummaryResult, TokenPrices, TokenUsage
+from .near_duplicates import NearDuplicateDetector, NearDuplicateStore
+from .pipeline import Finished, Stage, StagedPipeline
+from .raindrop_client import (
+    PagingReport,
+    RaindropClient,
+    unsorted_search_query,
+)
+from .raindrop_mirror import RaindropMirror
+from .run_journal import RunJournal
+from .rate_limiter import OpenAIRateLimiter, RaindropRateLimiter
 from .summarizer import (
+    PROMPT_CACHE_MIN_TOKENS,
+    StreamingTimeouts,
     Summarizer,
     SummaryConnectionError,
     SummaryError,
     SummaryRateLimitError,
 )
-from .text_extractor import ExtractionError, extract_text
+from .summary_cache import SummaryCache
+from .text_extractor import (
+    ExtractionError,
+    HtmlFetcher,
+    ParsePool,
+    ensure_supported_source,
+    fetch_html,
+    parse_html,
+)
 
 from .utils import (
     canonicalize_url,
     choose_preferred_duplicate,
+    estimate_tokens,
     filter_new_items,
     threshold_from_now,
     to_jst,
     utc_now,
 )
+from .writeback import ItemUpdate, RaindropWriteBack, WriteBackReport
 
 logger = logging.getLogger(__name__)
 
 
-def run(settings: config.Settings) -> List[SummaryResult]:
-    now = utc_now()
+class PendingWriteBackError(RuntimeError):
+    """A previous run's digest was mailed but some of its items are still not written back."""
+
+
+def run(settings: config.Settings, *, resume: bool = False) -> List[SummaryResult]:
+    """
+    Run one batch. With ``resume`` the unfinished run recorded in the run journal
+    (``CACHE_DIR/run_journal.jsonl``) is continued instead of starting over.
+    """
+    run_started = time.perf_counter()
+    journal = _open_journal(resume)
+    now = journal.state.now if journal is not None else utc_now()
     now_jst = to_jst(now)
-    threshold = threshold_from_now(now_jst, BATCH_LOOKBACK_DAYS)
+    threshold = journal.state.threshold if journal is not None else threshold_from_now(now_jst, BATCH_LOOKBACK_DAYS)
 
-    raindrop = RaindropClient(token=settings.raindrop_token)
+    raindrop = RaindropClient(
+        token=settings.raindrop_token,
+        rate_limiter=RaindropRateLimiter(config.RAINDROP_REQUESTS_PER_MINUTE),
+    )
+    writeback = RaindropWriteBack(raindrop, concurrency=config.RAINDROP_WRITE_CONCURRENCY)
+    mirror = None
+    if config.RAINDROP_MIRROR and config.CACHE_DIR:
+        mirror = RaindropMirror(Path(config.CACHE_DIR) / "raindrop_mirror.sqlite3")
+    start_journal = journal is None and bool(config.CACHE_DIR)
+    summary_cache = None
+    if config.CACHE_DIR:
+        summary_cache = SummaryCache(
+            Path(config.CACHE_DIR) / "summaries.sqlite3",
+            max_age_days=config.SUMMARY_CACHE_MAX_AGE_DAYS,
+            max_entries=config.SUMMARY_CACHE_MAX_ENTRIES,
+        )
+    rate_limiter = OpenAIRateLimiter(
+        requests_per_minute=config.OPENAI_REQUESTS_PER_MINUTE or None,
+        tokens_per_minute=config.OPENAI_TOKENS_PER_MINUTE or None,
+    )
     summarizer = Summarizer(
         api_key=settings.openai_api_key,
         model=settings.openai_model,
         system_prompt=settings.summary_system_prompt,
+        cache=summary_cache,
+        rate_limiter=rate_limiter,
+        max_attempts=config.OPENAI_MAX_ATTEMPTS,
+        streaming=_streaming_timeouts(),
+        prompt_cache_key=config.OPENAI_PROMPT_CACHE_KEY,
+    )
+    batch_summarizer = None
+    if config.OPENAI_BATCH_API:
+        batch_summarizer = BatchSummarizer(
+            summarizer,
+            deadline_seconds=config.OPENAI_BATCH_DEADLINE_MINUTES * 60,
+            poll_interval_seconds=config.OPENAI_BATCH_POLL_SECONDS,
+            concurrency=config.SUMMARY_CONCURRENCY,
+        )
+    failover_chains: List[FailoverSummarizer] = []
+    default_summarizer = _with_fallbacks(
+        settings, summarizer, cache=summary_cache, failover_chains=failover_chains
     )
+    max_extract_chars = MAX_EXTRACT_CHARS
+    max_extract_tokens: Optional[int] = config.MAX_EXTRACT_TOKENS
+    long_doc_mode = config.LONG_DOC_SUMMARY and batch_summarizer is None
+    # Also what the batch falls back to for the items it leaves unanswered.
+    text_summarizer = _build_text_summarizer(
+        settings,
+        default_summarizer,
+        cache=summary_cache,
+        rate_limiter=rate_limiter,
+        failover_chains=failover_chains,
+        long_doc=long_doc_mode,
+    )
+    if long_doc_mode:
+        max_extract_chars = config.LONG_DOC_MAX_CHARS
+        max_extract_tokens = None
+    packer = None
+    if config.PACK_SHORT_ITEMS and batch_summarizer is None:
+        packer = PackedSummarizer(default_summarizer, max_items=config.PACK_MAX_ITEMS)
+    near_duplicate_store = None
+    near_duplicates = None
+    if config.NEAR_DUPLICATE_DETECTION:
+        if config.CACHE_DIR:
+            near_duplicate_store = NearDuplicateStore(
+                Path(config.CACHE_DIR) / "near_duplicates.sqlite3",
+                max_age_days=config.NEAR_DUPLICATE_DAYS,
+            )
+        near_duplicates = NearDuplicateDetector(
+            threshold=config.NEAR_DUPLICATE_THRESHOLD, store=near_duplicate_store
+        )
     mailer = build_mailer(
         aws_region=settings.aws_region,
         aws_access_key_id=settings.aws_access_key_id,
@@ -57,100 +173,137 @@ def run(settings: config.Settings) -> List[SummaryResult]:
         else "default",
     )
     logger.info("Using mail provider=%s", mailer.provider)
+    _log_prompt_prefix(settings.summary_system_prompt)
+    if batch_summarizer is not None:
+        logger.info(
+            "Using OpenAI Batch API: deadline=%smin poll=%ss",
+            config.OPENAI_BATCH_DEADLINE_MINUTES,
+            config.OPENAI_BATCH_POLL_SECONDS,
+        )
+    if config.OPENAI_STREAM:
+        logger.info(
+            "Using streamed completions: first_token_timeout=%ss stall_timeout=%ss",
+            config.OPENAI_FIRST_TOKEN_TIMEOUT_SECONDS,
+            config.OPENAI_STALL_TIMEOUT_SECONDS,
+        )
+    if long_doc_mode:
+        logger.info(
+            "Using long-document mode: max_chars=%s chunk_chars=%s concurrency=%s",
+            config.LONG_DOC_MAX_CHARS,
+            config.LONG_DOC_CHUNK_CHARS,
+            config.LONG_DOC_CONCURRENCY,
+        )
+    if packer is not None:
+        logger.info("Packing short items: up to %s per request", packer.max_items)
 
     failure_notified = False
     try:
-        raw_items = raindrop.fetch_unsorted_items()
-        targets = filter_new_items(raw_items, threshold)
-        targets, duplicates = _dedupe_targets(targets)
-        if duplicates:
+        if start_journal:
+            # Raises while mailed items are left untagged, keeping their journal.
+            _finish_pending_write_back(writeback, mirror)
+            journal = RunJournal.start(_journal_path(), now=now, threshold=threshold)
+        if journal is not None and journal.state.mailed is not None:
+            results = journal.state.mailed
+            pending = [result for result in results if result.item.id not in journal.state.written_back]
             logger.info(
-                "Detected %s duplicate items; deleting redundant ones", len(duplicates)
+                "Digest of run %s was already mailed; writing back %s of %s items",
+                journal.state.run_id,
+                len(pending),
+                len(results),
             )
-            for dup in duplicates:
-                try:
-                    raindrop.delete_item(dup.id)
-                except (RaindropConnectionError, RaindropApiError) as exc:
-                    logger.warning(
-                        "Failed to delete duplicate item id=%s: %s", dup.id, exc
-                    )
-        logger.info(
-            "Processing %s target items (from %s total)", len(targets), len(raw_items)
-        )
+            _write_back(pending, writeback, mirror=mirror, journal=journal)
+            return results
+
+        paging_report = PagingReport()
+        search = unsorted_search_query(threshold) if config.RAINDROP_SEARCH_FILTER else None
+        if mirror is not None:
+            mirror.sync(
+                raindrop,
+                threshold,
+                search=search,
+                concurrency=config.RAINDROP_PAGE_CONCURRENCY,
+                report=paging_report,
+                max_age_seconds=config.RAINDROP_MIRROR_MAX_AGE_MINUTES * 60,
+            )
+            # Catches deletions, moves and UI tags the created-time sync cannot see.
+            mirror.refresh(raindrop, threshold, concurrency=config.RAINDROP_PAGE_CONCURRENCY)
+            target_stream: _TargetStream = _MirroredTargets(mirror.target_groups(threshold))
+        else:
+            items = raindrop.iter_unsorted_items(
+                threshold=threshold,
+                search=search,
+                concurrency=config.RAINDROP_PAGE_CONCURRENCY,
+                report=paging_report,
+            )
+            target_stream = _TargetStream(items, threshold)
+        targets = iter(target_stream)
+        # Wait only for the first target; the rest keep streaming in during processing.
+        first_target = next(targets, None)
 
-        results: List[SummaryResult] = []
-        if not targets:
-            logger.info("No new items to process; sending empty report.")
+        if first_target is None:
+            logger.info(
+                "No new items to process (from %s total); sending empty report.",
+                target_stream.fetched,
+            )
             subject = build_email_subject(now_jst)
             empty_text = f"過去{BATCH_LOOKBACK_DAYS}日分の保存リンクは0件でした。"
             empty_html = (
                 f"<p>過去{BATCH_LOOKBACK_DAYS}日分の保存リンクは0件でした。</p>"
             )
+            paging_notice = _paging_notice(paging_report)
+            if paging_notice:
+                empty_text += f"\n※ {paging_notice}"
+                empty_html += f"<p>※ {paging_notice}</p>"
             mailer.send(subject, empty_text, empty_html)
             logger.info("Empty report sent.")
-            return results
+            if journal is not None:
+                journal.finished()
+            return []
 
-        for idx, item in enumerate(targets, start=1):
-            logger.info("---- Processing item %s/%s ----", idx, len(targets))
-            logger.info("Raindrop id=%s title=%s", item.id, item.title)
-            logger.info("link=%s", item.link)
-            try:
-                content = extract_text(item.link)
-                logger.info(
-                    "Extracted content: chars=%s source=%s",
-                    content.length,
-                    content.source,
-                )
-                try:
-                    summary_text = summarizer.summarize(content.text)
-                    results.append(
-                        SummaryResult(
-                            item=item,
-                            status="success",
-                            summary=summary_text,
-                            hero_image_url=content.hero_image_url,
-                            source_length=content.length,
-                        )
-                    )
-                except (SummaryRateLimitError, SummaryConnectionError) as exc:
-                    logger.exception(
-                        "OpenAI transient failure for item %s: %s", item.id, exc
-                    )
-                    results.append(
-                        SummaryResult(
-                            item=item,
-                            status="failed",
-                            error=str(exc),
-                            hero_image_url=content.hero_image_url,
-                            source_length=content.length,
-                        )
-                    )
-                except SummaryError as exc:
-                    logger.exception(
-                        "Summarization failed for item %s: %s", item.id, exc
-                    )
-                    results.append(
-                        SummaryResult(
-                            item=item,
-                            status="failed",
-                            error=str(exc),
-                            hero_image_url=content.hero_image_url,
-                            source_length=content.length,
-                        )
-                    )
-            except (ExtractionError, SummaryError) as exc:
-                logger.exception("Failed to process item %s: %s", item.id, exc)
-                results.append(
-                    SummaryResult(item=item, status="failed", error=str(exc))
-                )
-            except Exception as exc:  # noqa: BLE001
-                logger.exception("Unexpected failure for item %s: %s", item.id, exc)
-                results.append(
-                    SummaryResult(item=item, status="failed", error=str(exc))
-                )
+        html_fetcher = _build_html_fetcher()
+        parse_pool = None
+        if config.PARSE_PROCESS_POOL:
+            parse_pool = ParsePool(config.PARSE_PROCESSES)
+            parse_pool.warm_up()
+        try:
+            results = _process_targets(
+                itertools.chain([first_target], targets),
+                text_summarizer,
+                fetch_concurrency=config.FETCH_CONCURRENCY,
+                parse_concurrency=config.PARSE_CONCURRENCY,
+                summary_concurrency=config.SUMMARY_CONCURRENCY,
+                fetcher=html_fetcher.fetch,
+                parse_pool=parse_pool,
+                batch_summarizer=batch_summarizer,
+                max_extract_chars=max_extract_chars,
+                max_extract_tokens=max_extract_tokens,
+                packer=packer,
+                near_duplicates=near_duplicates,
+                started_at=run_started,
+                journal=journal,
+            )
+        finally:
+            html_fetcher.close()
+            if parse_pool is not None:
+                parse_pool.close()
+        logger.info(
+            "Processed %s target items (from %s total)", target_stream.targets, target_stream.fetched
+        )
+        duplicates = target_stream.resolve(results)
+        if duplicates:
+            logger.info(
+                "Detected %s duplicate items; deleting redundant ones", len(duplicates)
+            )
+            delete_report = writeback.delete([dup.id for dup in duplicates])
+            delete_report.log_stats(logger)
+            if mirror is not None:
+                mirror.remove(dup.id for dup in duplicates if dup.id not in delete_report.failures)
 
+        paging_notice = _paging_notice(paging_report)
         subject = build_email_subject(now_jst)
-        text_body, html_body = build_email_body(now_jst, results)
+        text_body, html_body = build_email_body(
+            now_jst, results, [paging_notice] if paging_notice else []
+        )
         try:
             mailer.send(subject, text_body, html_body)
         except MailError as exc:
@@ -165,29 +318,33 @@ def run(settings: config.Settings) -> List[SummaryResult]:
                 logger.exception("Failed to send failure notification email as well.")
             logger.warning("Skipping Raindrop updates due to email failure.")
             _log_batch_counts(results)
+            _log_run_usage(results)
+            _log_summary_cache_stats(summary_cache)
+            _log_rate_limiter_stats(rate_limiter)
+            _log_raindrop_rate_limiter_stats(raindrop.rate_limiter)
+            _log_router_stats(text_summarizer)
+            _log_failover_stats(failover_chains)
+            if packer is not None:
+                packer.log_stats(logger)
+            if near_duplicates is not None:
+                near_duplicates.log_stats(logger)
             return results
 
-        for result in results:
-            try:
-                if result.is_success() and result.summary:
-                    note_text = f"▼サマリー\n{result.summary}"
-                    raindrop.append_note_and_tags(
-                        result.item, note_text, [TAG_DELIVERED]
-                    )
-                else:
-                    error_note = (
-                        f"要約失敗: {result.error}" if result.error else "要約失敗"
-                    )
-                    raindrop.append_note_and_tags(
-                        result.item, error_note, [TAG_DELIVERED, TAG_FAILED]
-                    )
-            except (RaindropConnectionError, RaindropApiError) as exc:
-                logger.exception(
-                    "Failed to update Raindrop item %s: %s", result.item.id, exc
-                )
-                continue
+        if journal is not None:
+            journal.mailed(results)
+        _write_back(results, writeback, mirror=mirror, journal=journal)
 
         _log_batch_counts(results)
+        _log_run_usage(results)
+        _log_summary_cache_stats(summary_cache)
+        _log_rate_limiter_stats(rate_limiter)
+        _log_raindrop_rate_limiter_stats(raindrop.rate_limiter)
+        _log_router_stats(text_summarizer)
+        _log_failover_stats(failover_chains)
+        if packer is not None:
+            packer.log_stats(logger)
+        if near_duplicates is not None:
+            near_duplicates.log_stats(logger)
         return results
     except Exception as exc:  # noqa: BLE001
         if not failure_notified:
@@ -201,6 +358,637 @@ def run(settings: config.Settings) -> List[SummaryResult]:
         raise
     finally:
         raindrop.close()
+        if summary_cache is not None:
+            summary_cache.close()
+        if near_duplicate_store is not None:
+            near_duplicate_store.close()
+        if mirror is not None:
+            mirror.close()
+        if journal is not None:
+            journal.close()
+
+
+def _journal_path() -> Path:
+    return Path(config.CACHE_DIR) / "run_journal.jsonl"
+
+
+def _open_journal(resume: bool) -> Optional[RunJournal]:
+    """The unfinished run to continue, when ``resume`` is requested and one exists."""
+    if not resume:
+        return None
+    if not config.CACHE_DIR:
+        logger.warning("--resume needs CACHE_DIR for the run journal; starting a new run")
+        return None
+    journal = RunJournal.resume(_journal_path())
+    if journal is None:
+        logger.info("No unfinished run to resume; starting a new run")
+    else:
+        logger.info(
+            "Resuming run %s from %s: extracted=%s summarized=%s mailed=%s",
+            journal.state.run_id,
+            journal.state.now.isoformat(),
+            len(journal.state.extracted),
+            len(journal.state.summarized),
+            journal.state.mailed is not None,
+        )
+    return journal
+
+
+def _finish_pending_write_back(writeback: RaindropWriteBack, mirror: Optional[RaindropMirror]) -> None:
+    """
+    Complete the write-back of a journaled run that mailed its digest but stopped
+    before tagging every item, so a new run does not mail those items again.
+
+    Raises PendingWriteBackError when some of them still fail. Their journal is
+    left in place, so the next run (or ``--resume``) retries them instead of
+    listing and mailing them a second time.
+    """
+    pending = RunJournal.resume(_journal_path())
+    if pending is None:
+        return
+    try:
+        if pending.state.mailed is None:
+            return
+        remaining = [result for result in pending.state.mailed if result.item.id not in pending.state.written_back]
+        logger.warning(
+            "Run %s mailed its digest but did not finish writing back; writing back %s items first",
+            pending.state.run_id,
+            len(remaining),
+        )
+        report = _write_back(remaining, writeback, mirror=mirror, journal=pending)
+    finally:
+        pending.close()
+    if report.failures:
+        raise PendingWriteBackError(
+            f"Run {pending.state.run_id} mailed its digest but {len(report.failures)} items are still "
+            f"not written back (ids={sorted(report.failures)}); not starting a new run. "
+            f"Delete {_journal_path()} to start one anyway."
+        )
+
+
+def _write_back(
+    results: List[SummaryResult],
+    writeback: RaindropWriteBack,
+    *,
+    mirror: Optional[RaindropMirror],
+    journal: Optional[RunJournal],
+) -> WriteBackReport:
+    updates = [_item_update(result) for result in results]
+    report = writeback.apply(updates)
+    report.log_stats(logger)
+    for update in updates:
+        if update.item.id in report.failures:
+            continue
+        if mirror is not None:
+            mirror.record_write_back(update.item, update.note_addition, update.tags)
+        if journal is not None:
+            journal.written_back(update.item.id)
+    # Left unfinished on failures, so --resume can retry the remaining items.
+    if journal is not None and not report.failures:
+        journal.finished()
+    return report
+
+
+def _item_update(result: SummaryResult) -> ItemUpdate:
+    if result.is_success() and result.summary:
+        return ItemUpdate(result.item, f"▼サマリー\n{result.summary}", [TAG_DELIVERED])
+    error_note = f"要約失敗: {result.error}" if result.error else "要約失敗"
+    return ItemUpdate(result.item, error_note, [TAG_DELIVERED, TAG_FAILED])
+
+
+def _paging_notice(report: PagingReport) -> Optional[str]:
+    """Email notice for Raindrop pages that could not be listed completely."""
+    if report.complete:
+        return None
+    logger.warning(
+        "Raindrop listing incomplete: total=%s pages=%s/%s missing=%s partial=%s",
+        report.total_count,
+        report.pages_fetched,
+        report.pages_expected,
+        report.missing_pages,
+        report.partial_pages,
+    )
+    parts = []
+    if report.missing_pages:
+        parts.append("取得できなかったページ: " + ", ".join(str(page) for page in report.missing_pages))
+    if report.partial_pages:
+        parts.append("件数が不足したページ: " + ", ".join(str(page) for page in report.partial_pages))
+    return (
+        f"Raindrop の一覧を一部取得できませんでした（{' / '.join(parts)}）。"
+        "今回の要約に含まれていないリンクがある可能性があります。"
+    )
+
+
+def _log_prompt_prefix(system_prompt: str) -> None:
+    prefix_tokens = estimate_tokens(system_prompt)
+    if prefix_tokens < PROMPT_CACHE_MIN_TOKENS:
+        logger.info(
+            "System prompt is ~%s tokens; OpenAI prompt caching needs a %s+ token prefix, "
+            "so cached_tokens will stay at 0",
+            prefix_tokens,
+            PROMPT_CACHE_MIN_TOKENS,
+        )
+    else:
+        logger.info("System prompt is ~%s tokens and eligible for prompt caching", prefix_tokens)
+
+
+def _streaming_timeouts() -> Optional[StreamingTimeouts]:
+    if not config.OPENAI_STREAM:
+        return None
+    return StreamingTimeouts(
+        first_token_seconds=config.OPENAI_FIRST_TOKEN_TIMEOUT_SECONDS,
+        stall_seconds=config.OPENAI_STALL_TIMEOUT_SECONDS,
+    )
+
+
+def _with_fallbacks(
+    settings: config.Settings,
+    summarizer: Summarizer,
+    *,
+    cache: Optional[SummaryCache],
+    failover_chains: List[FailoverSummarizer],
+) -> Summarizer | FailoverSummarizer:
+    """Chain ``summarizer`` with the OPENAI_FALLBACKS backends (same model unless overridden)."""
+    if not config.OPENAI_FALLBACKS:
+        return summarizer
+    backends: List[Tuple[str, Summarizer]] = [("primary", summarizer)]
+    for backend in parse_fallback_backends(config.OPENAI_FALLBACKS):
+        api_key = settings.openai_api_key
+        if backend.api_key_env:
+            api_key = os.getenv(backend.api_key_env, "").strip()
+            if not api_key:
+                raise ValueError(
+                    f"Environment variable {backend.api_key_env} (OPENAI_FALLBACKS {backend.name}) is required."
+                )
+        backends.append(
+            (
+                backend.name,
+                Summarizer(
+                    api_key=api_key,
+                    model=backend.model or summarizer.model,
+                    base_url=backend.base_url,
+                    system_prompt=settings.summary_system_prompt,
+                    cache=cache,
+                    # Each backend has its own account limits, learnt from its headers.
+                    rate_limiter=OpenAIRateLimiter(),
+                    max_attempts=config.OPENAI_MAX_ATTEMPTS,
+                    streaming=_streaming_timeouts(),
+                    # Other OpenAI-compatible servers may reject the extra field.
+                    prompt_cache_key=config.OPENAI_PROMPT_CACHE_KEY and not backend.base_url,
+                ),
+            )
+        )
+        logger.info(
+            "Fallback backend %s for model=%s: model=%s base_url=%s",
+            backend.name,
+            summarizer.model,
+            backend.model or summarizer.model,
+            backend.base_url or "default",
+        )
+    chain = FailoverSummarizer(
+        backends,
+        failure_threshold=config.CIRCUIT_BREAKER_FAILURES,
+        reset_seconds=config.CIRCUIT_BREAKER_RESET_SECONDS,
+    )
+    failover_chains.append(chain)
+    return chain
+
+
+def _build_text_summarizer(
+    settings: config.Settings,
+    summarizer: Summarizer | FailoverSummarizer,
+    *,
+    cache: Optional[SummaryCache],
+    rate_limiter: OpenAIRateLimiter,
+    failover_chains: List[FailoverSummarizer],
+    long_doc: bool,
+) -> TextSummarizer:
+    def with_long_doc_mode(
+        base: Summarizer | FailoverSummarizer,
+    ) -> Summarizer | FailoverSummarizer | ChunkedSummarizer:
+        if not long_doc:
+            return base
+        return ChunkedSummarizer(
+            base,
+            chunk_chars=config.LONG_DOC_CHUNK_CHARS,
+            max_workers=config.LONG_DOC_CONCURRENCY,
+        )
+
+    if not config.MODEL_ROUTES:
+        return with_long_doc_mode(summarizer)
+    routes = []
+    for tier in parse_model_routes(config.MODEL_ROUTES):
+        tier_summarizer = summarizer
+        if tier.model != settings.openai_model:
+            tier_summarizer = _with_fallbacks(
+                settings,
+                Summarizer(
+                    api_key=settings.openai_api_key,
+                    model=tier.model,
+                    client=summarizer.client,
+                    system_prompt=settings.summary_system_prompt,
+                    cache=cache,
+                    rate_limiter=rate_limiter,
+                    max_attempts=config.OPENAI_MAX_ATTEMPTS,
+                    streaming=_streaming_timeouts(),
+                    prompt_cache_key=config.OPENAI_PROMPT_CACHE_KEY,
+                ),
+                cache=cache,
+                failover_chains=failover_chains,
+            )
+        routes.append((tier, with_long_doc_mode(tier_summarizer)))
+        logger.info(
+            "Model route %s: model=%s max_chars=%s max_tokens=%s sources=%s",
+            tier.name,
+            tier.model,
+            tier.max_chars,
+            tier.max_tokens,
+            tier.sources,
+        )
+    return ModelRouter(routes)
+
+
+def _build_html_fetcher() -> HtmlFetcher | BackgroundFetcher:
+    cache = None
+    if config.CACHE_DIR:
+        cache = HttpCache(
+            Path(config.CACHE_DIR) / "http",
+            max_bytes=config.HTTP_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=config.HTTP_CACHE_TTL_SECONDS,
+        )
+    if config.ASYNC_FETCH:
+        logger.info(
+            "Using async fetcher: max_concurrency=%s per_host_concurrency=%s",
+            config.FETCH_CONCURRENCY,
+            config.FETCH_PER_HOST_CONCURRENCY,
+        )
+        return BackgroundFetcher(
+            max_concurrency=config.FETCH_CONCURRENCY,
+            per_host_concurrency=config.FETCH_PER_HOST_CONCURRENCY,
+            http2=config.HTTP2_ENABLED,
+            cache=cache,
+        )
+    return HtmlFetcher(
+        http2=config.HTTP2_ENABLED,
+        max_connections=max(10, 2 * config.FETCH_CONCURRENCY),
+        cache=cache,
+    )
+
+
+Fetcher = Callable[[str], str]
+TextSummarizer = Union[Summarizer, FailoverSummarizer, ChunkedSummarizer, ModelRouter]
+Parser = Callable[[str, str, str], ExtractedContent]
+
+
+@dataclass
+class _ItemWork:
+    item: RaindropItem
+    source: str
+    html_text: str
+    # Extracted by an earlier attempt of this run (see RunJournal); parsing is skipped.
+    content: Optional[ExtractedContent] = None
+
+
+def _process_targets(
+    targets: Iterable[RaindropItem],
+    summarizer: TextSummarizer,
+    *,
+    fetch_concurrency: int = 1,
+    parse_concurrency: int = 1,
+    summary_concurrency: int = 1,
+    fetcher: Fetcher = fetch_html,
+    parse_pool: Optional[ParsePool] = None,
+    batch_summarizer: Optional[BatchSummarizer] = None,
+    max_extract_chars: int = MAX_EXTRACT_CHARS,
+    max_extract_tokens: Optional[int] = MAX_EXTRACT_TOKENS,
+    packer: Optional[PackedSummarizer] = None,
+    near_duplicates: Optional[NearDuplicateDetector] = None,
+    started_at: Optional[float] = None,
+    journal: Optional[RunJournal] = None,
+) -> List[SummaryResult]:
+    """
+    Fetch, parse and summarize every target, returning results in ``targets`` order.
+
+    The three steps run as stages of a StagedPipeline, each with its own worker pool
+    and bounded queue, so a slow site does not stall summarization and a slow LLM
+    call does not stall the next fetch. With ``parse_pool`` the parse stage hands
+    pages to worker processes; otherwise it parses in-process. With
+    ``batch_summarizer`` the pipeline stops after parsing and every extracted text
+    is summarized in one Batch API submission. With ``packer`` the summarize stage
+    takes items in micro-batches and sends the short ones together in one request.
+    With ``near_duplicates`` a single-worker stage after parsing holds back items
+    whose text nearly matches an earlier one; they share that item's summary.
+    ``targets`` may be a lazy iterator (items still being paged in); time to the
+    first summary is logged from ``started_at`` (default: pipeline start).
+    With ``journal`` each step is recorded, and items the journaled run already
+    extracted or summarized pick up from there.
+    """
+    total = len(targets) if isinstance(targets, Sized) else None
+    parser = functools.partial(
+        parse_pool.parse if parse_pool is not None else parse_html,
+        max_chars=max_extract_chars,
+        max_tokens=max_extract_tokens,
+    )
+    if parse_pool is not None:
+        parse_concurrency = max(parse_concurrency, parse_pool.workers)
+    stages = [
+        Stage(
+            "fetch",
+            functools.partial(_fetch_item, total=total, fetcher=fetcher, journal=journal),
+            workers=fetch_concurrency,
+        ),
+        Stage(
+            "parse",
+            functools.partial(_parse_item, parser=parser, journal=journal),
+            workers=parse_concurrency,
+        ),
+    ]
+    if near_duplicates is not None:
+        stages.append(
+            Stage(
+                "dedupe",
+                functools.partial(_check_near_duplicate, detector=near_duplicates),
+                workers=1,
+            )
+        )
+    if packer is not None:
+        stages.append(
+            Stage(
+                "summarize",
+                functools.partial(_summarize_packed, summarizer=summarizer, packer=packer),
+                workers=summary_concurrency,
+                batch_size=packer.max_items,
+            )
+        )
+    elif batch_summarizer is None:
+        stages.append(
+            Stage(
+                "summarize",
+                functools.partial(_summarize_item, summarizer=summarizer),
+                workers=summary_concurrency,
+            )
+        )
+    pipeline = StagedPipeline(
+        stages,
+        on_result=functools.partial(_journal_result, journal=journal) if journal is not None else None,
+    )
+    pipeline_started = time.perf_counter()
+    results = pipeline.run(enumerate(targets, start=1))
+    pipeline.log_stats(logger)
+    first_summary = pipeline.stats[-1].first_done_seconds if stages[-1].name == "summarize" else None
+    if first_summary is not None:
+        logger.info(
+            "Time to first summary: %.2fs",
+            first_summary + pipeline_started - (started_at if started_at is not None else pipeline_started),
+        )
+    if batch_summarizer is not None:
+        results = _summarize_in_batch(results, batch_summarizer, summarizer=summarizer)
+        if journal is not None:
+            for result in results:
+                _journal_result(result, journal=journal)
+    if near_duplicates is not None:
+        results = _share_duplicate_summaries(results)
+        near_duplicates.record(results)
+    return results
+
+
+def _fetch_item(
+    numbered: Tuple[int, RaindropItem],
+    *,
+    total: Optional[int],
+    fetcher: Fetcher,
+    journal: Optional[RunJournal] = None,
+) -> _ItemWork | Finished:
+    idx, item = numbered
+    logger.info("---- Processing item %s/%s ----", idx, total if total is not None else "?")
+    logger.info("Raindrop id=%s title=%s", item.id, item.title)
+    logger.info("link=%s", item.link)
+    if journal is not None:
+        summarized = journal.state.summarized.get(item.id)
+        # Failed summaries are retried; shared near-duplicate results are resolved again after the run.
+        if summarized is not None and (summarized.is_success() or summarized.duplicate_of is not None):
+            logger.info("Reusing journaled summary for item %s", item.id)
+            summarized.item = item
+            return Finished(summarized)
+        content = journal.state.extracted.get(item.id)
+        if content is not None:
+            logger.info("Reusing journaled extraction for item %s", item.id)
+            return _ItemWork(item=item, source=content.source, html_text="", content=content)
+    try:
+        source = ensure_supported_source(item.link)
+        work = _ItemWork(item=item, source=source, html_text=fetcher(item.link))
+    except Exception as exc:  # noqa: BLE001
+        return Finished(_extraction_failure(item, exc))
+    if journal is not None:
+        journal.fetched(item)
+    return work
+
+
+def _parse_item(
+    work: _ItemWork, *, parser: Parser, journal: Optional[RunJournal] = None
+) -> Tuple[RaindropItem, ExtractedContent] | Finished:
+    if work.content is not None:
+        _fill_title(work.item, work.content)
+        return work.item, work.content
+    try:
+        content = parser(work.html_text, work.item.link, work.source)
+    except Exception as exc:  # noqa: BLE001
+        return Finished(_extraction_failure(work.item, exc))
+    if journal is not None:
+        journal.extracted(work.item, content)
+    _fill_title(work.item, content)
+    logger.info(
+        "Extracted content: chars=%s tokens~%s source=%s (compaction saved chars=%s tokens~%s)",
+        content.length,
+        estimate_tokens(content.text),
+        content.source,
+        content.chars_saved,
+        content.tokens_saved,
+    )
+    return work.item, content
+
+
+def _fill_title(item: RaindropItem, content: ExtractedContent) -> None:
+    # Items saved before Raindrop fetched the page have no title (or just the URL).
+    title = item.title.strip()
+    if content.title and (not title or title == item.link):
+        item.title = content.title
+
+
+def _check_near_duplicate(
+    extracted: Tuple[RaindropItem, ExtractedContent], *, detector: NearDuplicateDetector
+) -> Tuple[RaindropItem, ExtractedContent] | Finished:
+    item, content = extracted
+    match = detector.check(item, content.text)
+    if match is None:
+        return extracted
+    logger.info(
+        "Item %s is a near-duplicate (similarity=%.2f) of item %s%s; sharing its summary",
+        item.id,
+        match.similarity,
+        match.original.id,
+        " from an earlier run" if match.previous_run else "",
+    )
+    result = SummaryResult(
+        item=item,
+        status="success" if match.summary else "failed",
+        summary=match.summary,
+        hero_image_url=content.hero_image_url,
+        source_length=content.length,
+        duplicate_of=match.original,
+        duplicate_similarity=match.similarity,
+    )
+    return Finished(result)
+
+
+def _journal_result(value: object, *, journal: RunJournal) -> None:
+    if isinstance(value, SummaryResult):
+        journal.summarized(value)
+
+
+def _share_duplicate_summaries(results: List[SummaryResult]) -> List[SummaryResult]:
+    """Copy each in-run original's outcome onto the items that duplicate it."""
+    by_id = {result.item.id: result for result in results if result.duplicate_of is None}
+    for result in results:
+        if result.duplicate_of is None or result.duplicate_of.id not in by_id:
+            continue
+        original = by_id[result.duplicate_of.id]
+        result.status = original.status
+        result.summary = original.summary
+        result.error = original.error
+    return results
+
+
+def _extraction_failure(item: RaindropItem, exc: Exception) -> SummaryResult:
+    if isinstance(exc, ExtractionError):
+        logger.exception("Failed to process item %s: %s", item.id, exc)
+    else:
+        logger.exception("Unexpected failure for item %s: %s", item.id, exc)
+    return SummaryResult(item=item, status="failed", error=str(exc))
+
+
+def _summarize_item(
+    extracted: Tuple[RaindropItem, ExtractedContent],
+    *,
+    summarizer: TextSummarizer,
+) -> SummaryResult:
+    item, content = extracted
+    started = time.perf_counter()
+    try:
+        summary_text, usage = _summarize_text(summarizer, content.text, content.source)
+        _log_token_usage(item, usage, time.perf_counter() - started)
+        return _summary_success(item, content, summary_text, usage)
+    except (SummaryRateLimitError, SummaryConnectionError) as exc:
+        logger.exception("OpenAI transient failure for item %s: %s", item.id, exc)
+        return _summary_failure(item, content, exc)
+    except SummaryError as exc:
+        logger.exception("Summarization failed for item %s: %s", item.id, exc)
+        return _summary_failure(item, content, exc)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Unexpected failure for item %s: %s", item.id, exc)
+        return SummaryResult(item=item, status="failed", error=str(exc))
+
+
+def _summarize_text(summarizer: TextSummarizer, text: str, source: str) -> Tuple[str, TokenUsage]:
+    if isinstance(summarizer, ModelRouter):
+        return summarizer.summarize_with_usage(text, source=source)
+    return summarizer.summarize_with_usage(text)
+
+
+def _summarize_packed(
+    batch: List[Tuple[RaindropItem, ExtractedContent]],
+    *,
+    summarizer: TextSummarizer,
+    packer: PackedSummarizer,
+) -> List[SummaryResult]:
+    results: List[Optional[SummaryResult]] = [None] * len(batch)
+    short = [idx for idx, (_item, content) in enumerate(batch) if packer.is_packable(content.text)]
+    if len(short) > 1:
+        started = time.perf_counter()
+        outcomes = packer.summarize_many([batch[idx][1].text for idx in short])
+        elapsed = time.perf_counter() - started
+        for idx, outcome in zip(short, outcomes):
+            item, content = batch[idx]
+            if isinstance(outcome, SummaryError):
+                logger.error("Summarization failed for item %s: %s", item.id, outcome)
+                results[idx] = _summary_failure(item, content, outcome)
+                continue
+            summary_text, usage = outcome
+            _log_token_usage(item, usage, elapsed)
+            results[idx] = _summary_success(item, content, summary_text, usage)
+    return [
+        result if result is not None else _summarize_item(batch[idx], summarizer=summarizer)
+        for idx, result in enumerate(results)
+    ]
+
+
+def _summarize_in_batch(
+    parsed: List[Tuple[RaindropItem, ExtractedContent] | SummaryResult],
+    batch_summarizer: BatchSummarizer,
+    *,
+    summarizer: TextSummarizer,
+) -> List[SummaryResult]:
+    pending = [entry for entry in parsed if not isinstance(entry, SummaryResult)]
+    sources = {item.id: content.source for item, content in pending}
+    outcomes = batch_summarizer.summarize_many(
+        [(item.id, content.text) for item, content in pending],
+        fallback=lambda item_id, text: _summarize_text(summarizer, text, sources[item_id]),
+    )
+    results: List[SummaryResult] = []
+    for entry in parsed:
+        if isinstance(entry, SummaryResult):
+            results.append(entry)
+            continue
+        item, content = entry
+        outcome = outcomes[item.id]
+        if isinstance(outcome, SummaryError):
+            logger.error("Summarization failed for item %s: %s", item.id, outcome)
+            results.append(_summary_failure(item, content, outcome))
+            continue
+        summary_text, usage = outcome
+        results.append(_summary_success(item, content, summary_text, usage))
+    return results
+
+
+def _summary_success(
+    item: RaindropItem,
+    content: ExtractedContent,
+    summary: str,
+    usage: Optional[TokenUsage] = None,
+) -> SummaryResult:
+    return SummaryResult(
+        item=item,
+        status="success",
+        summary=summary,
+        hero_image_url=content.hero_image_url,
+        source_length=content.length,
+        token_usage=usage,
+    )
+
+
+def _log_token_usage(item: RaindropItem, usage: TokenUsage, elapsed: float) -> None:
+    logger.info(
+        "Token usage for item %s: calls=%s prompt=%s cached=%s completion=%s total=%s elapsed=%.2fs",
+        item.id,
+        usage.calls,
+        usage.prompt_tokens,
+        usage.cached_tokens,
+        usage.completion_tokens,
+        usage.total_tokens,
+        elapsed,
+    )
+
+
+def _summary_failure(
+    item: RaindropItem, content: ExtractedContent, exc: Exception
+) -> SummaryResult:
+    return SummaryResult(
+        item=item,
+        status="failed",
+        error=str(exc),
+        hero_image_url=content.hero_image_url,
+        source_length=content.length,
+    )
 
 
 def _count_success(results: List[SummaryResult]) -> int:
@@ -220,30 +1008,134 @@ def _log_batch_counts(results: List[SummaryResult]) -> None:
     )
 
 
-def _dedupe_targets(
-    targets: List[RaindropItem],
-) -> Tuple[List[RaindropItem], List[RaindropItem]]:
-    by_key: Dict[str, List[RaindropItem]] = {}
-    for item in targets:
-        key = canonicalize_url(item.link)
-        by_key.setdefault(key, []).append(item)
+def _run_usage(results: List[SummaryResult]) -> TokenUsage:
+    total = TokenUsage()
+    for result in results:
+        if result.token_usage is not None:
+            total.add(result.token_usage)
+    return total
 
-    kept: List[RaindropItem] = []
-    duplicates: List[RaindropItem] = []
-    for key, items in by_key.items():
-        if len(items) == 1:
-            kept.append(items[0])
-            continue
-        preferred = choose_preferred_duplicate(items)
-        kept.append(preferred)
-        for item in items:
-            if item.id != preferred.id:
-                duplicates.append(item)
-        logger.info(
-            "Duplicate URL group: canonical=%s kept=%s deleted=%s",
-            key,
-            preferred.link,
-            [i.link for i in items if i.id != preferred.id],
-        )
 
-    return kept, duplicates
+def _log_run_usage(results: List[SummaryResult]) -> None:
+    usage = _run_usage(results)
+    prices = TokenPrices(
+        input_per_mtok=config.OPENAI_INPUT_COST_PER_MTOK or 0.0,
+        output_per_mtok=config.OPENAI_OUTPUT_COST_PER_MTOK or 0.0,
+        cached_input_per_mtok=config.OPENAI_CACHED_INPUT_COST_PER_MTOK,
+    )
+    logger.info(
+        "Run token usage: calls=%s prompt=%s cached=%s (prompt cache hit %.0f%%) completion=%s total=%s cost=$%.4f",
+        usage.calls,
+        usage.prompt_tokens,
+        usage.cached_tokens,
+        usage.cache_hit_ratio * 100,
+        usage.completion_tokens,
+        usage.total_tokens,
+        prices.cost_usd(usage),
+    )
+
+
+def _log_summary_cache_stats(summary_cache: SummaryCache | None) -> None:
+    if summary_cache is None:
+        return
+    logger.info(
+        "Summary cache: hits=%s misses=%s", summary_cache.hits, summary_cache.misses
+    )
+
+
+def _log_rate_limiter_stats(rate_limiter: OpenAIRateLimiter) -> None:
+    logger.info(
+        "OpenAI rate limiter: throttled_requests=%s waited=%.1fs",
+        rate_limiter.throttled_requests,
+        rate_limiter.waited_seconds,
+    )
+
+
+def _log_raindrop_rate_limiter_stats(rate_limiter: RaindropRateLimiter) -> None:
+    logger.info(
+        "Raindrop rate limiter: throttled_requests=%s waited=%.1fs rate_limited=%s",
+        rate_limiter.throttled_requests,
+        rate_limiter.waited_seconds,
+        rate_limiter.rate_limited_responses,
+    )
+
+
+def _log_failover_stats(failover_chains: List[FailoverSummarizer]) -> None:
+    for chain in failover_chains:
+        chain.log_stats(logger)
+
+
+def _log_router_stats(text_summarizer: TextSummarizer) -> None:
+    if isinstance(text_summarizer, ModelRouter):
+        text_summarizer.log_stats(logger)
+
+
+class _TargetStream:
+    """
+    New, de-duplicated targets from a stream of Raindrop items.
+
+    Items are filtered and de-duplicated as they arrive, so processing starts on
+    the first page while later pages are still loading. Only the first item of
+    each canonical URL is yielded; ``resolve`` later moves its result onto the
+    item the group prefers to keep and returns the rest for deletion.
+    """
+
+    def __init__(self, items: Iterable[RaindropItem], threshold: datetime):
+        self._items = items
+        self._threshold = threshold
+        self._groups: Dict[str, List[RaindropItem]] = {}
+        self.fetched = 0
+        self.targets = 0
+
+    def __iter__(self) -> Iterator[RaindropItem]:
+        for item in self._items:
+            self.fetched += 1
+            if not filter_new_items([item], self._threshold):
+                continue
+            group = self._groups.setdefault(canonicalize_url(item.link), [])
+            group.append(item)
+            if len(group) == 1:
+                self.targets += 1
+                yield item
+
+    def resolve(self, results: List[SummaryResult]) -> List[RaindropItem]:
+        duplicates: List[RaindropItem] = []
+        by_id = {result.item.id: result for result in results}
+        moved: Dict[int, RaindropItem] = {}
+        for key, items in self._groups.items():
+            if len(items) == 1:
+                continue
+            preferred = choose_preferred_duplicate(items)
+            processed = by_id.get(items[0].id)
+            if processed is not None and preferred.id != items[0].id:
+                processed.item = preferred
+                moved[items[0].id] = preferred
+            duplicates.extend(item for item in items if item.id != preferred.id)
+            logger.info(
+                "Duplicate URL group: canonical=%s kept=%s deleted=%s",
+                key,
+                preferred.link,
+                [i.link for i in items if i.id != preferred.id],
+            )
+        # Near-duplicates that point at a moved result follow it to the kept item.
+        for result in results:
+            if result.duplicate_of is not None and result.duplicate_of.id in moved:
+                result.duplicate_of = moved[result.duplicate_of.id]
+        return duplicates
+
+
+class _MirroredTargets(_TargetStream):
+    """
+    Targets the Raindrop mirror already filtered and grouped by canonical URL in
+    SQL; the first item of each group is processed and ``resolve`` works as usual.
+    """
+
+    def __init__(self, groups: Dict[str, List[RaindropItem]]):
+        super().__init__([], datetime.min.replace(tzinfo=timezone.utc))
+        self._groups = groups
+
+    def __iter__(self) -> Iterator[RaindropItem]:
+        for group in self._groups.values():
+            self.fetched += len(group)
+            self.targets += 1
+            yield group[0]
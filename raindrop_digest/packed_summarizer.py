@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .config import PACKED_PROMPT_SUFFIX, SHORT_ARTICLE_CHAR_THRESHOLD
+from .failover import FailoverSummarizer
+from .models import TokenUsage
+from .summarizer import Summarizer, SummaryError
+from .utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PackedOutcome = Union[Tuple[str, TokenUsage], SummaryError]
+
+
+class PackedSummarizer:
+    """
+    Summarize several short texts with one Chat Completions request.
+
+    The texts are sent as one JSON document and the model answers with a JSON
+    object of per-article summaries, so the system prompt and the round trip are
+    paid once per pack instead of once per article. Every article must get a
+    non-empty summary back; unanswered ones (or the whole pack, if the request or
+    its JSON fails) are retried one by one through the regular path.
+    """
+
+    def __init__(
+        self,
+        summarizer: Summarizer | FailoverSummarizer,
+        *,
+        max_items: int = 5,
+        max_item_chars: int = SHORT_ARTICLE_CHAR_THRESHOLD,
+    ):
+        self._summarizer = summarizer
+        self._max_items = max(2, max_items)
+        self._max_item_chars = max_item_chars
+        self._system_prompt = f"{summarizer.system_prompt}\n\n{PACKED_PROMPT_SUFFIX}"
+        self._single_prompt_tokens = estimate_tokens(summarizer.system_prompt)
+        self._lock = threading.Lock()
+        self.packed_requests = 0
+        self.packed_items = 0
+        self.unanswered_items = 0
+        self.packed_usage = TokenUsage()
+        self.packed_seconds = 0.0
+        # Prompt tokens the answered items would have cost as one request each.
+        self.single_prompt_tokens_estimate = 0
+
+    @property
+    def max_items(self) -> int:
+        return self._max_items
+
+    def is_packable(self, text: str) -> bool:
+        return len(text) < self._max_item_chars
+
+    def summarize_many(self, texts: Sequence[str]) -> List[PackedOutcome]:
+        """Return ``(summary, usage)`` or the SummaryError for each text, in order."""
+        outcomes: List[Optional[PackedOutcome]] = [None] * len(texts)
+        pending: List[int] = []
+        for idx, text in enumerate(texts):
+            cached = self._summarizer.cached_summary(text)
+            if cached is not None:
+                outcomes[idx] = (cached, TokenUsage())
+            else:
+                pending.append(idx)
+
+        for start in range(0, len(pending), self._max_items):
+            pack = pending[start : start + self._max_items]
+            if len(pack) > 1:
+                for idx, outcome in self._summarize_pack([texts[i] for i in pack]).items():
+                    outcomes[pack[idx]] = outcome
+
+        for idx, outcome in enumerate(outcomes):
+            if outcome is None:
+                outcomes[idx] = self._summarize_one(texts[idx])
+        return outcomes  # type: ignore[return-value]
+
+    def _summarize_one(self, text: str) -> PackedOutcome:
+        try:
+            return self._summarizer.summarize_with_usage(text)
+        except SummaryError as exc:
+            return exc
+
+    def _summarize_pack(self, texts: List[str]) -> Dict[int, PackedOutcome]:
+        payload = json.dumps(
+            {"articles": [{"id": str(idx), "text": text} for idx, text in enumerate(texts, start=1)]},
+            ensure_ascii=False,
+        )
+        started = time.perf_counter()
+        # Summaries are cached under the model that wrote them, which may be a fallback.
+        answered_by: Summarizer
+        try:
+            if isinstance(self._summarizer, FailoverSummarizer):
+                content, usage, answered_by = self._summarizer.summarize_with_backend(
+                    payload, system_prompt=self._system_prompt, json_response=True, use_cache=False
+                )
+            else:
+                answered_by = self._summarizer
+                content, usage = answered_by.summarize_with_usage(
+                    payload, system_prompt=self._system_prompt, json_response=True, use_cache=False
+                )
+        except SummaryError as exc:
+            logger.warning("Packed request for %s items failed; summarizing them one by one: %s", len(texts), exc)
+            return {}
+        elapsed = time.perf_counter() - started
+        summaries = _parse_packed_response(content, len(texts))
+        with self._lock:
+            self.packed_requests += 1
+            self.packed_items += len(summaries)
+            self.unanswered_items += len(texts) - len(summaries)
+            self.packed_usage.add(usage)
+            self.packed_seconds += elapsed
+            self.single_prompt_tokens_estimate += sum(
+                self._single_prompt_tokens + estimate_tokens(texts[idx]) for idx in summaries
+            )
+        logger.info(
+            "Packed %s short items into one request: answered=%s prompt=%s completion=%s elapsed=%.2fs",
+            len(texts),
+            len(summaries),
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            elapsed,
+        )
+
+        outcomes: Dict[int, PackedOutcome] = {}
+        shares = _split_usage(usage, [len(texts[idx]) for idx in summaries], [len(s) for s in summaries.values()])
+        for (idx, summary), share in zip(summaries.items(), shares):
+            answered_by.remember(texts[idx], summary)
+            outcomes[idx] = (summary, share)
+        return outcomes
+
+    def log_stats(self, log: Any = logger) -> None:
+        """Packed requests against the one-request-per-item calls they replaced."""
+        log.info(
+            "Packed summaries: requests=%s items=%s unanswered=%s requests_saved=%s "
+            "prompt=%s (one per item ~%s) completion=%s elapsed=%.2fs",
+            self.packed_requests,
+            self.packed_items,
+            self.unanswered_items,
+            max(self.packed_items - self.packed_requests, 0),
+            self.packed_usage.prompt_tokens,
+            self.single_prompt_tokens_estimate,
+            self.packed_usage.completion_tokens,
+            self.packed_seconds,
+        )
+
+
+def _parse_packed_response(content: str, count: int) -> Dict[int, str]:
+    """Map 0-based article positions to their summaries; invalid entries are left out."""
+    try:
+        entries = json.loads(content).get("summaries")
+    except (ValueError, AttributeError):
+        logger.warning("Packed response is not a JSON object")
+        return {}
+    if not isinstance(entries, list):
+        return {}
+    summaries: Dict[int, str] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        summary = entry.get("summary")
+        try:
+            position = int(str(entry.get("id"))) - 1
+        except ValueError:
+            continue
+        if 0 <= position < count and isinstance(summary, str) and summary.strip():
+            summaries.setdefault(position, summary.strip())
+    return dict(sorted(summaries.items()))
+
+
+def _split_usage(usage: TokenUsage, input_sizes: List[int], output_sizes: List[int]) -> List[TokenUsage]:
+    """Attribute a packed call's tokens to its articles by input/output length."""
+    if not input_sizes:
+        return []
+    total_in = sum(input_sizes) or 1
+    total_out = sum(output_sizes) or 1
+    shares = [
+        TokenUsage(
+            prompt_tokens=usage.prompt_tokens * size_in // total_in,
+            completion_tokens=usage.completion_tokens * size_out // total_out,
+            cached_tokens=usage.cached_tokens * size_in // total_in,
+        )
+        for size_in, size_out in zip(input_sizes, output_sizes)
+    ]
+    # Rounding leftovers and the single call go to the first article so run totals stay exact.
+    shares[0].prompt_tokens += usage.prompt_tokens - sum(s.prompt_tokens for s in shares)
+    shares[0].completion_tokens += usage.completion_tokens - sum(s.completion_tokens for s in shares)
+    shares[0].cached_tokens += usage.cached_tokens - sum(s.cached_tokens for s in shares)
+    shares[0].calls = usage.calls
+    return shares
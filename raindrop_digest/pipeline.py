@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SENTINEL = object()
+
+
+@dataclass
+class Finished:
+    """Returned by a stage handler to skip the remaining stages (e.g. on failure)."""
+
+    value: Any
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    queue_capacity: int
+    processed: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    # Seconds from the start of the run until the stage finished its first input.
+    first_done_seconds: Optional[float] = None
+
+    def utilization(self, elapsed_seconds: float) -> float:
+        """Share of the run the stage's workers spent inside the handler (0.0-1.0)."""
+        if elapsed_seconds <= 0 or self.workers <= 0:
+            return 0.0
+        return min(1.0, self.busy_seconds / (self.workers * elapsed_seconds))
+
+
+class Stage:
+    """
+    One step of a StagedPipeline: a handler run by a pool of worker threads.
+
+    With ``batch_size`` > 1 the handler receives a list of up to ``batch_size``
+    values and must return a list of results in the same order. A worker waits at
+    most ``batch_wait_seconds`` for each further value before handling a partial
+    batch, so batching never stalls a trickle of inputs for long.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Any],
+        *,
+        workers: int = 1,
+        queue_size: Optional[int] = None,
+        batch_size: int = 1,
+        batch_wait_seconds: float = 0.5,
+    ):
+        if workers < 1:
+            raise ValueError(f"Stage {name} needs at least one worker, got {workers}.")
+        if batch_size < 1:
+            raise ValueError(f"Stage {name} batch_size must be >= 1, got {batch_size}.")
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        default_queue_size = 2 * workers * batch_size
+        self.queue_size = queue_size if queue_size is not None else default_queue_size
+        if self.queue_size < 1:
+            raise ValueError(f"Stage {name} queue_size must be >= 1, got {self.queue_size}.")
+
+
+class StagedPipeline:
+    """
+    Run inputs through a chain of stages connected by bounded queues.
+
+    Each stage has its own worker threads and input queue, so a slow stage only
+    back-pressures its producers instead of stalling the whole run, and at most
+    ``queue_size`` items wait in front of each stage. Results are returned in input
+    order. A handler may return ``Finished(value)`` to skip the remaining stages.
+    ``on_result`` is called on the calling thread with each result as it arrives.
+    """
+
+    def __init__(self, stages: Sequence[Stage], *, on_result: Optional[Callable[[Any], None]] = None):
+        if not stages:
+            raise ValueError("StagedPipeline requires at least one stage.")
+        self._stages = list(stages)
+        self._on_result = on_result
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=s.queue_size) for s in self._stages]
+        self._output: queue.Queue = queue.Queue()
+        self._stats = [StageStats(s.name, s.workers, s.queue_size) for s in self._stages]
+        self._remaining_workers = [s.workers for s in self._stages]
+        self._lock = threading.Lock()
+        self._errors: List[BaseException] = []
+        self._started_at: Optional[float] = None
+        self.elapsed_seconds = 0.0
+
+    @property
+    def stats(self) -> List[StageStats]:
+        return self._stats
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Current number of items waiting in front of each stage."""
+        return {stage.name: q.qsize() for stage, q in zip(self._stages, self._queues)}
+
+    def run(self, inputs: Iterable[Any]) -> List[Any]:
+        self._started_at = time.perf_counter()
+        threads = [threading.Thread(target=self._feed, args=(inputs,), name="pipeline-feed", daemon=True)]
+        for stage_idx, stage in enumerate(self._stages):
+            for worker_idx in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._work,
+                        args=(stage_idx,),
+                        name=f"{stage.name}-{worker_idx}",
+                        daemon=True,
+                    )
+                )
+        for thread in threads:
+            thread.start()
+
+        collected: Dict[int, Any] = {}
+        while True:
+            entry = self._output.get()
+            if entry is _SENTINEL:
+                break
+            index, value = entry
+            collected[index] = value
+            if self._on_result is not None:
+                try:
+                    self._on_result(value)
+                except BaseException as exc:  # noqa: BLE001
+                    with self._lock:
+                        self._errors.append(exc)
+        for thread in threads:
+            thread.join()
+        self.elapsed_seconds = time.perf_counter() - self._started_at
+
+        if self._errors:
+            raise self._errors[0]
+        return [collected[index] for index in sorted(collected)]
+
+    def log_stats(self, log: logging.Logger = logger) -> None:
+        for stat in self._stats:
+            log.info(
+                "Stage %s: workers=%s processed=%s busy=%.2fs utilization=%.0f%% max_queue=%s/%s first_done=%s",
+                stat.name,
+                stat.workers,
+                stat.processed,
+                stat.busy_seconds,
+                stat.utilization(self.elapsed_seconds) * 100,
+                stat.max_queue_depth,
+                stat.queue_capacity,
+                "-" if stat.first_done_seconds is None else f"{stat.first_done_seconds:.2f}s",
+            )
+
+    def _put(self, stage_idx: int, entry: Any) -> None:
+        target = self._queues[stage_idx]
+        target.put(entry)
+        if entry is not _SENTINEL:
+            depth = target.qsize()
+            with self._lock:
+                stats = self._stats[stage_idx]
+                stats.max_queue_depth = max(stats.max_queue_depth, depth)
+
+    def _feed(self, inputs: Iterable[Any]) -> None:
+        try:
+            for index, value in enumerate(inputs):
+                self._put(0, (index, value))
+        except BaseException as exc:  # noqa: BLE001
+            with self._lock:
+                self._errors.append(exc)
+        finally:
+            for _ in range(self._stages[0].workers):
+                self._put(0, _SENTINEL)
+
+    def _next_batch(self, stage_idx: int) -> Tuple[List[Tuple[int, Any]], bool]:
+        """Take up to ``batch_size`` entries; the flag is True once the sentinel was seen."""
+        stage = self._stages[stage_idx]
+        source = self._queues[stage_idx]
+        entry = source.get()
+        if entry is _SENTINEL:
+            return [], True
+        entries = [entry]
+        while len(entries) < stage.batch_size:
+            try:
+                entry = source.get(timeout=stage.batch_wait_seconds)
+            except queue.Empty:
+                break
+            if entry is _SENTINEL:
+                return entries, True
+            entries.append(entry)
+        return entries, False
+
+    def _work(self, stage_idx: int) -> None:
+        stage = self._stages[stage_idx]
+        is_last = stage_idx == len(self._stages) - 1
+        done = False
+        while not done:
+            entries, done = self._next_batch(stage_idx)
+            if not entries:
+                continue
+            started = time.perf_counter()
+            try:
+                if stage.batch_size > 1:
+                    results = stage.handler([value for _index, value in entries])
+                    if len(results) != len(entries):
+                        raise RuntimeError(
+                            f"Stage {stage.name} returned {len(results)} results for {len(entries)} inputs."
+                        )
+                else:
+                    results = [stage.handler(entries[0][1])]
+            except BaseException as exc:  # noqa: BLE001
+                with self._lock:
+                    self._errors.append(exc)
+                continue
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    stats = self._stats[stage_idx]
+                    stats.processed += len(entries)
+                    stats.busy_seconds += finished - started
+                    if stats.first_done_seconds is None:
+                        stats.first_done_seconds = finished - (self._started_at or finished)
+            for (index, _value), result in zip(entries, results):
+                if isinstance(result, Finished):
+                    self._output.put((index, result.value))
+                elif is_last:
+                    self._output.put((index, result))
+                else:
+                    self._put(stage_idx + 1, (index, result))
+
+        with self._lock:
+            self._remaining_workers[stage_idx] -= 1
+            last_worker = self._remaining_workers[stage_idx] == 0
+        if not last_worker:
+            return
+        if is_last:
+            self._output.put(_SENTINEL)
+        else:
+            for _ in range(self._stages[stage_idx + 1].workers):
+                self._put(stage_idx + 1, _SENTINEL)
@@ -1,17 +1,27 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
-from typing import List, Optional
+import math
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 import httpx
 
 from .config import TAG_CONFIRMED, TAG_DELIVERED, TAG_FAILED, UNSORTED_COLLECTION_ID
 from .models import RaindropItem
-from .utils import append_note, parse_raindrop_datetime
+from .rate_limiter import RaindropRateLimiter
+from .utils import append_note, is_recent, parse_raindrop_datetime
 
 logger = logging.getLogger(__name__)
 
+PAGE_RETRY_BACKOFF_SECONDS = 1.0
+# 429s waited out per request before giving up; each wait lasts until the advertised reset.
+RATE_LIMIT_RETRIES = 3
+
+
 class RaindropError(Exception):
     """Raised when Raindrop operations fail."""
 
@@ -24,35 +34,195 @@ class RaindropApiError(RaindropError):
     """Raised when Raindrop returns an error response."""
 
 
+class RaindropRateLimitError(RaindropApiError):
+    """Raised when Raindrop keeps answering 429 after waiting for its reset."""
+
+
+@dataclass
+class PagingReport:
+    """What a listing of Unsorted actually got, for the run report."""
+
+    total_count: Optional[int] = None
+    pages_expected: Optional[int] = None
+    pages_fetched: int = 0
+    missing_pages: List[int] = field(default_factory=list)
+    partial_pages: List[int] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing_pages and not self.partial_pages
+
+
 class RaindropClient:
-    def __init__(self, token: str, base_url: str = "https://api.raindrop.io"):
+    def __init__(
+        self,
+        token: str,
+        base_url: str = "https://api.raindrop.io",
+        *,
+        transport: httpx.BaseTransport | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rate_limiter: Optional[RaindropRateLimiter] = None,
+    ):
+        self._sleep = sleep
+        # One budget for paging, updates and deletes, whichever thread makes them.
+        self.rate_limiter = rate_limiter or RaindropRateLimiter(sleep=sleep)
         self._client = httpx.Client(
-            base_url=base_url, headers={"Authorization": f"Bearer {token}"}, timeout=20.0
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=20.0,
+            transport=transport,
         )
 
     def close(self) -> None:
         self._client.close()
 
-    def fetch_unsorted_items(self, perpage: int = 50, max_pages: int = 20) -> List[RaindropItem]:
-        items: List[RaindropItem] = []
-        for page in range(max_pages):
-            response = self._request_with_retry(
-                "GET",
-                f"/rest/v1/raindrops/{UNSORTED_COLLECTION_ID}",
-                params={"page": page, "perpage": perpage, "sort": "-created"},
-            )
-            if response is None:
-                logger.warning("Skipping fetch page %s due to transient errors.", page)
-                break
-            data = response.json()
-            page_items = data.get("items", [])
-            logger.info("Fetched %s items from page %s", len(page_items), page)
-            for raw in page_items:
-                item = self._to_model(raw)
-                items.append(item)
-            if len(page_items) < perpage:
-                break
-        return items
+    def fetch_unsorted_items(
+        self,
+        perpage: int = 50,
+        max_pages: Optional[int] = None,
+        *,
+        threshold: Optional[datetime] = None,
+        search: Optional[str] = None,
+        report: Optional[PagingReport] = None,
+    ) -> List[RaindropItem]:
+        """
+        Fetch Unsorted items, newest first.
+
+        With ``threshold`` paging stops after the first page that reaches items
+        created before it, since every later page is older still. ``search`` is
+        passed to Raindrop's search parameter (see ``unsorted_search_query``) so
+        the server can drop old and already-handled items. Callers still filter
+        the returned items; both only cut down what is downloaded. Pages that
+        could not be fetched are recorded in ``report``.
+        """
+        return list(
+            self.iter_unsorted_items(perpage, max_pages, threshold=threshold, search=search, report=report)
+        )
+
+    def iter_unsorted_items(
+        self,
+        perpage: int = 50,
+        max_pages: Optional[int] = None,
+        *,
+        threshold: Optional[datetime] = None,
+        search: Optional[str] = None,
+        concurrency: int = 4,
+        page_attempts: int = 3,
+        report: Optional[PagingReport] = None,
+    ) -> Iterator[RaindropItem]:
+        """
+        Yield Unsorted items in page order while later pages download in the background.
+
+        Page 0 is fetched first; its ``count`` tells how many pages follow, and up to
+        ``concurrency`` of those are requested at once. Without a count the next
+        page is only prefetched one at a time until a short page ends the listing.
+        Each page is retried up to ``page_attempts`` times on its own; a page that
+        still fails is skipped and listed in ``report`` instead of ending the
+        listing. Without a count there is no telling whether a failed page was the
+        last one, so the listing ends there (still reported as missing). Only page 0
+        failing is an error, since nothing is known about the rest. Items that
+        shift onto the next page while paging are yielded once.
+        """
+        report = report if report is not None else PagingReport()
+        params: Dict[str, Any] = {"perpage": perpage, "sort": "-created"}
+        if search:
+            params["search"] = search
+
+        first = self._fetch_page(0, params, page_attempts)
+        if first is None:
+            report.missing_pages.append(0)
+            raise RaindropApiError("Raindrop Unsorted page 0 failed after retries.")
+        count = first[1]
+        last_page: Optional[int] = None
+        if count is not None:
+            last_page = max(math.ceil(count / perpage) - 1, 0)
+            report.total_count = count
+        if max_pages is not None:
+            last_page = max_pages - 1 if last_page is None else min(last_page, max_pages - 1)
+        if count is not None and last_page is not None:
+            report.pages_expected = last_page + 1
+        window = max(concurrency, 1) if count is not None else 1
+
+        executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix="raindrop-page")
+        pending: Dict[int, Future] = {}
+        next_page = 1
+
+        def fill() -> None:
+            nonlocal next_page
+            while len(pending) < window and (last_page is None or next_page <= last_page):
+                pending[next_page] = executor.submit(self._fetch_page, next_page, params, page_attempts)
+                next_page += 1
+
+        seen: Set[int] = set()
+        page = 0
+        fetched: Optional[Tuple[List[RaindropItem], Optional[int]]] = first
+        try:
+            while True:
+                page_models: List[RaindropItem] = []
+                if fetched is None:
+                    logger.warning("Skipping Raindrop page %s after %s attempts", page, page_attempts)
+                    report.missing_pages.append(page)
+                    is_last = count is None or page >= last_page
+                else:
+                    page_models = fetched[0]
+                    report.pages_fetched += 1
+                    expected = perpage if count is None else min(perpage, count - page * perpage)
+                    if last_page is not None:
+                        is_last = page >= last_page
+                        if len(page_models) < expected:
+                            logger.warning(
+                                "Raindrop page %s returned %s of %s expected items",
+                                page,
+                                len(page_models),
+                                expected,
+                            )
+                            report.partial_pages.append(page)
+                    else:
+                        is_last = len(page_models) < perpage
+                    if (
+                        not is_last
+                        and threshold is not None
+                        and any(not is_recent(i, threshold) for i in page_models)
+                    ):
+                        logger.info("Page %s reaches items older than %s; stopping", page, threshold.isoformat())
+                        is_last = True
+                if not is_last:
+                    # Keep the next pages downloading while the caller works on this one.
+                    fill()
+                for model in page_models:
+                    if model.id not in seen:
+                        seen.add(model.id)
+                        yield model
+                if is_last:
+                    return
+                page += 1
+                fetched = pending.pop(page).result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_page(
+        self, page: int, params: Dict[str, Any], attempts: int
+    ) -> Optional[Tuple[List[RaindropItem], Optional[int]]]:
+        """Items and reported total of one Unsorted page, or None once ``attempts`` are used up."""
+        for attempt in range(1, attempts + 1):
+            try:
+                response = self._request_with_retry(
+                    "GET",
+                    f"/rest/v1/raindrops/{UNSORTED_COLLECTION_ID}",
+                    params={"page": page, **params},
+                )
+            except RaindropConnectionError as exc:
+                logger.warning("Raindrop page %s attempt %s/%s failed: %s", page, attempt, attempts, exc)
+                response = None
+            if response is not None:
+                body = response.json()
+                page_items = body.get("items", [])
+                logger.info("Fetched %s items from page %s", len(page_items), page)
+                count = body.get("count")
+                return [self._to_model(raw) for raw in page_items], count if isinstance(count, int) else None
+            if attempt < attempts:
+                self._sleep(PAGE_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        return None
 
     def append_note_and_tags(
         self,
@@ -68,6 +238,53 @@ class RaindropClient:
         if response is None:
             raise RaindropApiError("Raindrop update failed after retries (502/503/504).")
 
+    def update_note(self, item: RaindropItem, note_addition: str) -> None:
+        """Append to the item's note without touching its tags (see ``add_tags``)."""
+        payload = {"note": append_note(item.note, note_addition)}
+        logger.info("Updating Raindrop note of item %s", item.id)
+        response = self._request_with_retry("PUT", f"/rest/v1/raindrop/{item.id}", json=payload)
+        if response is None:
+            raise RaindropApiError("Raindrop update failed after retries (502/503/504).")
+
+    def add_tags(self, item_ids: Sequence[int], tags: List[str]) -> int:
+        """Append ``tags`` to every item in ``item_ids`` with one bulk update; returns Raindrop's modified count."""
+        logger.info("Adding tags=%s to %s Raindrop items", tags, len(item_ids))
+        response = self._request_with_retry(
+            "PUT",
+            f"/rest/v1/raindrops/{UNSORTED_COLLECTION_ID}",
+            json={"ids": list(item_ids), "tags": tags},
+        )
+        if response is None:
+            raise RaindropApiError("Raindrop bulk update failed after retries (502/503/504).")
+        return int(response.json().get("modified", 0))
+
+    def delete_items(self, item_ids: Sequence[int]) -> int:
+        """Move every item in ``item_ids`` to Trash with one bulk delete; returns Raindrop's modified count."""
+        logger.info("Deleting %s duplicate Raindrop items", len(item_ids))
+        response = self._request_with_retry(
+            "DELETE",
+            f"/rest/v1/raindrops/{UNSORTED_COLLECTION_ID}",
+            json={"ids": list(item_ids)},
+        )
+        if response is None:
+            raise RaindropApiError("Raindrop bulk delete failed after retries (502/503/504).")
+        return int(response.json().get("modified", 0))
+
+    def fetch_item(self, item_id: int) -> Optional[Tuple[RaindropItem, int]]:
+        """The item and the id of the collection it is in now, or None when it no longer exists."""
+        try:
+            response = self._request_with_retry("GET", f"/rest/v1/raindrop/{item_id}")
+        except RaindropApiError as exc:
+            cause = exc.__cause__
+            if isinstance(cause, httpx.HTTPStatusError) and cause.response.status_code == 404:
+                return None
+            raise
+        if response is None:
+            raise RaindropApiError("Raindrop item lookup failed after retries (502/503/504).")
+        raw = response.json().get("item") or {}
+        collection = raw.get("collection") or {}
+        return self._to_model(raw), int(collection.get("$id", raw.get("collectionId", UNSORTED_COLLECTION_ID)))
+
     def delete_item(self, item_id: int) -> None:
         logger.info("Deleting duplicate Raindrop item %s", item_id)
         response = self._request_with_retry("DELETE", f"/rest/v1/raindrop/{item_id}")
@@ -75,20 +292,35 @@ class RaindropClient:
             raise RaindropApiError("Raindrop delete failed after retries (502/503/504).")
 
     def _request_with_retry(self, method: str, path: str, **kwargs) -> httpx.Response | None:
-        for attempt in range(2):
+        attempt = 0
+        rate_limited = 0
+        while attempt < 2:
+            self.rate_limiter.acquire()
             try:
                 response = self._client.request(method, path, **kwargs)
+                self.rate_limiter.update_from_headers(response.headers)
+                if response.status_code == 429:
+                    rate_limited += 1
+                    if rate_limited > RATE_LIMIT_RETRIES:
+                        raise RaindropRateLimitError(
+                            f"Raindrop rate limit persisted after {RATE_LIMIT_RETRIES} retries for {method} {path}."
+                        )
+                    delay = self.rate_limiter.rate_limited(response.headers)
+                    logger.warning("Raindrop rate limited %s %s; pausing %.1fs", method, path, delay)
+                    continue
                 response.raise_for_status()
                 return response
             except httpx.RequestError as exc:
                 logger.warning("Raindrop request error %s %s: %s", method, path, exc)
                 if attempt == 0:
+                    attempt += 1
                     continue
                 raise RaindropConnectionError(f"Raindrop request failed: {exc}") from exc
             except httpx.HTTPStatusError as exc:
                 status = exc.response.status_code
                 if status in {502, 503, 504} and attempt == 0:
                     logger.warning("Raindrop transient status %s for %s %s; retrying once", status, method, path)
+                    attempt += 1
                     continue
                 if status in {502, 503, 504}:
                     logger.warning("Raindrop transient status %s for %s %s; giving up", status, method, path)
@@ -109,3 +341,16 @@ class RaindropClient:
 
 
 EXCLUDED_TAGS = {TAG_CONFIRMED, TAG_DELIVERED, TAG_FAILED}
+
+
+def unsorted_search_query(threshold: datetime, excluded_tags: Iterable[str] = EXCLUDED_TAGS) -> str:
+    """
+    Raindrop search string for items created since ``threshold`` without any of
+    ``excluded_tags``. Raindrop compares whole dates, so the query starts a day
+    early in UTC and is only a coarse pre-filter.
+    """
+    since = (threshold.astimezone(timezone.utc) - timedelta(days=1)).date().isoformat()
+    terms = [f"created:>{since}"]
+    for tag in sorted(excluded_tags):
+        terms.append(f'-#"{tag}"' if " " in tag else f"-#{tag}")
+    return " ".join(terms)
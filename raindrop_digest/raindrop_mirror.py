@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Collection, Dict, Iterable, List, Optional, Sequence
+
+from .config import UNSORTED_COLLECTION_ID
+from .models import RaindropItem
+from .raindrop_client import EXCLUDED_TAGS, PagingReport, RaindropClient, RaindropError
+from .utils import append_note, canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Re-list a little before the newest item seen so items saved during the last sync are not missed.
+SYNC_OVERLAP = timedelta(hours=1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    tags TEXT NOT NULL,
+    note TEXT,
+    synced_at REAL NOT NULL,
+    canonical_url TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS items_created_at ON items (created_at);
+CREATE TABLE IF NOT EXISTS item_tags (
+    item_id INTEGER NOT NULL REFERENCES items (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, item_id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+class RaindropMirror:
+    """
+    SQLite copy of the Unsorted items this batch has seen, with the tags and
+    notes it wrote back.
+
+    ``sync`` only lists what was created since the newest item of the last sync
+    (the lookback threshold at most) and drops mirrored rows in that range that
+    the listing no longer returns. Targets are then read with an indexed query
+    that also picks one item per canonical URL, instead of filtering and
+    de-duplicating every downloaded item. Right after a sync the listing can be
+    skipped altogether, which is what makes restarts cheap.
+
+    Raindrop cannot list by last update, so items older than the sync cursor
+    that were deleted, moved or tagged in the Raindrop UI are only noticed by
+    ``refresh``, which re-reads the current targets from the API before a run
+    uses them.
+    """
+
+    def __init__(self, path: str | Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._migrate()
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(items)")}
+        if "canonical_url" not in columns:
+            self._conn.execute("ALTER TABLE items ADD COLUMN canonical_url TEXT NOT NULL DEFAULT ''")
+        rows = self._conn.execute("SELECT id, link FROM items WHERE canonical_url = ''").fetchall()
+        self._conn.executemany(
+            "UPDATE items SET canonical_url = ? WHERE id = ?", [(canonicalize_url(link), item_id) for item_id, link in rows]
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS items_canonical_url ON items (canonical_url, created_at)")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def _state(self, key: str) -> Optional[float]:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def cursor(self) -> Optional[datetime]:
+        """Creation time of the newest item any sync has listed."""
+        with self._lock:
+            value = self._state("cursor")
+        return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+    @property
+    def synced_at(self) -> Optional[float]:
+        with self._lock:
+            return self._state("synced_at")
+
+    def sync(
+        self,
+        client: RaindropClient,
+        threshold: datetime,
+        *,
+        search: Optional[str] = None,
+        concurrency: int = 4,
+        report: Optional[PagingReport] = None,
+        max_age_seconds: float = 0,
+    ) -> int:
+        """
+        Bring the mirror up to date with Unsorted and return how many items were listed.
+
+        Listing stops at ``threshold`` or, once a sync has run, shortly before its
+        cursor, whichever is later. Nothing is listed when the last sync finished
+        less than ``max_age_seconds`` ago. After a complete listing, mirrored items
+        created in the listed range that it did not return (deleted, moved out of
+        Unsorted, or excluded by ``search``) are dropped. When pages were missing or
+        short, the listed items are still stored but nothing is dropped and the
+        cursor and sync time stay where they were, so the next sync lists the same
+        range again.
+        """
+        synced_at = self.synced_at
+        if synced_at is not None and time.time() - synced_at < max_age_seconds:
+            logger.info("Raindrop mirror synced %.0fs ago; skipping listing", time.time() - synced_at)
+            return 0
+        since = threshold
+        cursor = self.cursor
+        if cursor is not None and cursor - SYNC_OVERLAP > threshold:
+            since = cursor - SYNC_OVERLAP
+        if report is None:
+            report = PagingReport()
+        started = time.time()
+        listed = 0
+        newest: Optional[float] = None
+        batch: List[RaindropItem] = []
+        items = client.iter_unsorted_items(threshold=since, search=search, concurrency=concurrency, report=report)
+        for item in items:
+            batch.append(item)
+            newest = max(newest or 0.0, item.created.timestamp())
+            if len(batch) >= 200:
+                listed += self.upsert(batch, advance_cursor=False)
+                batch = []
+        listed += self.upsert(batch, advance_cursor=False)
+        if not report.complete:
+            logger.warning(
+                "Raindrop mirror: listing incomplete (missing=%s partial=%s); keeping the sync cursor",
+                report.missing_pages,
+                report.partial_pages,
+            )
+            return listed
+        with self._lock:
+            dropped = self._conn.execute(
+                "DELETE FROM items WHERE created_at >= ? AND synced_at < ?", (since.timestamp(), started)
+            ).rowcount
+            if newest is not None:
+                self._advance_cursor(newest)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('synced_at', ?)", (time.time(),)
+            )
+            self._conn.commit()
+        logger.info(
+            "Raindrop mirror: listed %s items since %s, dropped %s no longer listed (%s mirrored)",
+            listed,
+            since.isoformat(),
+            dropped,
+            len(self),
+        )
+        return listed
+
+    def upsert(self, items: Sequence[RaindropItem], *, advance_cursor: bool = True) -> int:
+        if not items:
+            return 0
+        now = time.time()
+        with self._lock:
+            for item in items:
+                self._write_item(item, now)
+            if advance_cursor:
+                self._advance_cursor(max(item.created.timestamp() for item in items))
+            self._conn.commit()
+        return len(items)
+
+    def _advance_cursor(self, newest: float) -> None:
+        cursor = self._state("cursor")
+        if cursor is None or newest > cursor:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('cursor', ?)", (newest,))
+
+    def _write_item(self, item: RaindropItem, now: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO items (id, link, title, created_at, tags, note, synced_at, canonical_url) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                item.id,
+                item.link,
+                item.title,
+                item.created.timestamp(),
+                json.dumps(item.tags, ensure_ascii=False),
+                item.note,
+                now,
+                canonicalize_url(item.link),
+            ),
+        )
+        self._conn.execute("DELETE FROM item_tags WHERE item_id = ?", (item.id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO item_tags (item_id, tag) VALUES (?, ?)", [(item.id, tag) for tag in item.tags]
+        )
+
+    def targets(self, threshold: datetime, excluded_tags: Collection[str] = EXCLUDED_TAGS) -> List[RaindropItem]:
+        """Items created at or after ``threshold`` without any of ``excluded_tags``, newest first."""
+        return [item for group in self.target_groups(threshold, excluded_tags).values() for item in group]
+
+    def target_groups(
+        self, threshold: datetime, excluded_tags: Collection[str] = EXCLUDED_TAGS
+    ) -> Dict[str, List[RaindropItem]]:
+        """
+        Targets grouped by canonical URL, groups ordered by their newest item.
+
+        The first item of each group is the one to process, as ``_TargetStream``
+        would pick it from a listing; the others are its duplicates.
+        """
+        placeholders = ", ".join("?" for _ in excluded_tags) or "NULL"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, link, title, created_at, tags, note, canonical_url FROM ("
+                "  SELECT *, ROW_NUMBER() OVER ("
+                "    PARTITION BY canonical_url ORDER BY created_at DESC, id"
+                "  ) AS position, MAX(created_at) OVER (PARTITION BY canonical_url) AS group_created"
+                "  FROM items WHERE created_at >= ? AND NOT EXISTS ("
+                f"    SELECT 1 FROM item_tags WHERE item_tags.item_id = items.id AND tag IN ({placeholders})"
+                "  )"
+                ") ORDER BY group_created DESC, canonical_url, position",
+                (threshold.timestamp(), *excluded_tags),
+            ).fetchall()
+        groups: Dict[str, List[RaindropItem]] = {}
+        for row in rows:
+            groups.setdefault(row[6], []).append(_to_item(row[:6]))
+        return groups
+
+    def refresh(
+        self,
+        client: RaindropClient,
+        threshold: datetime,
+        *,
+        excluded_tags: Collection[str] = EXCLUDED_TAGS,
+        concurrency: int = 4,
+    ) -> int:
+        """
+        Re-read every current target from Raindrop and update the mirror.
+
+        Items that are gone or no longer in Unsorted are removed; the others are
+        stored as Raindrop has them now, so tags added in the UI exclude them. An
+        item whose lookup fails is kept as mirrored. Returns how many targets
+        dropped out.
+        """
+        candidates = self.targets(threshold, excluded_tags)
+        if not candidates:
+            return 0
+
+        def lookup(item: RaindropItem):
+            try:
+                return client.fetch_item(item.id)
+            except RaindropError as exc:
+                logger.warning("Could not re-check Raindrop item %s; using the mirrored copy: %s", item.id, exc)
+                return item, UNSORTED_COLLECTION_ID
+
+        with ThreadPoolExecutor(
+            max_workers=min(max(concurrency, 1), len(candidates)), thread_name_prefix="raindrop-refresh"
+        ) as executor:
+            found = list(executor.map(lookup, candidates))
+        gone: List[int] = []
+        moved: List[int] = []
+        current_items: List[RaindropItem] = []
+        for item, current in zip(candidates, found):
+            if current is None:
+                gone.append(item.id)
+            elif current[1] != UNSORTED_COLLECTION_ID:
+                moved.append(item.id)
+            else:
+                current_items.append(current[0])
+        self.remove(gone + moved)
+        self.upsert(current_items, advance_cursor=False)
+        dropped = len(gone) + len(moved) + sum(
+            1 for item in current_items if any(tag in excluded_tags for tag in item.tags)
+        )
+        if dropped:
+            logger.info(
+                "Raindrop mirror: %s of %s targets changed in Raindrop (gone=%s moved=%s)",
+                dropped,
+                len(candidates),
+                len(gone),
+                len(moved),
+            )
+        return dropped
+
+    def record_write_back(self, item: RaindropItem, note_addition: Optional[str], tags: Iterable[str]) -> None:
+        """Mirror a successful note/tag update so the next run sees the delivery state."""
+        note = append_note(item.note, note_addition) if note_addition else item.note
+        updated = RaindropItem(
+            id=item.id,
+            link=item.link,
+            title=item.title,
+            created=item.created,
+            tags=sorted({*item.tags, *tags}),
+            note=note,
+        )
+        with self._lock:
+            self._write_item(updated, time.time())
+            self._conn.commit()
+
+    def remove(self, item_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM items WHERE id = ?", [(item_id,) for item_id in item_ids])
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _to_item(row: tuple) -> RaindropItem:
+    item_id, link, title, created_at, tags, note = row
+    return RaindropItem(
+        id=item_id,
+        link=link,
+        title=title,
+        created=datetime.fromtimestamp(created_at, tz=timezone.utc),
+        tags=json.loads(tags),
+        note=note,
+    )
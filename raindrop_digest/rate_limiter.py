@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import logging
+import random
+import re
+import threading
+import time
+from typing import Callable, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: str | None) -> Optional[float]:
+    """Parse OpenAI's ``x-ratelimit-reset-*`` durations such as ``"20ms"`` or ``"6m0s"``."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, str] | None) -> Optional[float]:
+    """Server-requested delay from ``retry-after-ms`` / ``retry-after`` (seconds form only)."""
+    if not headers:
+        return None
+    raw_ms = headers.get("retry-after-ms")
+    if raw_ms:
+        try:
+            return max(0.0, float(raw_ms) / 1000)
+        except ValueError:
+            pass
+    raw = headers.get("retry-after")
+    if raw:
+        try:
+            return max(0.0, float(raw))
+        except ValueError:
+            return None
+    return None
+
+
+def backoff_delay(
+    attempt: int,
+    *,
+    base: float = 0.5,
+    cap: float = 30.0,
+    retry_after: Optional[float] = None,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """
+    Full-jitter exponential backoff for the ``attempt``-th retry (0-based).
+
+    A server-provided ``retry_after`` is treated as a lower bound.
+    """
+    delay = rng() * min(cap, base * (2**attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking.
+
+    ``reserve`` always succeeds and returns how long the caller must wait before
+    using what it reserved, so concurrent callers queue up fairly behind each other.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, *, clock: Callable[[], float] = time.monotonic):
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("TokenBucket capacity and refill rate must be positive.")
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._level = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        self._refill()
+        # A single oversized request must not wait forever.
+        self._level -= min(amount, self.capacity)
+        if self._level >= 0:
+            return 0.0
+        return -self._level / self.refill_per_second
+
+    def sync(self, limit: Optional[float], remaining: Optional[float]) -> None:
+        """Align with the server's view of the same per-minute limit."""
+        self._refill()
+        if limit is not None and limit > 0:
+            self.capacity = limit
+            self.refill_per_second = limit / 60.0
+        if remaining is not None:
+            self._level = min(self._level, remaining)
+
+
+class OpenAIRateLimiter:
+    """
+    Client-side request-per-minute and token-per-minute limiter for OpenAI calls.
+
+    One instance is shared by every summarization worker. Limits can be configured up
+    front and are corrected from the ``x-ratelimit-*`` response headers; after a 429
+    every worker pauses until the advertised reset, so throughput levels off at the
+    account limit instead of failing items.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._requests = self._bucket(requests_per_minute)
+        self._tokens = self._bucket(tokens_per_minute)
+        self._paused_until = 0.0
+        self.throttled_requests = 0
+        self.waited_seconds = 0.0
+
+    def _bucket(self, per_minute: Optional[float]) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        return TokenBucket(per_minute, per_minute / 60.0, clock=self._clock)
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """Block until a request of ``estimated_tokens`` fits the budget; return the wait."""
+        with self._lock:
+            wait = max(0.0, self._paused_until - self._clock())
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(estimated_tokens))
+            if wait > 0:
+                self.throttled_requests += 1
+                self.waited_seconds += wait
+        if wait > 0:
+            logger.info("OpenAI rate limiter: waiting %.2fs", wait)
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every worker for ``seconds`` (e.g. after a 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str] | None) -> None:
+        if not headers:
+            return
+        with self._lock:
+            self._requests = self._synced(
+                self._requests,
+                _header_float(headers, "x-ratelimit-limit-requests"),
+                _header_float(headers, "x-ratelimit-remaining-requests"),
+            )
+            self._tokens = self._synced(
+                self._tokens,
+                _header_float(headers, "x-ratelimit-limit-tokens"),
+                _header_float(headers, "x-ratelimit-remaining-tokens"),
+            )
+            for kind in ("requests", "tokens"):
+                remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+                reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining is not None and remaining <= 0 and reset:
+                    self._paused_until = max(self._paused_until, self._clock() + reset)
+
+    def _synced(
+        self, bucket: Optional[TokenBucket], limit: Optional[float], remaining: Optional[float]
+    ) -> Optional[TokenBucket]:
+        if bucket is None:
+            if not limit:
+                return None
+            bucket = TokenBucket(limit, limit / 60.0, clock=self._clock)
+        bucket.sync(limit, remaining)
+        return bucket
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    raw = headers.get(name)
+    if raw is None:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+# Raindrop allows 120 requests per minute per user.
+RAINDROP_REQUESTS_PER_MINUTE = 120
+# Used after a 429 that carries neither Retry-After nor X-RateLimit-Reset.
+RAINDROP_DEFAULT_PAUSE_SECONDS = 10.0
+
+
+class RaindropRateLimiter:
+    """
+    Request-per-minute limiter shared by every call a RaindropClient makes.
+
+    Raindrop reports ``X-RateLimit-Limit`` / ``X-RateLimit-Remaining`` and the
+    reset as a Unix timestamp in ``X-RateLimit-Reset``. The bucket follows the
+    remaining count, so paging, updates and deletes slow down before the limit is
+    used up, and every caller waits for the reset once it reaches zero or a 429
+    comes back.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = RAINDROP_REQUESTS_PER_MINUTE,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock=clock)
+        self._paused_until = 0.0
+        self.throttled_requests = 0
+        self.waited_seconds = 0.0
+        self.rate_limited_responses = 0
+
+    def acquire(self) -> float:
+        """Block until the next request fits the budget; return the wait."""
+        with self._lock:
+            wait = max(self._paused_until - self._clock(), self._requests.reserve(1))
+            if wait > 0:
+                self.throttled_requests += 1
+                self.waited_seconds += wait
+        if wait > 0:
+            logger.info("Raindrop rate limiter: waiting %.2fs", wait)
+            self._sleep(wait)
+        return max(wait, 0.0)
+
+    def update_from_headers(self, headers: Mapping[str, str] | None) -> None:
+        if not headers:
+            return
+        limit = _header_float(headers, "x-ratelimit-limit")
+        remaining = _header_float(headers, "x-ratelimit-remaining")
+        if remaining is None:
+            remaining = _header_float(headers, "ratelimit-remaining")
+        with self._lock:
+            self._requests.sync(limit, remaining)
+            if remaining is not None and remaining <= 0:
+                reset = self._reset_delay(headers)
+                if reset:
+                    self._paused_until = max(self._paused_until, self._clock() + reset)
+
+    def rate_limited(self, headers: Mapping[str, str] | None) -> float:
+        """Record a 429 and hold back every caller until the advertised reset; return the pause."""
+        delay = retry_after_seconds(headers)
+        if delay is None:
+            delay = self._reset_delay(headers or {})
+        if delay is None:
+            delay = RAINDROP_DEFAULT_PAUSE_SECONDS
+        with self._lock:
+            self.rate_limited_responses += 1
+            self._paused_until = max(self._paused_until, self._clock() + delay)
+        return delay
+
+    def _reset_delay(self, headers: Mapping[str, str]) -> Optional[float]:
+        reset = _header_float(headers, "x-ratelimit-reset")
+        if reset is None:
+            return None
+        # Raindrop sends a Unix timestamp; small values are read as seconds from now.
+        if reset > 1_000_000_000:
+            reset -= self._wall_clock()
+        return max(reset, 0.0)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .models import ExtractedContent, RaindropItem, SummaryResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JournalState:
+    """What a journaled run got done, rebuilt from its records."""
+
+    run_id: str
+    now: datetime
+    threshold: datetime
+    extracted: Dict[int, ExtractedContent] = field(default_factory=dict)
+    summarized: Dict[int, SummaryResult] = field(default_factory=dict)
+    # Results exactly as they were mailed; set once the digest went out.
+    mailed: Optional[List[SummaryResult]] = None
+    written_back: Set[int] = field(default_factory=set)
+    finished: bool = False
+
+
+class RunJournal:
+    """
+    Append-only JSON Lines record of one run's progress, for ``--resume``.
+
+    Every record is flushed and fsynced before the call returns, so a crash
+    loses at most the line being written, and a torn last line is ignored on
+    load. Records are written as items move through the run: ``fetched``,
+    ``extracted`` (with the extracted text), ``summarized`` (with the result),
+    then ``mailed`` (with every result as mailed) and ``written_back`` per item.
+    A resumed run skips what the journal already has and, once ``mailed`` is
+    recorded, only finishes the write-back, so the digest is never sent twice.
+    Starting a fresh run replaces the previous journal.
+    """
+
+    def __init__(self, path: str | Path, state: JournalState):
+        self.path = Path(path)
+        self.state = state
+        self._lock = threading.Lock()
+        self._file = self.path.open("a", encoding="utf-8")
+
+    @classmethod
+    def start(cls, path: str | Path, *, now: datetime, threshold: datetime) -> RunJournal:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("", encoding="utf-8")
+        journal = cls(path, JournalState(run_id=uuid.uuid4().hex, now=now, threshold=threshold))
+        journal._append("started", now=now.isoformat(), threshold=threshold.isoformat())
+        return journal
+
+    @classmethod
+    def resume(cls, path: str | Path) -> Optional[RunJournal]:
+        """Reopen the journaled run, or None when there is none or it finished."""
+        state = load_state(path)
+        if state is None or state.finished:
+            return None
+        return cls(path, state)
+
+    def fetched(self, item: RaindropItem) -> None:
+        self._append("fetched", item_id=item.id, item=_item_to_dict(item))
+
+    def extracted(self, item: RaindropItem, content: ExtractedContent) -> None:
+        self._append("extracted", item_id=item.id, content=_content_to_dict(content))
+
+    def summarized(self, result: SummaryResult) -> None:
+        self._append("summarized", item_id=result.item.id, result=_result_to_dict(result))
+
+    def mailed(self, results: List[SummaryResult]) -> None:
+        self.state.mailed = list(results)
+        self._append("mailed", results=[_result_to_dict(result) for result in results])
+
+    def written_back(self, item_id: int) -> None:
+        self.state.written_back.add(item_id)
+        self._append("written_back", item_id=item_id)
+
+    def finished(self) -> None:
+        self.state.finished = True
+        self._append("finished")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def _append(self, event: str, **payload: Any) -> None:
+        line = json.dumps({"run": self.state.run_id, "event": event, "at": time.time(), **payload}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+
+def load_state(path: str | Path) -> Optional[JournalState]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    state: Optional[JournalState] = None
+    with path.open(encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Ignoring unreadable journal line %s in %s", line_no, path)
+                continue
+            event = record.get("event")
+            if event == "started":
+                state = JournalState(
+                    run_id=record["run"],
+                    now=datetime.fromisoformat(record["now"]),
+                    threshold=datetime.fromisoformat(record["threshold"]),
+                )
+            elif state is None or record.get("run") != state.run_id:
+                continue
+            elif event == "extracted":
+                state.extracted[record["item_id"]] = ExtractedContent(**record["content"])
+            elif event == "summarized":
+                state.summarized[record["item_id"]] = _result_from_dict(record["result"])
+            elif event == "mailed":
+                state.mailed = [_result_from_dict(raw) for raw in record["results"]]
+            elif event == "written_back":
+                state.written_back.add(record["item_id"])
+            elif event == "finished":
+                state.finished = True
+    return state
+
+
+def _item_to_dict(item: RaindropItem) -> Dict[str, Any]:
+    return {
+        "id": item.id,
+        "link": item.link,
+        "title": item.title,
+        "created": item.created.isoformat(),
+        "tags": list(item.tags),
+        "note": item.note,
+    }
+
+
+def _item_from_dict(raw: Dict[str, Any]) -> RaindropItem:
+    return RaindropItem(
+        id=raw["id"],
+        link=raw["link"],
+        title=raw["title"],
+        created=datetime.fromisoformat(raw["created"]),
+        tags=list(raw["tags"]),
+        note=raw.get("note"),
+    )
+
+
+def _content_to_dict(content: ExtractedContent) -> Dict[str, Any]:
+    return {
+        "text": content.text,
+        "source": content.source,
+        "length": content.length,
+        "hero_image_url": content.hero_image_url,
+        "title": content.title,
+    }
+
+
+def _result_to_dict(result: SummaryResult) -> Dict[str, Any]:
+    # Token usage is left out: it was paid for by the run that made the call.
+    return {
+        "item": _item_to_dict(result.item),
+        "status": result.status,
+        "summary": result.summary,
+        "error": result.error,
+        "hero_image_url": result.hero_image_url,
+        "source_length": result.source_length,
+        "duplicate_of": _item_to_dict(result.duplicate_of) if result.duplicate_of is not None else None,
+        "duplicate_similarity": result.duplicate_similarity,
+    }
+
+
+def _result_from_dict(raw: Dict[str, Any]) -> SummaryResult:
+    return SummaryResult(
+        item=_item_from_dict(raw["item"]),
+        status=raw["status"],
+        summary=raw.get("summary"),
+        error=raw.get("error"),
+        hero_image_url=raw.get("hero_image_url"),
+        source_length=raw.get("source_length"),
+        duplicate_of=_item_from_dict(raw["duplicate_of"]) if raw.get("duplicate_of") else None,
+        duplicate_similarity=raw.get("duplicate_similarity"),
+    )
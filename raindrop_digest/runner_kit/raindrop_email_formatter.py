@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Sequence, Tuple
 
 from ..config import (
     BATCH_LOOKBACK_DAYS,
@@ -47,15 +47,30 @@ def _format_failure_summary(error: str | None) -> tuple[str, str]:
     return text_msg, html_msg
 
 
+def _format_duplicate_note(result: SummaryResult, positions: Dict[int, int]) -> str | None:
+    original = result.duplicate_of
+    if original is None:
+        return None
+    if original.id in positions:
+        return f"{positions[original.id]}.「{original.title}」とほぼ同じ内容のため、要約はそちらを参照してください。"
+    return (
+        f"{format_datetime_jst(original.created)} 追加の「{original.title}」（配信済み）とほぼ同じ内容のため、"
+        "その要約を再利用しています。"
+    )
+
+
 def build_email_subject(batch_date: datetime) -> str:
     date_str = batch_date.astimezone(JST).strftime("%Y-%m-%d")
     return f"【要約まとめ】{date_str} 直近{BATCH_LOOKBACK_DAYS}日版"
 
 
 def build_email_body(
-    batch_date: datetime, results: List[SummaryResult]
+    batch_date: datetime, results: List[SummaryResult], notices: Sequence[str] = ()
 ) -> Tuple[str, str]:
+    """``notices`` are shown above the items, e.g. when part of the Raindrop listing could not be fetched."""
     text_header = f"過去{BATCH_LOOKBACK_DAYS}日分のブックマークしたリンクの要約です。\n"
+    text_header += "".join(f"※ {notice}\n" for notice in notices)
+    notice_html = "".join(f'<div class="card"><div class="summary">※ {notice}</div></div>' for notice in notices)
     html_parts = [
         """
 <!doctype html>
@@ -87,6 +102,7 @@ def build_email_body(
         text_body = text_header + "\n今回は新着対象がありませんでした。"
         html_body = (
             html_parts[0]
+            + notice_html
             + '<div class="card"><div class="summary">今回は新着対象がありませんでした。</div></div>'
             + '<div class="footer">※ 各要約は最大{limit}文字目安で生成しています。</div></div></body></html>'.format(
                 limit=SUMMARY_CHAR_LIMIT
@@ -94,8 +110,14 @@ def build_email_body(
         )
         return text_body, html_body
 
+    if notice_html:
+        html_parts.append(notice_html)
     lines = [text_header]
+    positions = {result.item.id: idx for idx, result in enumerate(results, start=1) if result.duplicate_of is None}
     for idx, result in enumerate(results, start=1):
+        duplicate_note = _format_duplicate_note(result, positions)
+        # A near-duplicate of an item listed in this email points to it instead of repeating the summary.
+        refers_to_listed = result.duplicate_of is not None and result.duplicate_of.id in positions
         item = result.item
         lines.append(f"{idx}. タイトル: {item.title}")
         lines.append(f"URL: {item.link}")
@@ -103,11 +125,14 @@ def build_email_body(
         if _needs_short_article_disclaimer(result.source_length):
             lines.append(SHORT_ARTICLE_DISCLAIMER)
         lines.append("\n▼サマリー")
-        if result.is_success() and result.summary:
-            lines.append(result.summary.strip())
-        else:
-            failure_text, _ = _format_failure_summary(result.error)
-            lines.append(failure_text)
+        if duplicate_note:
+            lines.append(duplicate_note)
+        if not refers_to_listed:
+            if result.is_success() and result.summary:
+                lines.append(result.summary.strip())
+            else:
+                failure_text, _ = _format_failure_summary(result.error)
+                lines.append(failure_text)
         lines.append("")  # spacer
 
         html_parts.append('<div class="card">')
@@ -123,11 +148,16 @@ def build_email_body(
                 'style="width:100%;max-width:560px;height:auto;border-radius:10px;display:block;margin:12px auto 0;" />'
             )
         html_parts.append('<div class="summary"><strong>▼サマリー</strong><br>')
-        if result.is_success() and result.summary:
-            html_parts.append(result.summary.strip().replace("\n", "<br>"))
+        if refers_to_listed:
+            html_parts.append(duplicate_note or "")
         else:
-            _, failure_html = _format_failure_summary(result.error)
-            html_parts.append(failure_html)
+            if duplicate_note:
+                html_parts.append(f"{duplicate_note}<br>")
+            if result.is_success() and result.summary:
+                html_parts.append(result.summary.strip().replace("\n", "<br>"))
+            else:
+                _, failure_html = _format_failure_summary(result.error)
+                html_parts.append(failure_html)
         html_parts.append("</div></div>")
 
     lines.append(f"\n※ 各要約は最大{SUMMARY_CHAR_LIMIT}文字目安で生成しています。")
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import hashlib
 import logging
-from typing import Any, Dict, Optional, Tuple, Type, TYPE_CHECKING
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Type, TYPE_CHECKING
 
 try:
     from openai import APIConnectionError, APITimeoutError, OpenAI, RateLimitError
@@ -17,10 +22,20 @@ if TYPE_CHECKING:  # pragma: no cover - type checking only
 else:
     OpenAIType = Any
 
-from .config import DEFAULT_SYSTEM_PROMPT
+from .config import DEFAULT_SYSTEM_PROMPT, SUMMARY_CHAR_LIMIT
+from .models import TokenUsage
+from .rate_limiter import OpenAIRateLimiter, backoff_delay, retry_after_seconds
+from .summary_cache import SummaryCache
+from .utils import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+# Japanese output runs at roughly one token per character.
+_OUTPUT_TOKEN_ESTIMATE = SUMMARY_CHAR_LIMIT
+
+# OpenAI only caches prompts whose identical prefix is at least this long.
+PROMPT_CACHE_MIN_TOKENS = 1024
+
 
 class SummaryError(Exception):
     """Raised when summarization fails."""
@@ -34,6 +49,30 @@ class SummaryRateLimitError(SummaryError):
     """Raised when summarization fails due to rate limits."""
 
 
+class SummaryServerError(SummaryError):
+    """Raised when the API keeps answering with 5xx errors."""
+
+
+class SummaryTimeoutError(SummaryConnectionError):
+    """Raised when a streamed completion misses its first-token deadline or stalls."""
+
+
+@dataclass(frozen=True)
+class StreamingTimeouts:
+    """
+    Deadlines for streamed completions, in seconds: the first content token must
+    arrive within ``first_token_seconds`` of the request and each later chunk
+    within ``stall_seconds`` of the previous one.
+    """
+
+    first_token_seconds: float = 30.0
+    stall_seconds: float = 15.0
+
+
+# Marks the end of a stream on the queue between the reader thread and the caller.
+_STREAM_END = object()
+
+
 class Summarizer:
     def __init__(
         self,
@@ -41,19 +80,119 @@ class Summarizer:
         model: str = "gpt-4.1-mini",
         client: Optional[OpenAIType] = None,
         system_prompt: Optional[str] = None,
+        cache: Optional[SummaryCache] = None,
+        rate_limiter: Optional[OpenAIRateLimiter] = None,
+        max_attempts: int = 4,
+        sleep: Callable[[float], None] = time.sleep,
+        base_url: Optional[str] = None,
+        streaming: Optional[StreamingTimeouts] = None,
+        prompt_cache_key: bool = False,
     ):
         if not model or not model.strip():
             raise ValueError("OpenAI model must be provided.")
-        self._client = client or self._build_client(api_key)
+        self._client = client or self._build_client(api_key, base_url)
         self._model = model.strip()
         self._rate_limit_error, self._connection_errors = self._load_error_classes(client is None)
         self._system_prompt = (system_prompt or DEFAULT_SYSTEM_PROMPT).strip()
+        self._cache = cache
+        self._rate_limiter = rate_limiter
+        self._max_attempts = max(1, max_attempts)
+        self._sleep = sleep
+        self._streaming = streaming
+        self._prompt_cache_key = prompt_cache_key
 
     @staticmethod
-    def _build_client(api_key: str) -> OpenAIType:
+    def _build_client(api_key: str, base_url: Optional[str] = None) -> OpenAIType:
         if OpenAI is None:  # pragma: no cover - requires openai installed
             raise SummaryError("openai package is required to create an OpenAI client.")
-        return OpenAI(api_key=api_key)
+        # Retries are scheduled by Summarizer so they share the rate limiter's state.
+        # base_url points at any OpenAI-compatible endpoint (e.g. a self-hosted server).
+        return OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+    def _create(self, request_payload: Dict[str, Any]) -> Any:
+        completions = self._client.chat.completions
+        raw_api = getattr(completions, "with_raw_response", None) if self._rate_limiter is not None else None
+        if raw_api is None:
+            return completions.create(**request_payload)
+        raw = raw_api.create(**request_payload)
+        self._rate_limiter.update_from_headers(raw.headers)  # type: ignore[union-attr]
+        return raw.parse()
+
+    def _create_streamed(self, request_payload: Dict[str, Any]) -> Tuple[str, TokenUsage]:
+        """
+        Stream the completion and enforce the StreamingTimeouts.
+
+        The stream is read on a helper thread and handed over through a queue, so
+        a deadline is kept even while the socket read is blocked. A stream that
+        misses a deadline is closed and abandoned; the per-request timeout makes
+        sure its thread ends as well.
+        """
+        timeouts = self._streaming
+        assert timeouts is not None
+        payload = {
+            **request_payload,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            "timeout": max(timeouts.first_token_seconds, timeouts.stall_seconds),
+        }
+        chunks: "queue.Queue[Any]" = queue.Queue()
+        streams: List[Any] = []
+
+        def read() -> None:
+            try:
+                stream = self._create(payload)
+                streams.append(stream)
+                for chunk in stream:
+                    chunks.put(chunk)
+                chunks.put(_STREAM_END)
+            except Exception as exc:  # noqa: BLE001 - re-raised on the caller's thread
+                chunks.put(exc)
+
+        started = time.monotonic()
+        threading.Thread(target=read, name="openai-stream", daemon=True).start()
+        deadline = started + timeouts.first_token_seconds
+        first_token_at: Optional[float] = None
+        parts: List[str] = []
+        usage = TokenUsage(calls=1)
+        while True:
+            try:
+                chunk = chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                for stream in streams:
+                    _close_quietly(stream)
+                if first_token_at is None:
+                    raise SummaryTimeoutError(
+                        f"OpenAI stream sent no token within {timeouts.first_token_seconds:g}s"
+                    ) from None
+                raise SummaryTimeoutError(
+                    f"OpenAI stream stalled for {timeouts.stall_seconds:g}s after {len(parts)} chunks"
+                ) from None
+            if chunk is _STREAM_END:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            if getattr(chunk, "usage", None) is not None:
+                usage = _usage_from_response(chunk)
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                parts.append(content)
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+            if first_token_at is not None:
+                deadline = time.monotonic() + timeouts.stall_seconds
+        finished = time.monotonic()
+        logger.info(
+            "Streamed completion: ttft=%.2fs generation=%.2fs total=%.2fs",
+            (first_token_at or finished) - started,
+            finished - (first_token_at or finished),
+            finished - started,
+        )
+        return "".join(parts), usage
+
+    def _is_retryable(self, exc: Exception, is_rate_limit: bool) -> bool:
+        if is_rate_limit or isinstance(exc, self._connection_errors):  # type: ignore[arg-type]
+            return True
+        return _extract_status_code(exc) in {500, 502, 503, 504}
 
     @staticmethod
     def _load_error_classes(require_openai: bool) -> Tuple[Type[Exception], Tuple[Type[Exception], ...]]:
@@ -63,42 +202,178 @@ class Summarizer:
             return Exception, (Exception, Exception)
         return RateLimitError, (APIConnectionError, APITimeoutError)
 
-    def summarize(self, text: str) -> str:
-        logger.info("Summarization request: chars=%s", len(text))
-        request_payload: Dict[str, Any] = {
+    @property
+    def client(self) -> OpenAIType:
+        return self._client
+
+    @property
+    def system_prompt(self) -> str:
+        return self._system_prompt
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    def build_request(
+        self, text: str, system_prompt: Optional[str] = None, *, json_response: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Chat Completions request body for ``text``.
+
+        The system prompt is always the first message and never varies per item,
+        so every request shares a byte-identical prefix the provider can serve
+        from its prompt cache; only the user message at the end changes.
+        """
+        prompt = system_prompt or self._system_prompt
+        request: Dict[str, Any] = {
             "model": self._model,
             "messages": [
                 {
                     "role": "system",
-                    "content": self._system_prompt,
+                    "content": prompt,
                 },
                 {"role": "user", "content": text},
             ],
         }
-        for attempt in range(2):
+        if self._prompt_cache_key:
+            # Routes requests with the same prefix to the same cache shard.
+            request["prompt_cache_key"] = _prompt_cache_key(self._model, prompt)
+        if json_response:
+            request["response_format"] = {"type": "json_object"}
+        return request
+
+    def _cache_key(self, text: str, system_prompt: Optional[str]) -> str:
+        return SummaryCache.make_key(text, self._model, system_prompt or self._system_prompt)
+
+    def cached_summary(self, text: str, system_prompt: Optional[str] = None) -> Optional[str]:
+        if self._cache is None:
+            return None
+        cached = self._cache.get(self._cache_key(text, system_prompt))
+        if cached is not None:
+            logger.info("Summary cache hit (%s chars); skipping OpenAI call", len(cached))
+        return cached
+
+    def remember(self, text: str, summary: str, system_prompt: Optional[str] = None) -> None:
+        if self._cache is not None:
+            self._cache.put(self._cache_key(text, system_prompt), self._model, summary)
+
+    def summarize(self, text: str) -> str:
+        summary, _usage = self.summarize_with_usage(text)
+        return summary
+
+    def summarize_with_usage(
+        self,
+        text: str,
+        system_prompt: Optional[str] = None,
+        *,
+        json_response: bool = False,
+        use_cache: bool = True,
+    ) -> Tuple[str, TokenUsage]:
+        """
+        Summarize ``text`` and report the tokens spent on it.
+
+        ``system_prompt`` overrides the configured prompt for this call (used for the
+        chunk summaries of long articles). Cache hits report zero calls.
+        ``json_response`` asks for a JSON object and ``use_cache=False`` bypasses
+        the cache (used for packed multi-article requests).
+        """
+        cached = self.cached_summary(text, system_prompt) if use_cache else None
+        if cached is not None:
+            return cached, TokenUsage()
+        logger.info("Summarization request: chars=%s", len(text))
+        request_payload = self.build_request(text, system_prompt, json_response=json_response)
+        estimated_tokens = (
+            estimate_tokens(system_prompt or self._system_prompt) + estimate_tokens(text) + _OUTPUT_TOKEN_ESTIMATE
+        )
+        for attempt in range(self._max_attempts):
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(estimated_tokens)
             try:
                 # Some newer models only accept the default temperature.
                 # We omit it to maximize model compatibility.
-                response = self._client.chat.completions.create(**request_payload)
+                if self._streaming is not None:
+                    streamed = self._create_streamed(request_payload)
+                else:
+                    response = self._create(request_payload)
                 break
+            except SummaryTimeoutError as exc:
+                if attempt + 1 >= self._max_attempts:
+                    raise
+                # A stalled stream says nothing about load; retry at once.
+                logger.warning("%s; retrying (attempt %s/%s)", exc, attempt + 1, self._max_attempts)
+                continue
             except Exception as exc:  # noqa: BLE001
-                status_code = _extract_status_code(exc)
-                if attempt == 0 and status_code in {502, 503, 504}:
-                    logger.warning("OpenAI transient error (status=%s); retrying once", status_code)
+                headers = _extract_headers(exc)
+                if self._rate_limiter is not None:
+                    self._rate_limiter.update_from_headers(headers)
+                is_rate_limit = isinstance(exc, self._rate_limit_error) or _extract_status_code(exc) == 429  # type: ignore[arg-type]
+                if attempt + 1 < self._max_attempts and self._is_retryable(exc, is_rate_limit):
+                    delay = backoff_delay(attempt, retry_after=retry_after_seconds(headers))
+                    if is_rate_limit and self._rate_limiter is not None:
+                        self._rate_limiter.pause(delay)
+                    logger.warning(
+                        "OpenAI transient error (status=%s); retrying in %.1fs (attempt %s/%s)",
+                        _extract_status_code(exc),
+                        delay,
+                        attempt + 1,
+                        self._max_attempts,
+                    )
+                    self._sleep(delay)
                     continue
-                if isinstance(exc, self._rate_limit_error):  # type: ignore[arg-type]
+                if is_rate_limit:
                     raise SummaryRateLimitError(f"OpenAI rate limit: {exc}") from exc
                 if isinstance(exc, self._connection_errors):  # type: ignore[arg-type]
                     raise SummaryConnectionError(f"OpenAI connection failed: {exc}") from exc
+                if _extract_status_code(exc) in {500, 502, 503, 504}:
+                    raise SummaryServerError(f"OpenAI server error: {exc}") from exc
                 raise SummaryError(f"OpenAI API call failed: {exc}") from exc
 
-        if not response.choices:
-            raise SummaryError("OpenAI response has no choices.")
-        content: Optional[str] = response.choices[0].message.content
+        content: Optional[str]
+        if self._streaming is not None:
+            content, usage = streamed
+        else:
+            if not response.choices:
+                raise SummaryError("OpenAI response has no choices.")
+            content = response.choices[0].message.content
+            usage = _usage_from_response(response)
         if not content:
             raise SummaryError("OpenAI returned empty content.")
         logger.info("Summary generated (%s chars)", len(content))
-        return content.strip()
+        summary = content.strip()
+        if use_cache:
+            self.remember(text, summary, system_prompt)
+        return summary, usage
+
+
+def _usage_from_response(response: Any) -> TokenUsage:
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return TokenUsage(
+        prompt_tokens=getattr(usage, "prompt_tokens", None) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", None) or 0,
+        calls=1,
+        cached_tokens=getattr(details, "cached_tokens", None) or 0,
+    )
+
+
+def _prompt_cache_key(model: str, system_prompt: str) -> str:
+    digest = hashlib.sha256(f"{model}\n{system_prompt}".encode("utf-8")).hexdigest()
+    return f"raindrop-digest-{digest[:16]}"
+
+
+def _close_quietly(stream: Any) -> None:
+    close = getattr(stream, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception:  # noqa: BLE001 - the stream is being abandoned anyway
+        logger.debug("Closing an abandoned OpenAI stream failed", exc_info=True)
+
+
+def _extract_headers(exc: Exception) -> Optional[Mapping[str, str]]:
+    response = getattr(exc, "response", None)
+    return getattr(response, "headers", None)
 
 
 def _extract_status_code(exc: Exception) -> Optional[int]:
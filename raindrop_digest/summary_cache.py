@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_created_at ON summaries (created_at);
+CREATE INDEX IF NOT EXISTS summaries_last_used_at ON summaries (last_used_at);
+"""
+
+
+class SummaryCache:
+    """
+    SQLite cache of generated summaries.
+
+    The key covers the text sent to the model, the model name and the system
+    prompt, so a prompt or model change never serves a stale summary. Entries older
+    than ``max_age_days`` are dropped, and beyond ``max_entries`` the least recently
+    used ones go first. Eviction runs once when the cache is opened.
+    """
+
+    def __init__(self, path: str | Path, *, max_age_days: int = 30, max_entries: int = 5000):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._max_age_seconds = max_age_days * 24 * 60 * 60
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evict()
+
+    @staticmethod
+    def make_key(text: str, model: str, system_prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, system_prompt, text.strip()):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE summaries SET last_used_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, model: str, summary: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, model, summary, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, summary, now, now),
+            )
+            self._conn.commit()
+
+    def evict(self) -> None:
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM summaries WHERE created_at < ?",
+                (time.time() - self._max_age_seconds,),
+            ).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM summaries WHERE key NOT IN "
+                "(SELECT key FROM summaries ORDER BY last_used_at DESC LIMIT ?)",
+                (self._max_entries,),
+            ).rowcount
+            self._conn.commit()
+        if expired or overflow:
+            logger.info("Summary cache evicted %s expired and %s overflow entries", expired, overflow)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
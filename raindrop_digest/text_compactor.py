@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from .utils import estimate_tokens, is_cjk_text
+
+# Readability's text_content() keeps the source indentation, non-breaking and
+# zero-width spaces; none of them carry meaning for the model.
+_INLINE_SPACE = re.compile(r"[ \t\f\v\u00a0\u2000-\u200a\u202f\u3000]+")
+_ZERO_WIDTH = re.compile(r"[\u200b-\u200d\u2060\ufeff]")
+
+# Lines shorter than this are never treated as duplicates: list markers, short
+# code lines and headings legitimately repeat.
+_MIN_DEDUPE_CHARS = 12
+# Boilerplate patterns only apply to short lines, so real sentences that merely
+# mention "share" or "広告" survive.
+_MAX_BOILERPLATE_CHARS = 40
+_BOILERPLATE_LINE = re.compile(
+    r"""^(?:
+        share(?:\ this)?(?:\ (?:on|via)\ \w+)?|tweet|pin\ it|copy\ link|print|e-?mail|
+        advertisement|sponsored(?:\ content)?|
+        read\ more|continue\ reading|see\ also|related(?:\ (?:posts|articles|stories))?|
+        (?:sign|log)\ ?(?:in|up)(?:\ .*)?|subscribe(?:\ .*)?|
+        (?:accept|manage)(?:\ all)?\ cookies?|.*cookie\ (?:policy|settings).*|
+        all\ rights\ reserved\.?|©.*|(?:\(c\)|copyright)\ ?\d{4}.*|
+        back\ to\ top|skip\ to\ (?:main\ )?content|menu|home|next|previous|prev|
+        シェア(?:する)?|ツイート|この記事をシェア.*|記事をシェア|ポスト|いいね|はてなブックマーク|ブックマーク|
+        広告|pr|スポンサー(?:リンク)?|関連記事|あわせて読みたい|おすすめ記事|人気記事|続きを読む|もっと見る|
+        ログイン|会員登録|新規登録|(?:メールマガジン|メルマガ)(?:登録|の登録|を購読).*|ページの?先頭へ(?:戻る)?|トップへ戻る|目次
+    )[\s:：|｜>›»]*$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+@dataclass
+class CompactedText:
+    text: str
+    chars_saved: int
+    tokens_saved: int
+
+
+def compact_text(text: str, max_tokens: Optional[int] = None) -> CompactedText:
+    """
+    Strip what the model does not need from extracted article text.
+
+    Whitespace runs are collapsed, blank-line runs become a single paragraph break,
+    and boilerplate lines (share buttons, ads, navigation) as well as repeated
+    lines are dropped. ``chars_saved`` / ``tokens_saved`` report what that removed.
+    With ``max_tokens`` the result is then cut to the estimated token budget.
+    """
+    lines: List[str] = []
+    seen: Set[str] = set()
+    for raw_line in _ZERO_WIDTH.sub("", text).splitlines():
+        line = _INLINE_SPACE.sub(" ", raw_line).strip()
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if len(line) <= _MAX_BOILERPLATE_CHARS and _BOILERPLATE_LINE.match(line):
+            continue
+        if len(line) >= _MIN_DEDUPE_CHARS:
+            key = line.casefold()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    compacted = "\n".join(lines).strip()
+
+    result = CompactedText(
+        text=compacted,
+        chars_saved=len(text) - len(compacted),
+        tokens_saved=estimate_tokens(text) - estimate_tokens(compacted),
+    )
+    if max_tokens is not None:
+        result.text = trim_to_token_budget(compacted, max_tokens)
+    return result
+
+
+def trim_to_token_budget(text: str, max_tokens: int) -> str:
+    """Cut ``text`` so that ``estimate_tokens`` stays within ``max_tokens``."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens * 4  # in quarter tokens: CJK costs 4, other characters 1
+    for idx, char in enumerate(text):
+        budget -= 4 if is_cjk_text(char) else 1
+        if budget < 0:
+            return text[:idx]
+    return text
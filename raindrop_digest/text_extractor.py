@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from typing import Tuple, List
 from urllib.parse import urljoin, urlparse
 
 import httpx
-from lxml import html
+from lxml import etree, html
 from readability import Document
-from .config import MAX_EXTRACT_CHARS
+from .config import MAX_EXTRACT_CHARS, MAX_EXTRACT_TOKENS
+from .http_cache import CachedPage, HttpCache
 from .models import ExtractedContent
+from .text_compactor import compact_text
 from .utils import trim_text
 
 logger = logging.getLogger(__name__)
@@ -25,6 +29,8 @@ DEFAULT_SECONDARY_USER_AGENT = (
     "Mozilla/5.0 (X11; Linux x86_64; rv:133.0) Gecko/20100101 Firefox/133.0"
 )
 
+_UTF8_PARSER = html.HTMLParser(encoding="utf-8")
+
 
 class ExtractionError(Exception):
     """Raised when content extraction fails."""
@@ -70,46 +76,143 @@ def _user_agent_candidates() -> list[str]:
     return unique
 
 
-def fetch_html(url: str, *, transport: httpx.BaseTransport | None = None) -> str:
-    logger.info("Fetching URL: %s", url)
-    last_status: int | None = None
-    user_agents = _user_agent_candidates()
-    for idx, user_agent in enumerate(user_agents, start=1):
-        with httpx.Client(
-            headers=_request_headers(user_agent),
-            timeout=20.0,
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HtmlFetcher:
+    """
+    Long-lived HTTP client shared by every article fetch in a run.
+
+    httpx keeps a keep-alive connection pool per origin, so bookmarks on the same
+    host reuse TCP/TLS connections instead of paying a handshake per article.
+    Compressed transfer encodings (gzip/deflate, plus br/zstd when their decoders
+    are installed) are negotiated by httpx automatically. The User-Agent is set per
+    request so the 403/406 fallback does not need a new client. With ``cache``,
+    pages are served from / revalidated against the on-disk HttpCache.
+    """
+
+    def __init__(
+        self,
+        *,
+        transport: httpx.BaseTransport | None = None,
+        http2: bool = False,
+        timeout: float = 20.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        cache: HttpCache | None = None,
+    ):
+        self._cache = cache
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self._client = httpx.Client(
+            timeout=timeout,
             follow_redirects=True,
             transport=transport,
-        ) as client:
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+
+    def __enter__(self) -> "HtmlFetcher":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._client.close()
+
+    def fetch(self, url: str) -> str:
+        cached = self._cache.get(url) if self._cache is not None else None
+        if cached is not None and self._cache is not None and self._cache.is_fresh(cached):
+            logger.info("Using cached page (within TTL): %s", url)
+            return cached.text
+        logger.info("Fetching URL: %s", url)
+        user_agents = _user_agent_candidates()
+        for idx, user_agent in enumerate(user_agents, start=1):
+            headers = _request_headers(user_agent)
+            if cached is not None:
+                headers.update(cached.validators())
             try:
-                response = client.get(url)
+                response = self._client.get(url, headers=headers)
             except httpx.RequestError as exc:
                 raise ExtractionError(f"HTTP request failed: {exc}") from exc
+            text = _handle_cacheable_response(self._cache, cached, response, url, idx, len(user_agents))
+            if text is not None:
+                return text
+        raise ExtractionError("HTTP fetch failed: no User-Agent candidates")
+
+
+def _handle_cacheable_response(
+    cache: HttpCache | None,
+    cached: CachedPage | None,
+    response: httpx.Response,
+    url: str,
+    attempt: int,
+    attempts: int,
+) -> str | None:
+    """_handle_fetch_response plus 304 handling and cache writes."""
+    if cache is not None and cached is not None and response.status_code == 304:
+        logger.info("Not modified; using cached page: %s", url)
+        cache.revalidated(cached)
+        return cached.text
+    text = _handle_fetch_response(response, url, attempt, attempts)
+    if text is not None and cache is not None:
+        cache.store(url, response)
+    return text
 
-            last_status = response.status_code
-            if response.status_code in (403, 406) and idx < len(user_agents):
-                logger.warning(
-                    "HTTP %s for %s; retrying with another User-Agent (attempt %s/%s)",
-                    response.status_code,
-                    url,
-                    idx,
-                    len(user_agents),
-                )
-                continue
-
-            try:
-                response.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                hint = ""
-                if exc.response.status_code == 403:
-                    hint = " (site may block automated fetch; try setting HTTP_USER_AGENT to a browser UA)"
-                raise ExtractionError(f"HTTP fetch failed: {exc}{hint}") from exc
-            return response.text
-
-    raise ExtractionError(f"HTTP fetch failed: status={last_status}")
 
+def _handle_fetch_response(
+    response: httpx.Response, url: str, attempt: int, attempts: int
+) -> str | None:
+    """
+    Return the page text, or None when the next User-Agent should be tried.
 
-def extract_text(url: str) -> ExtractedContent:
+    Raises ExtractionError for any other non-2xx status.
+    """
+    if response.status_code in (403, 406) and attempt < attempts:
+        logger.warning(
+            "HTTP %s for %s; retrying with another User-Agent (attempt %s/%s)",
+            response.status_code,
+            url,
+            attempt,
+            attempts,
+        )
+        return None
+
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        hint = ""
+        if exc.response.status_code == 403:
+            hint = " (site may block automated fetch; try setting HTTP_USER_AGENT to a browser UA)"
+        raise ExtractionError(f"HTTP fetch failed: {exc}{hint}") from exc
+    return response.text
+
+
+def fetch_html(
+    url: str,
+    *,
+    transport: httpx.BaseTransport | None = None,
+    fetcher: HtmlFetcher | None = None,
+) -> str:
+    """Fetch ``url`` with ``fetcher``, or with a one-off client when none is given."""
+    if fetcher is not None:
+        return fetcher.fetch(url)
+    with HtmlFetcher(transport=transport) as one_off:
+        return one_off.fetch(url)
+
+
+def ensure_supported_source(url: str) -> str:
+    """Return the source type of ``url``, raising ExtractionError for unsupported ones."""
     source = detect_source(url)
     if source == "x":
         raise ExtractionError("Xリンクは非対応です。対応を希望する場合は、開発者までご連絡ください。")
@@ -117,25 +220,109 @@ def extract_text(url: str) -> ExtractedContent:
         raise ExtractionError("YouTubeリンクは非対応です。対応を希望する場合は、開発者までご連絡ください。")
     if source == "speakerdeck":
         raise ExtractionError("SpeakerDeckリンクは非対応です。対応を希望する場合は、開発者までご連絡ください。")
-    html_text = fetch_html(url)
-    text = _extract_readability(html_text, url)
-    hero_image_url = _extract_hero_image_url(html_text, url)
+    return source
+
+
+def extract_text(
+    url: str,
+    *,
+    transport: httpx.BaseTransport | None = None,
+    fetcher: HtmlFetcher | None = None,
+) -> ExtractedContent:
+    source = ensure_supported_source(url)
+    html_text = fetch_html(url, transport=transport, fetcher=fetcher)
+    return parse_html(html_text, url, source)
+
+
+def parse_html(
+    html_text: str,
+    url: str,
+    source: str = "web",
+    max_chars: int = MAX_EXTRACT_CHARS,
+    max_tokens: int | None = MAX_EXTRACT_TOKENS,
+) -> ExtractedContent:
+    """
+    Extract the article body, title and hero image from fetched HTML (CPU-bound).
+
+    The page is parsed once. Metadata is read from that tree first, because
+    readability then works on the same tree and drops hidden elements from it in
+    place (the rest of its cleaning happens on a copy). The body is compacted
+    (whitespace, boilerplate and repeated lines), cut to ``max_tokens`` estimated
+    tokens and finally to ``max_chars`` (both raised in long-document mode).
+    """
+    tree = _parse_document(html_text)
+    metadata = _extract_page_metadata(tree, url)
+    text = _extract_readability(tree, url)
     cleaned = text.strip()
     if not cleaned:
         raise ExtractionError("Extracted text is empty.")
-    trimmed = trim_text(cleaned, MAX_EXTRACT_CHARS)
+    compacted = compact_text(cleaned, max_tokens=max_tokens)
+    if not compacted.text:
+        raise ExtractionError("Extracted text is empty after compaction.")
+    trimmed = trim_text(compacted.text, max_chars)
     logger.info(
         "Extracted %s characters from %s (source=%s)%s",
         len(trimmed),
         url,
         source,
-        "" if not hero_image_url else " (hero image detected)",
+        "" if not metadata.hero_image_url else " (hero image detected)",
     )
     return ExtractedContent(
         text=trimmed,
         source=source,
         length=len(trimmed),
-        hero_image_url=hero_image_url,
+        hero_image_url=metadata.hero_image_url,
+        title=metadata.title,
+        chars_saved=compacted.chars_saved,
+        tokens_saved=compacted.tokens_saved,
+    )
+
+
+def default_parse_workers() -> int:
+    """Leave one core for the main process, which drives the I/O-bound stages."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+class ParsePool:
+    """
+    Run parse_html in worker processes.
+
+    Readability and lxml parsing are CPU-bound and hold the GIL, so threads do not
+    speed them up. Only the HTML text, URL and source cross the process boundary and
+    only the compact ExtractedContent comes back.
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = workers if workers and workers > 0 else default_parse_workers()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_warm_up_parser
+        )
+
+    def warm_up(self) -> None:
+        """Start every worker process now instead of on the first real page."""
+        futures = [self._executor.submit(os.getpid) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        logger.info("Parse process pool ready (workers=%s)", self.workers)
+
+    def parse(
+        self,
+        html_text: str,
+        url: str,
+        source: str = "web",
+        max_chars: int = MAX_EXTRACT_CHARS,
+        max_tokens: int | None = MAX_EXTRACT_TOKENS,
+    ) -> ExtractedContent:
+        return self._executor.submit(parse_html, html_text, url, source, max_chars, max_tokens).result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def _warm_up_parser() -> None:
+    # Pay lxml/readability's first-call setup once per worker process.
+    _extract_readability(
+        _parse_document("<html><body><p>warm up</p></body></html>"), "https://example.com/"
     )
 
 
@@ -157,29 +344,101 @@ def _extract_x(html_text: str) -> str:
     return description
 
 
-def _extract_readability(html_text: str, url: str) -> str:
-    doc = Document(html_text, url=url)
+def _parse_document(html_text: str) -> html.HtmlElement:
+    # Same normalisation as readability's own build_doc: round-trip through UTF-8
+    # to drop characters lxml cannot handle.
+    try:
+        return html.document_fromstring(
+            html_text.encode("utf-8", "replace"), parser=_UTF8_PARSER
+        )
+    except etree.ParserError as exc:
+        raise ExtractionError(f"Failed to parse HTML: {exc}") from exc
+
+
+# Block elements end a line in the extracted text; text_content() alone would run
+# paragraphs of minified pages together and hide them from line-based compaction.
+_BLOCK_TAGS = (
+    "p", "div", "section", "article", "li", "dt", "dd", "tr", "pre", "blockquote",
+    "h1", "h2", "h3", "h4", "h5", "h6", "br", "hr", "figcaption", "table", "ul", "ol",
+)
+
+
+def _extract_readability(document: str | html.HtmlElement, url: str) -> str:
+    doc = Document(document, url=url)
     summary_html = doc.summary(html_partial=True)
     tree = html.fromstring(summary_html)
+    for element in tree.iter(*_BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
     text = tree.text_content()
     return text
 
 
+@dataclass
+class PageMetadata:
+    title: str | None = None
+    hero_image_url: str | None = None
+
+
+# Hero image sources in order of preference.
+_HERO_IMAGE_KEYS = (
+    ("property", "og:image"),
+    ("property", "og:image:url"),
+    ("property", "og:image:secure_url"),
+    ("name", "twitter:image"),
+    ("name", "twitter:image:src"),
+    ("rel", "image_src"),
+)
+_HERO_IMAGE_PRIORITY = {key: idx for idx, key in enumerate(_HERO_IMAGE_KEYS)}
+
+# One traversal collects every element the metadata lookups need.
+_METADATA_XPATH = etree.XPath(
+    "//title | //meta[@content][@property or @name] | //link[@rel='image_src'][@href]"
+)
+
+
+def _extract_page_metadata(tree: html.HtmlElement, page_url: str) -> PageMetadata:
+    title: str | None = None
+    og_title: str | None = None
+    hero_candidates: List[List[str]] = [[] for _ in _HERO_IMAGE_KEYS]
+
+    for element in _METADATA_XPATH(tree):
+        tag = element.tag
+        if tag == "title":
+            if title is None and element.text and element.text.strip():
+                title = element.text.strip()
+            continue
+        if tag == "link":
+            hero_candidates[_HERO_IMAGE_PRIORITY[("rel", "image_src")]].append(element.get("href"))
+            continue
+        content = element.get("content")
+        for attr in ("property", "name"):
+            key = element.get(attr)
+            if key is None:
+                continue
+            priority = _HERO_IMAGE_PRIORITY.get((attr, key))
+            if priority is not None:
+                hero_candidates[priority].append(content)
+            elif key == "og:title" and og_title is None:
+                og_title = content.strip() or None
+
+    return PageMetadata(
+        title=title or og_title,
+        hero_image_url=_pick_hero_image(
+            [raw for bucket in hero_candidates for raw in bucket], page_url
+        ),
+    )
+
+
 def _extract_hero_image_url(html_text: str, page_url: str) -> str | None:
     """
     Extract a representative header image URL for email display.
 
     Prefer Open Graph / Twitter card images. If the URL is relative, resolve it using the page URL.
     """
-    tree = html.fromstring(html_text)
-    candidates: List[str] = []
-    candidates.extend(tree.xpath("//meta[@property='og:image']/@content"))
-    candidates.extend(tree.xpath("//meta[@property='og:image:url']/@content"))
-    candidates.extend(tree.xpath("//meta[@property='og:image:secure_url']/@content"))
-    candidates.extend(tree.xpath("//meta[@name='twitter:image']/@content"))
-    candidates.extend(tree.xpath("//meta[@name='twitter:image:src']/@content"))
-    candidates.extend(tree.xpath("//link[@rel='image_src']/@href"))
+    return _extract_page_metadata(_parse_document(html_text), page_url).hero_image_url
+
 
+def _pick_hero_image(candidates: List[str], page_url: str) -> str | None:
     for raw in candidates:
         if not raw:
             continue
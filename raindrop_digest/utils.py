@@ -59,6 +59,50 @@ def trim_text(text: str, max_chars: int) -> str:
     return text[:max_chars]
 
 
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[。．！？!?])|(?<=[.]\s)")
+
+
+def split_text_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Split ``text`` into chunks of at most ``max_chars`` characters.
+
+    Paragraphs are packed together while they fit; a paragraph that is too long is
+    split on sentence ends, and only a sentence longer than ``max_chars`` is cut
+    mid-way.
+    """
+    if max_chars < 1:
+        raise ValueError(f"max_chars must be >= 1, got {max_chars}.")
+    # (piece, separator placed before it when packed after another piece)
+    pieces: List[tuple[str, str]] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append((paragraph, "\n\n"))
+            continue
+        separator = "\n\n"
+        for sentence in _SENTENCE_END.split(paragraph):
+            for start in range(0, len(sentence), max_chars):
+                pieces.append((sentence[start : start + max_chars], separator))
+                separator = ""
+
+    chunks: List[str] = []
+    current = ""
+    for piece, separator in pieces:
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current.strip():
+            chunks.append(current.strip())
+        current = piece
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
 def canonicalize_url(url: str) -> str:
     """
     Canonicalize URL to detect duplicates within a single batch run.
@@ -185,6 +229,18 @@ def is_cjk_text(text: str) -> bool:
     return _CJK_REGEX.search(text) is not None
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for OpenAI models without a tokenizer dependency.
+
+    CJK characters are counted as about one token each and other text as about
+    four characters per token.
+    """
+    cjk_chars = len(_CJK_REGEX.findall(text))
+    other_chars = len(text) - cjk_chars
+    return cjk_chars + (other_chars + 3) // 4
+
+
 def count_words(text: str) -> int:
     """
     Count words for non-CJK texts (primarily English).
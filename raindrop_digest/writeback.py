@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .config import TRASH_COLLECTION_ID
+from .models import RaindropItem
+from .raindrop_client import RaindropClient, RaindropError
+
+logger = logging.getLogger(__name__)
+
+# Kept well below what Raindrop accepts in one request body.
+BULK_CHUNK_SIZE = 100
+
+
+@dataclass
+class ItemUpdate:
+    item: RaindropItem
+    note_addition: Optional[str]
+    tags: List[str]
+
+
+@dataclass
+class WriteBackReport:
+    tagged: int = 0
+    notes_written: int = 0
+    deleted: int = 0
+    api_calls: int = 0
+    # Raindrop id -> error, for items left unchanged.
+    failures: Dict[int, str] = field(default_factory=dict)
+
+    def log_stats(self, log: logging.Logger = logger) -> None:
+        log.info(
+            "Raindrop write-back: tagged=%s notes=%s deleted=%s calls=%s failed=%s",
+            self.tagged,
+            self.notes_written,
+            self.deleted,
+            self.api_calls,
+            len(self.failures),
+        )
+        if self.failures:
+            log.warning("Raindrop write-back failures: %s", self.failures)
+
+
+class RaindropWriteBack:
+    """
+    Write run results back to Raindrop with as few requests as the API allows.
+
+    Tags are the same for many items, so they go out as bulk updates (one per
+    tag set and ``BULK_CHUNK_SIZE`` ids); this marks every item delivered first,
+    even if later note writes run into rate limits. Notes differ per item and
+    are written one by one on ``concurrency`` threads. A bulk request that fails,
+    or that reports fewer modified items than it was sent, falls back to per-item
+    requests for its ids (Raindrop does not say which ones it skipped), and every
+    id that still fails is listed in the report instead of stopping the rest.
+    """
+
+    def __init__(self, client: RaindropClient, *, concurrency: int = 4, chunk_size: int = BULK_CHUNK_SIZE):
+        self._client = client
+        self._concurrency = max(concurrency, 1)
+        self._chunk_size = chunk_size
+        self._lock = threading.Lock()
+
+    def apply(self, updates: Sequence[ItemUpdate]) -> WriteBackReport:
+        report = WriteBackReport()
+        by_tags: Dict[Tuple[str, ...], List[int]] = {}
+        for update in updates:
+            by_tags.setdefault(tuple(sorted(set(update.tags))), []).append(update.item.id)
+
+        # Items whose bulk tag update failed get their tags together with the note.
+        retag: Dict[int, List[str]] = {}
+        for tags, ids in by_tags.items():
+            if not tags:
+                continue
+            for chunk in self._chunks(ids):
+                report.api_calls += 1
+                try:
+                    modified = self._client.add_tags(chunk, list(tags))
+                except RaindropError as exc:
+                    logger.warning("Bulk tag update of %s items failed; retrying per item: %s", len(chunk), exc)
+                    retag.update({item_id: list(tags) for item_id in chunk})
+                    continue
+                if modified < len(chunk):
+                    # Re-tagging is idempotent, so the whole chunk goes through the per-item path.
+                    logger.warning(
+                        "Bulk tag update modified %s of %s items; retrying per item", modified, len(chunk)
+                    )
+                    retag.update({item_id: list(tags) for item_id in chunk})
+                    continue
+                report.tagged += len(chunk)
+
+        def write(update: ItemUpdate) -> None:
+            item_id = update.item.id
+            if item_id in retag:
+                note_and_tags = (update.item, update.note_addition, retag[item_id])
+                if self._call(report, item_id, self._client.append_note_and_tags, *note_and_tags):
+                    with self._lock:
+                        report.tagged += 1
+                        report.notes_written += 1 if update.note_addition else 0
+            elif self._call(report, item_id, self._client.update_note, update.item, update.note_addition):
+                with self._lock:
+                    report.notes_written += 1
+
+        self._run_pool(write, [u for u in updates if u.item.id in retag or u.note_addition])
+        return report
+
+    def delete(self, item_ids: Sequence[int]) -> WriteBackReport:
+        report = WriteBackReport()
+        leftover: List[int] = []
+        # Ids of partial bulk deletes; some of them may already be in Trash.
+        unsure: Set[int] = set()
+        for chunk in self._chunks(list(item_ids)):
+            report.api_calls += 1
+            try:
+                modified = self._client.delete_items(chunk)
+            except RaindropError as exc:
+                logger.warning("Bulk delete of %s items failed; retrying per item: %s", len(chunk), exc)
+                leftover.extend(chunk)
+                continue
+            if modified < len(chunk):
+                logger.warning("Bulk delete removed %s of %s items; checking per item", modified, len(chunk))
+                leftover.extend(chunk)
+                unsure.update(chunk)
+                continue
+            report.deleted += len(chunk)
+
+        def delete_one(item_id: int) -> None:
+            # Deleting an item that is already in Trash would remove it for good.
+            if item_id in unsure and self._settled_by_lookup(report, item_id):
+                return
+            if self._call(report, item_id, self._client.delete_item, item_id):
+                with self._lock:
+                    report.deleted += 1
+
+        self._run_pool(delete_one, leftover)
+        return report
+
+    def _settled_by_lookup(self, report: WriteBackReport, item_id: int) -> bool:
+        """
+        Whether looking the item up settled it: it is gone or already in Trash
+        (counted as deleted), or the lookup failed (a failure). Otherwise it still
+        needs deleting.
+        """
+        with self._lock:
+            report.api_calls += 1
+        try:
+            found = self._client.fetch_item(item_id)
+        except RaindropError as exc:
+            logger.warning("Failed to look up Raindrop item %s: %s", item_id, exc)
+            with self._lock:
+                report.failures[item_id] = str(exc)
+            return True
+        if found is None or found[1] == TRASH_COLLECTION_ID:
+            with self._lock:
+                report.deleted += 1
+            return True
+        return False
+
+    def _chunks(self, ids: List[int]) -> List[List[int]]:
+        return [ids[i : i + self._chunk_size] for i in range(0, len(ids), self._chunk_size)]
+
+    def _call(self, report: WriteBackReport, item_id: int, fn: Callable[..., None], *args) -> bool:
+        with self._lock:
+            report.api_calls += 1
+        try:
+            fn(*args)
+            return True
+        except RaindropError as exc:
+            logger.warning("Failed to update Raindrop item %s: %s", item_id, exc)
+            with self._lock:
+                report.failures[item_id] = str(exc)
+            return False
+
+    def _run_pool(self, fn: Callable, args: Sequence) -> None:
+        if not args:
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(self._concurrency, len(args)), thread_name_prefix="raindrop-write"
+        ) as executor:
+            list(executor.map(fn, args))
+
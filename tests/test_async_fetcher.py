@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+
+from raindrop_digest.async_fetcher import (
+    AsyncHtmlFetcher,
+    BackgroundFetcher,
+    extract_texts,
+    fetch_html_async,
+)
+from raindrop_digest.text_extractor import ExtractionError
+
+ARTICLE = "<html><body><article><p>{path}</p></article></body></html>"
+
+
+def _tracking_transport(delay: float = 0.02):
+    active: Counter[str] = Counter()
+    peak: Counter[str] = Counter()
+    peak_total = [0]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        peak_total[0] = max(peak_total[0], sum(active.values()))
+        await asyncio.sleep(delay)
+        active[host] -= 1
+        return httpx.Response(200, request=request, text=ARTICLE.format(path=request.url.path))
+
+    return httpx.MockTransport(handler), peak, peak_total
+
+
+def test_fetch_respects_global_and_per_host_limits() -> None:
+    transport, peak, peak_total = _tracking_transport()
+    urls = [f"https://a.example/{i}" for i in range(6)] + [f"https://b.example/{i}" for i in range(6)]
+
+    async def run() -> list[str]:
+        async with AsyncHtmlFetcher(
+            max_concurrency=3, per_host_concurrency=2, transport=transport
+        ) as fetcher:
+            return await asyncio.gather(*(fetcher.fetch(url) for url in urls))
+
+    pages = asyncio.run(run())
+    assert pages[0] == ARTICLE.format(path="/0")
+    assert peak["a.example"] == 2
+    assert peak["b.example"] <= 2
+    assert peak_total[0] == 3
+
+
+def test_fetch_html_async_retries_user_agent_on_403(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("HTTP_USER_AGENT", raising=False)
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers["User-Agent"])
+        if len(seen) == 1:
+            return httpx.Response(406, request=request)
+        return httpx.Response(200, request=request, text="<html>ok</html>")
+
+    async def run() -> str:
+        async with AsyncHtmlFetcher(transport=httpx.MockTransport(handler)) as fetcher:
+            return await fetch_html_async("https://example.com/", fetcher=fetcher)
+
+    assert asyncio.run(run()) == "<html>ok</html>"
+    assert len(seen) == 2 and seen[0] != seen[1]
+
+
+def test_extract_texts_short_circuits_unsupported_sources_and_keeps_order() -> None:
+    requested: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if request.url.path == "/missing":
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, request=request, text=ARTICLE.format(path="本文"))
+
+    outcomes = extract_texts(
+        ["https://example.com/a", "https://youtu.be/abc", "https://example.com/missing"],
+        transport=httpx.MockTransport(handler),
+    )
+    assert outcomes[0].text == "本文"  # type: ignore[union-attr]
+    assert isinstance(outcomes[1], ExtractionError)
+    assert str(outcomes[1]).startswith("YouTubeリンクは非対応です")
+    assert isinstance(outcomes[2], ExtractionError)
+    assert "youtu.be" not in " ".join(requested)
+
+
+def test_background_fetcher_serves_blocking_callers() -> None:
+    transport, peak, _ = _tracking_transport(delay=0.0)
+    fetcher = BackgroundFetcher(per_host_concurrency=1, transport=transport)
+    try:
+        assert fetcher.fetch("https://a.example/x") == ARTICLE.format(path="/x")
+    finally:
+        fetcher.close()
+    assert peak["a.example"] == 1
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+from openai import OpenAI
+
+from raindrop_digest.batch_summarizer import BatchSummarizer
+from raindrop_digest.models import TokenUsage
+from raindrop_digest.summarizer import Summarizer, SummaryError
+
+
+class FakeBatchServer:
+    """Minimal in-memory stand-in for the OpenAI files/batches/chat endpoints."""
+
+    def __init__(
+        self,
+        *,
+        polls_until_done: int = 1,
+        fail_ids: Optional[List[str]] = None,
+        done_before_cancel: Optional[List[str]] = None,
+        poll_error_after: Optional[int] = None,
+    ):
+        self.polls_until_done = polls_until_done
+        self.fail_ids = set(fail_ids or [])
+        # custom_ids a cancelled batch reports as finished; None keeps it "cancelling".
+        self.done_before_cancel = done_before_cancel
+        # Polls after this many answer 503 (max_retries=0, so the client raises).
+        self.poll_error_after = poll_error_after
+        self.files: Dict[str, bytes] = {}
+        self.batch: Dict[str, Any] = {}
+        self.polls = 0
+        self.cancelled = False
+        self.sync_calls: List[str] = []
+        self.sync_threads: set = set()
+
+    def client(self) -> OpenAI:
+        return OpenAI(
+            api_key="dummy",
+            base_url="http://fake-openai.test/v1",
+            max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(self.handle)),
+        )
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "POST" and path == "/v1/files":
+            # Multipart body; the JSONL payload is the only part with newlines of JSON.
+            body = request.content
+            start = body.index(b'{"custom_id"')
+            end = body.rindex(b"}\n") + 2
+            self.files["file-in"] = body[start:end]
+            return httpx.Response(
+                200,
+                json={"id": "file-in", "object": "file", "bytes": len(body), "created_at": 0,
+                      "filename": "in.jsonl", "purpose": "batch", "status": "processed"},
+            )
+        if request.method == "POST" and path == "/v1/batches":
+            self.batch = self._batch_json("validating")
+            return httpx.Response(200, json=self.batch)
+        if request.method == "GET" and path == "/v1/batches/batch-1":
+            self.polls += 1
+            if self.poll_error_after is not None and self.polls > self.poll_error_after:
+                return httpx.Response(503, json={"error": {"message": "unavailable"}})
+            if self.cancelled and self.done_before_cancel is not None:
+                self._complete("cancelled", set(self.done_before_cancel))
+            elif not self.cancelled and self.polls >= self.polls_until_done:
+                self._complete()
+            return httpx.Response(200, json=self.batch)
+        if request.method == "POST" and path == "/v1/batches/batch-1/cancel":
+            self.cancelled = True
+            self.batch = self._batch_json("cancelling")
+            return httpx.Response(200, json=self.batch)
+        if request.method == "GET" and path == "/v1/files/file-out/content":
+            return httpx.Response(200, content=self.files["file-out"])
+        if request.method == "POST" and path == "/v1/chat/completions":
+            text = json.loads(request.content)["messages"][-1]["content"]
+            self.sync_calls.append(text)
+            self.sync_threads.add(threading.current_thread().name)
+            return httpx.Response(200, json=_completion(f"同期:{text}"))
+        return httpx.Response(404, json={"error": {"message": f"unexpected {request.method} {path}"}})
+
+    def _batch_json(self, status: str, output_file_id: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "id": "batch-1",
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": "file-in",
+            "completion_window": "24h",
+            "status": status,
+            "created_at": 0,
+            "output_file_id": output_file_id,
+        }
+
+    def _complete(self, status: str = "completed", only: Optional[set] = None) -> None:
+        lines = []
+        for raw in self.files["file-in"].decode("utf-8").splitlines():
+            request = json.loads(raw)
+            custom_id = request["custom_id"]
+            if only is not None and custom_id not in only:
+                continue
+            if custom_id in self.fail_ids:
+                response = {"status_code": 500, "body": {"error": {"message": "boom"}}}
+            else:
+                text = request["body"]["messages"][-1]["content"]
+                response = {"status_code": 200, "body": _completion(f"一括:{text}")}
+            lines.append(json.dumps({"id": f"r-{custom_id}", "custom_id": custom_id, "response": response}))
+        self.files["file-out"] = ("\n".join(lines) + "\n").encode("utf-8")
+        self.batch = self._batch_json(status, output_file_id="file-out")
+
+
+def _completion(content: str) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4.1-mini",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {
+            "prompt_tokens": 100,
+            "completion_tokens": 20,
+            "total_tokens": 120,
+            "prompt_tokens_details": {"cached_tokens": 40},
+        },
+    }
+
+
+def _summaries(outcomes: Dict[int, Any]) -> Dict[int, Any]:
+    return {
+        item_id: outcome if isinstance(outcome, SummaryError) else outcome[0]
+        for item_id, outcome in outcomes.items()
+    }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _batch_summarizer(
+    server: FakeBatchServer, clock: FakeClock, deadline: float = 300, concurrency: int = 1
+) -> BatchSummarizer:
+    summarizer = Summarizer(api_key="dummy", client=server.client())
+    return BatchSummarizer(
+        summarizer,
+        deadline_seconds=deadline,
+        poll_interval_seconds=30,
+        concurrency=concurrency,
+        sleep=clock.sleep,
+        clock=clock,
+    )
+
+
+def test_completed_batch_maps_results_back_to_item_ids() -> None:
+    server = FakeBatchServer(polls_until_done=3)
+    clock = FakeClock()
+
+    outcomes = _batch_summarizer(server, clock).summarize_many([(10, "記事A"), (20, "記事B")])
+
+    assert _summaries(outcomes) == {10: "一括:記事A", 20: "一括:記事B"}
+    assert outcomes[10][1] == TokenUsage(prompt_tokens=100, completion_tokens=20, calls=1, cached_tokens=40)
+    assert server.polls == 3
+    assert server.sync_calls == []
+
+
+def test_failed_batch_lines_fall_back_to_sync_calls() -> None:
+    server = FakeBatchServer(fail_ids=["raindrop-20"])
+
+    outcomes = _batch_summarizer(server, FakeClock()).summarize_many([(10, "記事A"), (20, "記事B")])
+
+    assert _summaries(outcomes) == {10: "一括:記事A", 20: "同期:記事B"}
+    assert outcomes[20][1].calls == 1
+    assert server.sync_calls == ["記事B"]
+
+
+def test_deadline_cancels_batch_and_summarizes_synchronously() -> None:
+    server = FakeBatchServer(polls_until_done=100)
+    clock = FakeClock()
+
+    outcomes = _batch_summarizer(server, clock, deadline=90).summarize_many([(1, "本文")])
+
+    assert _summaries(outcomes) == {1: "同期:本文"}
+    assert server.cancelled
+    assert clock.now >= 90
+
+
+def test_cancelled_batch_keeps_finished_outputs_and_falls_back_concurrently() -> None:
+    server = FakeBatchServer(polls_until_done=100, done_before_cancel=["raindrop-1"])
+    clock = FakeClock()
+    requests = [(1, "記事A"), (2, "記事B"), (3, "記事C"), (4, "記事D")]
+
+    outcomes = _batch_summarizer(server, clock, deadline=90, concurrency=3).summarize_many(requests)
+
+    assert server.cancelled
+    assert _summaries(outcomes) == {1: "一括:記事A", 2: "同期:記事B", 3: "同期:記事C", 4: "同期:記事D"}
+    assert sorted(server.sync_calls) == ["記事B", "記事C", "記事D"]
+    assert all(name.startswith("batch-fallback") for name in server.sync_threads)
+
+
+def test_sync_fallback_errors_are_returned_per_item() -> None:
+    server = FakeBatchServer(polls_until_done=100)
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/v1/chat/completions":
+            return httpx.Response(400, json={"error": {"message": "bad request"}})
+        return server.handle(request)
+
+    client = OpenAI(
+        api_key="dummy",
+        base_url="http://fake-openai.test/v1",
+        max_retries=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handle)),
+    )
+    clock = FakeClock()
+    batch = BatchSummarizer(
+        Summarizer(api_key="dummy", client=client, max_attempts=1),
+        deadline_seconds=30,
+        poll_interval_seconds=30,
+        sleep=clock.sleep,
+        clock=clock,
+    )
+
+    outcomes = batch.summarize_many([(1, "本文")])
+
+    assert isinstance(outcomes[1], SummaryError)
+
+
+def test_polling_error_cancels_the_batch_and_falls_back() -> None:
+    server = FakeBatchServer(polls_until_done=100, poll_error_after=1)
+
+    outcomes = _batch_summarizer(server, FakeClock()).summarize_many([(1, "本文")])
+
+    assert server.cancelled
+    assert _summaries(outcomes) == {1: "同期:本文"}
+
+
+def test_polling_error_after_cancel_keeps_the_cancel() -> None:
+    server = FakeBatchServer(polls_until_done=100, poll_error_after=3)
+    clock = FakeClock()
+
+    outcomes = _batch_summarizer(server, clock, deadline=90).summarize_many([(1, "本文")])
+
+    assert server.cancelled
+    assert _summaries(outcomes) == {1: "同期:本文"}
+
+
+def test_unanswered_items_go_through_the_given_fallback() -> None:
+    server = FakeBatchServer(fail_ids=["raindrop-20"])
+    calls: List[tuple] = []
+
+    def fallback(item_id: int, text: str) -> tuple:
+        calls.append((item_id, text))
+        return f"代替:{text}", TokenUsage(calls=1)
+
+    outcomes = _batch_summarizer(server, FakeClock()).summarize_many([(10, "記事A"), (20, "記事B")], fallback)
+
+    assert _summaries(outcomes) == {10: "一括:記事A", 20: "代替:記事B"}
+    assert calls == [(20, "記事B")]
+    assert server.sync_calls == []
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, List
+
+from raindrop_digest.chunked_summarizer import ChunkedSummarizer
+from raindrop_digest.config import CHUNK_SYSTEM_PROMPT
+from raindrop_digest.summarizer import Summarizer
+
+
+class RecordingOpenAI:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests: List[List[Any]] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        with self._lock:
+            self.requests.append(messages)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        is_chunk = messages[0]["content"] == CHUNK_SYSTEM_PROMPT
+        content = f"部分:{messages[1]['content'][:3]}" if is_chunk else "最終要約"
+        message = type("msg", (), {"content": content})
+        choice = type("choice", (), {"message": message})
+        usage = type("usage", (), {"prompt_tokens": 100, "completion_tokens": 20})
+        return type("response", (), {"choices": [choice], "usage": usage})
+
+
+def test_short_text_uses_single_call() -> None:
+    client = RecordingOpenAI()
+    chunked = ChunkedSummarizer(Summarizer(api_key="dummy", client=client), chunk_chars=100)
+
+    summary, usage = chunked.summarize_with_usage("短い本文")
+
+    assert summary == "最終要約"
+    assert len(client.requests) == 1
+    assert (usage.calls, usage.prompt_tokens, usage.completion_tokens) == (1, 100, 20)
+
+
+def test_long_text_is_mapped_in_parallel_then_reduced() -> None:
+    client = RecordingOpenAI(delay=0.05)
+    chunked = ChunkedSummarizer(Summarizer(api_key="dummy", client=client), chunk_chars=100, max_workers=4)
+    paragraphs = [f"段落{i}" + "あ" * 80 for i in range(4)]
+
+    summary, usage = chunked.summarize_with_usage("\n\n".join(paragraphs))
+
+    assert summary == "最終要約"
+    assert len(client.requests) == 5
+    assert client.max_active > 1
+    reduce_input = client.requests[-1][1]["content"]
+    assert client.requests[-1][0]["content"] != CHUNK_SYSTEM_PROMPT
+    assert reduce_input.index("部分:段落0") < reduce_input.index("部分:段落3")
+    assert "[4/4]" in reduce_input
+    assert (usage.calls, usage.total_tokens) == (5, 600)
@@ -69,3 +69,53 @@ def test_batch_lookback_days_too_small_raises(monkeypatch: pytest.MonkeyPatch, v
         else:
             monkeypatch.setenv("BATCH_LOOKBACK_DAYS", original)
         _reload_config()
+
+
+@pytest.mark.parametrize(("value", "expected"), [("true", True), ("1", True), ("off", False), ("", False)])
+def test_parse_process_pool_flag(monkeypatch: pytest.MonkeyPatch, value: str, expected: bool) -> None:
+    try:
+        monkeypatch.setenv("PARSE_PROCESS_POOL", value)
+        assert _reload_config().PARSE_PROCESS_POOL is expected
+    finally:
+        monkeypatch.delenv("PARSE_PROCESS_POOL", raising=False)
+        _reload_config()
+
+
+def test_parse_process_pool_invalid_raises(monkeypatch: pytest.MonkeyPatch) -> None:
+    try:
+        monkeypatch.setenv("PARSE_PROCESS_POOL", "maybe")
+        with pytest.raises(ValueError, match=r"PARSE_PROCESS_POOL must be a boolean"):
+            _reload_config()
+    finally:
+        monkeypatch.delenv("PARSE_PROCESS_POOL", raising=False)
+        _reload_config()
+
+
+@pytest.mark.parametrize("value", ["-0.1", "1.5"])
+def test_near_duplicate_threshold_out_of_range_raises(monkeypatch: pytest.MonkeyPatch, value: str) -> None:
+    original = os.getenv("NEAR_DUPLICATE_THRESHOLD")
+    try:
+        monkeypatch.setenv("NEAR_DUPLICATE_THRESHOLD", value)
+        with pytest.raises(ValueError, match=r"Environment variable NEAR_DUPLICATE_THRESHOLD must be"):
+            _reload_config()
+    finally:
+        if original is None:
+            monkeypatch.delenv("NEAR_DUPLICATE_THRESHOLD", raising=False)
+        else:
+            monkeypatch.setenv("NEAR_DUPLICATE_THRESHOLD", original)
+        _reload_config()
+
+
+def test_max_extract_tokens_defaults_to_the_character_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    original = os.getenv("MAX_EXTRACT_TOKENS")
+    try:
+        monkeypatch.delenv("MAX_EXTRACT_TOKENS", raising=False)
+        reloaded = _reload_config()
+        # CJK text counts one token per character, so this keeps Japanese articles at the old length.
+        assert reloaded.MAX_EXTRACT_TOKENS == reloaded.MAX_EXTRACT_CHARS
+    finally:
+        if original is None:
+            monkeypatch.delenv("MAX_EXTRACT_TOKENS", raising=False)
+        else:
+            monkeypatch.setenv("MAX_EXTRACT_TOKENS", original)
+        _reload_config()
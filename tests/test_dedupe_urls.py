@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from raindrop_digest.models import RaindropItem
+from raindrop_digest.models import RaindropItem, SummaryResult
+from raindrop_digest.orchestrator import _TargetStream
 from raindrop_digest.utils import canonicalize_url, choose_preferred_duplicate
 
 
@@ -76,3 +77,30 @@ def test_choose_preferred_duplicate_prefers_shorter_url():
     )
     preferred = choose_preferred_duplicate([item_long, item_short])
     assert preferred.id == 1
+
+
+def test_target_stream_dedupes_incrementally_and_keeps_preferred_item():
+    created = datetime(2025, 1, 2, tzinfo=timezone.utc)
+
+    def item(item_id: int, link: str, tags: list[str] | None = None) -> RaindropItem:
+        return RaindropItem(id=item_id, link=link, title=str(item_id), created=created, tags=tags or [])
+
+    stream = _TargetStream(
+        [
+            item(1, "https://example.com/a?utm_source=x"),
+            item(2, "https://example.com/b", tags=["配信済み"]),
+            item(3, "https://example.com/a"),
+            item(4, "https://example.com/c"),
+        ],
+        datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+    targets = list(stream)
+    assert [t.id for t in targets] == [1, 4]
+    assert (stream.fetched, stream.targets) == (4, 2)
+
+    results = [SummaryResult(item=t, status="success", summary="s") for t in targets]
+    duplicates = stream.resolve(results)
+    # The summary moves to the cleaner URL; the tracking-parameter copy gets deleted.
+    assert results[0].item.id == 3
+    assert [d.id for d in duplicates] == [1]
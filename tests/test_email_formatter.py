@@ -4,6 +4,7 @@ from datetime import datetime, timezone, timedelta
 
 from raindrop_digest.email_formatter import build_email_body, build_email_subject
 from raindrop_digest.models import RaindropItem, SummaryResult
+from raindrop_digest.orchestrator import _TargetStream
 
 JST = timezone(timedelta(hours=9))
 
@@ -72,3 +73,52 @@ def test_build_email_body_includes_short_article_disclaimer_when_under_threshold
     text_body, html_body = build_email_body(datetime(2024, 12, 7, tzinfo=timezone.utc), [success])
     assert "この記事は文字数が1000未満のため、情報量が不足している可能性があります。" in text_body
     assert "この記事は文字数が1000未満のため、情報量が不足している可能性があります。" in html_body
+
+
+def test_build_email_body_points_near_duplicates_to_the_listed_summary():
+    original = _item()
+    copy = RaindropItem(
+        id=2,
+        link="https://example.com/amp",
+        title="Example Title (AMP)",
+        created=original.created,
+        tags=[],
+    )
+    results = [
+        SummaryResult(item=original, status="success", summary="Summary text"),
+        SummaryResult(item=copy, status="success", summary="Summary text", duplicate_of=original),
+    ]
+    text_body, html_body = build_email_body(datetime(2024, 12, 7, tzinfo=timezone.utc), results)
+    assert text_body.count("Summary text") == 1
+    assert "1.「Example Title」とほぼ同じ内容" in text_body
+    assert html_body.count("Summary text") == 1
+
+
+def test_build_email_body_points_near_duplicates_to_a_result_moved_to_its_preferred_url():
+    original = RaindropItem(
+        id=1, link="https://example.com/?utm_source=x", title="Example Title", created=_item().created, tags=[]
+    )
+    clean = RaindropItem(id=3, link="https://example.com/", title="Example Title", created=original.created, tags=[])
+    copy = RaindropItem(id=2, link="https://example.com/amp", title="AMP", created=original.created, tags=[])
+    stream = _TargetStream([original, copy, clean], datetime(2024, 12, 1, tzinfo=timezone.utc))
+    list(stream)
+    results = [
+        SummaryResult(item=original, status="success", summary="Summary text"),
+        SummaryResult(item=copy, status="success", summary="Summary text", duplicate_of=original),
+    ]
+    stream.resolve(results)
+
+    text_body, _html_body = build_email_body(datetime(2024, 12, 7, tzinfo=timezone.utc), results)
+
+    assert results[0].item.id == 3
+    assert "1.「Example Title」とほぼ同じ内容" in text_body
+    assert "配信済み" not in text_body
+
+
+def test_build_email_body_shows_notices_above_items() -> None:
+    success = SummaryResult(item=_item(), status="success", summary="Summary text")
+    text_body, html_body = build_email_body(
+        datetime(2024, 12, 7, tzinfo=timezone.utc), [success], ["一覧を一部取得できませんでした"]
+    )
+    assert text_body.index("※ 一覧を一部取得できませんでした") < text_body.index("Example Title")
+    assert html_body.index("一覧を一部取得できませんでした") < html_body.index("Example Title")
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from typing import Any, List
+
+import pytest
+
+from raindrop_digest.failover import (
+    BackendConfig,
+    CircuitBreaker,
+    FailoverSummarizer,
+    parse_fallback_backends,
+)
+from raindrop_digest.summarizer import (
+    Summarizer,
+    SummaryConnectionError,
+    SummaryError,
+    SummaryRateLimitError,
+    SummaryServerError,
+)
+from raindrop_digest.summary_cache import SummaryCache
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class ScriptedOpenAI:
+    """Raises StatusError(status) while ``statuses`` has entries, then answers."""
+
+    def __init__(self, name: str, statuses: List[int] | None = None, always: int | None = None):
+        self.name = name
+        self.statuses = list(statuses or [])
+        self.always = always
+        self.calls = 0
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        self.calls += 1
+        if self.always is not None:
+            raise StatusError(self.always)
+        if self.statuses:
+            raise StatusError(self.statuses.pop(0))
+        message = type("msg", (), {"content": f"{self.name}:{model}"})
+        choice = type("choice", (), {"message": message})
+        usage = type("usage", (), {"prompt_tokens": 10, "completion_tokens": 5})
+        return type("response", (), {"choices": [choice], "usage": usage})
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _summarizer(client: ScriptedOpenAI, model: str = "gpt-test") -> Summarizer:
+    return Summarizer(api_key="dummy", model=model, client=client, max_attempts=1)
+
+
+def test_breaker_opens_then_allows_one_trial() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial while half-open
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open and breaker.allow()
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_fails_over_on_rate_limit_and_server_errors(status: int) -> None:
+    primary = ScriptedOpenAI("primary", always=status)
+    backup = ScriptedOpenAI("backup")
+    chain = FailoverSummarizer([("primary", _summarizer(primary)), ("backup", _summarizer(backup, "gpt-mini"))])
+
+    summary, usage = chain.summarize_with_usage("本文")
+
+    assert summary == "backup:gpt-mini"
+    assert usage.calls == 1
+    assert chain.failovers == 1
+    primary_stats, backup_stats = chain.stats
+    assert (primary_stats.failures, backup_stats.successes) == (1, 1)
+
+
+def test_client_errors_do_not_fail_over() -> None:
+    backup = ScriptedOpenAI("backup")
+    chain = FailoverSummarizer(
+        [("primary", _summarizer(ScriptedOpenAI("primary", always=400))), ("backup", _summarizer(backup))]
+    )
+
+    with pytest.raises(SummaryError):
+        chain.summarize("本文")
+    assert backup.calls == 0
+    assert chain.failovers == 0
+
+
+def test_open_circuit_skips_primary_until_reset() -> None:
+    clock = FakeClock()
+    primary = ScriptedOpenAI("primary", statuses=[503, 503])
+    chain = FailoverSummarizer(
+        [("primary", _summarizer(primary)), ("backup", _summarizer(ScriptedOpenAI("backup")))],
+        failure_threshold=2,
+        reset_seconds=30,
+        clock=clock,
+    )
+
+    assert [chain.summarize(f"本文{i}") for i in range(3)] == ["backup:gpt-test"] * 3
+    assert primary.calls == 2
+    assert chain.stats[0].skipped == 1
+
+    clock.now = 30
+    assert chain.summarize("本文4") == "primary:gpt-test"
+
+
+class Exploding:
+    """A backend that fails with a non-summary error."""
+
+    def summarize_with_usage(self, text: str, system_prompt: Any = None, **kwargs: Any):
+        raise RuntimeError("bug")
+
+
+def test_unexpected_error_in_a_trial_does_not_keep_the_circuit_open() -> None:
+    clock = FakeClock()
+    primary = ScriptedOpenAI("primary", statuses=[503, 503])
+    chain = FailoverSummarizer(
+        [("primary", _summarizer(primary)), ("backup", _summarizer(ScriptedOpenAI("backup")))],
+        failure_threshold=2,
+        reset_seconds=30,
+        clock=clock,
+    )
+    chain.summarize("本文1")
+    chain.summarize("本文2")
+    chain._backends[0] = ("primary", Exploding())  # type: ignore[list-item]
+
+    clock.now = 30
+    with pytest.raises(RuntimeError):
+        chain.summarize("本文3")
+    chain._backends[0] = ("primary", _summarizer(primary))
+
+    clock.now = 60
+    assert chain.summarize("本文4") == "primary:gpt-test"
+
+
+def test_fallback_summary_is_not_cached_as_the_primary_model(tmp_path) -> None:
+    cache = SummaryCache(tmp_path / "summaries.sqlite3")
+    primary = Summarizer(
+        api_key="dummy", model="gpt-primary", client=ScriptedOpenAI("p", always=503), cache=cache, max_attempts=1
+    )
+    backup = Summarizer(api_key="dummy", model="gpt-backup", client=ScriptedOpenAI("b"), cache=cache, max_attempts=1)
+    chain = FailoverSummarizer([("primary", primary), ("backup", backup)])
+
+    assert chain.summarize("本文") == "b:gpt-backup"
+
+    assert primary.cached_summary("本文") is None
+    assert backup.cached_summary("本文") == "b:gpt-backup"
+
+
+def test_raises_last_error_when_every_backend_fails() -> None:
+    chain = FailoverSummarizer(
+        [
+            ("primary", _summarizer(ScriptedOpenAI("primary", always=503))),
+            ("backup", _summarizer(ScriptedOpenAI("backup", always=429))),
+        ],
+        failure_threshold=1,
+    )
+
+    with pytest.raises(SummaryRateLimitError):
+        chain.summarize("本文")
+    with pytest.raises(SummaryConnectionError, match="circuits open"):
+        chain.summarize("本文")
+
+
+def test_exhausted_server_errors_raise_summary_server_error() -> None:
+    summarizer = Summarizer(
+        api_key="dummy", client=ScriptedOpenAI("primary", always=503), max_attempts=2, sleep=lambda _s: None
+    )
+
+    with pytest.raises(SummaryServerError):
+        summarizer.summarize("本文")
+
+
+def test_parse_fallback_backends() -> None:
+    backends = parse_fallback_backends(
+        '[{"model": "gpt-mini"}, {"name": "local", "base_url": "http://localhost:8000/v1", "api_key_env": "LOCAL_KEY"}]'
+    )
+    assert backends == [
+        BackendConfig(name="fallback-1", model="gpt-mini"),
+        BackendConfig(name="local", base_url="http://localhost:8000/v1", api_key_env="LOCAL_KEY"),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("raw", "message"),
+    [
+        ("{", "must be a JSON list"),
+        ('{"model": "m"}', "JSON list of backend objects"),
+        ('[{"name": "x"}]', "must be an object with"),
+        ('[{"model": "m", "api_key": "secret"}]', "unknown keys"),
+    ],
+)
+def test_parse_fallback_backends_rejects_invalid(raw: str, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        parse_fallback_backends(raw)
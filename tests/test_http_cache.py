@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from raindrop_digest.http_cache import HttpCache
+from raindrop_digest.text_extractor import HtmlFetcher
+
+
+def _fetcher(cache: HttpCache, handler) -> HtmlFetcher:
+    return HtmlFetcher(transport=httpx.MockTransport(handler), cache=cache)
+
+
+def test_revalidates_with_etag_and_serves_304_from_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("HTTP_USER_AGENT", raising=False)
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, request=request)
+        return httpx.Response(
+            200,
+            request=request,
+            text="<html>記事</html>",
+            headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+        )
+
+    cache = HttpCache(tmp_path)
+    with _fetcher(cache, handler) as fetcher:
+        assert fetcher.fetch("https://example.com/a?utm_source=x") == "<html>記事</html>"
+        # Same canonical URL: conditional request, answered from the cache.
+        assert fetcher.fetch("https://example.com/a") == "<html>記事</html>"
+
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert requests[1].headers["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    assert len(list(tmp_path.glob("*.json.gz"))) == 1
+
+
+def test_ttl_serves_without_request(tmp_path: Path) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, request=request, text="<html>v</html>")
+
+    with _fetcher(HttpCache(tmp_path, ttl_seconds=3600), handler) as fetcher:
+        fetcher.fetch("https://example.com/a")
+        fetcher.fetch("https://example.com/a")
+    assert len(calls) == 1
+
+
+def test_changed_page_replaces_cached_body(tmp_path: Path) -> None:
+    bodies = iter(["<html>old</html>", "<html>new</html>"])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, request=request, text=next(bodies), headers={"ETag": "x"})
+
+    cache = HttpCache(tmp_path)
+    with _fetcher(cache, handler) as fetcher:
+        fetcher.fetch("https://example.com/a")
+        assert fetcher.fetch("https://example.com/a") == "<html>new</html>"
+    entry = cache.get("https://example.com/a")
+    assert entry is not None and entry.text == "<html>new</html>"
+
+
+def test_evicts_least_recently_used_entries_over_size_limit(tmp_path: Path) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, request=request, text=os.urandom(4000).hex())
+
+    cache = HttpCache(tmp_path, max_bytes=12_000)
+    with _fetcher(cache, handler) as fetcher:
+        fetcher.fetch("https://example.com/1")
+        fetcher.fetch("https://example.com/2")
+        past = time.time() - 100
+        for path in tmp_path.glob("*.json.gz"):
+            os.utime(path, (past, past))
+        cache.get("https://example.com/1")  # now most recently used
+        fetcher.fetch("https://example.com/3")
+
+    assert cache.get("https://example.com/1") is not None
+    assert cache.get("https://example.com/2") is None
+    assert cache.get("https://example.com/3") is not None
+
+
+def test_stores_under_the_size_budget_do_not_rescan_the_directory(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, request=request, text=os.urandom(4000).hex())
+
+    cache = HttpCache(tmp_path, max_bytes=12_000)
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or entries())
+    with _fetcher(cache, handler) as fetcher:
+        fetcher.fetch("https://example.com/1")
+        fetcher.fetch("https://example.com/2")
+        fetcher.fetch("https://example.com/1")  # rewrite: the running total is adjusted, not grown
+        assert len(scans) == 1
+        fetcher.fetch("https://example.com/3")
+
+    assert len(scans) == 2  # the store over budget scans once to evict
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.json.gz")) <= 12_000
+
+
+def test_corrupt_entry_is_dropped(tmp_path: Path) -> None:
+    cache = HttpCache(tmp_path)
+    cache._path("https://example.com/a").write_bytes(b"not gzip")
+    assert cache.get("https://example.com/a") is None
+    assert list(tmp_path.glob("*.json.gz")) == []
+
+
+def test_dropping_a_corrupt_entry_shrinks_the_tracked_size(tmp_path: Path) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, request=request, text="<html>ok</html>")
+
+    cache = HttpCache(tmp_path)
+    with _fetcher(cache, handler) as fetcher:
+        fetcher.fetch("https://example.com/a")
+    corrupt = cache._path("https://example.com/b")
+    corrupt.write_bytes(b"not gzip" * 100)
+    cache._size = sum(p.stat().st_size for p in tmp_path.glob("*.json.gz"))
+
+    assert cache.get("https://example.com/b") is None
+    assert cache._size == cache._path("https://example.com/a").stat().st_size
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Any, List
+
+import pytest
+
+from raindrop_digest.model_router import ModelRouter, ModelTier, parse_model_routes
+from raindrop_digest.summarizer import Summarizer, SummaryError
+
+
+class ModelEchoOpenAI:
+    def __init__(self, fail_models: tuple[str, ...] = ()):
+        self.fail_models = fail_models
+        self.models: List[str] = []
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        self.models.append(model)
+        if model in self.fail_models:
+            raise RuntimeError("boom")
+        message = type("msg", (), {"content": f"{model}の要約"})
+        choice = type("choice", (), {"message": message})
+        usage = type("usage", (), {"prompt_tokens": 1000, "completion_tokens": 200})
+        return type("response", (), {"choices": [choice], "usage": usage})
+
+
+def _router(client: ModelEchoOpenAI, tiers: List[ModelTier]) -> ModelRouter:
+    return ModelRouter(
+        [(tier, Summarizer(api_key="dummy", model=tier.model, client=client, max_attempts=1)) for tier in tiers]
+    )
+
+
+def test_parse_model_routes() -> None:
+    tiers = parse_model_routes(
+        '[{"name": "fast", "model": "nano", "max_chars": 2000, "input_cost_per_mtok": 0.1},'
+        ' {"model": "strong"}]'
+    )
+    assert tiers[0] == ModelTier(name="fast", model="nano", max_chars=2000, input_cost_per_mtok=0.1)
+    assert tiers[1].name == "strong"
+
+
+@pytest.mark.parametrize(
+    ("raw", "message"),
+    [
+        ("{", "must be a JSON list"),
+        ("[]", "non-empty JSON list"),
+        ('[{"name": "x"}]', "must be an object with a 'model'"),
+        ('[{"model": "m", "max_char": 1}]', "unknown keys"),
+    ],
+)
+def test_parse_model_routes_rejects_invalid(raw: str, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        parse_model_routes(raw)
+
+
+def test_routes_by_length_source_and_tokens() -> None:
+    client = ModelEchoOpenAI()
+    router = _router(
+        client,
+        [
+            ModelTier(name="video", model="video-model", sources=["youtube"]),
+            ModelTier(name="fast", model="nano", max_chars=100, max_tokens=50),
+            ModelTier(name="strong", model="large"),
+        ],
+    )
+
+    assert router.summarize("短い", source="web") == "nanoの要約"
+    assert router.summarize("あ" * 80, source="web") == "largeの要約"  # 80 tokens > 50
+    assert router.summarize("x" * 500, source="web") == "largeの要約"
+    assert router.summarize("短い", source="youtube") == "video-modelの要約"
+    assert client.models == ["nano", "large", "large", "video-model"]
+
+
+def test_unmatched_text_falls_back_to_last_tier() -> None:
+    router = _router(
+        ModelEchoOpenAI(),
+        [ModelTier(name="a", model="m1", max_chars=1), ModelTier(name="b", model="m2", max_chars=1)],
+    )
+    tier, _summarizer = router.route("長い本文")
+    assert tier.name == "b"
+
+
+def test_records_latency_tokens_and_cost_per_tier() -> None:
+    client = ModelEchoOpenAI(fail_models=("large",))
+    router = _router(
+        client,
+        [
+            ModelTier(name="fast", model="nano", max_chars=10, input_cost_per_mtok=1.0, output_cost_per_mtok=4.0),
+            ModelTier(name="strong", model="large"),
+        ],
+    )
+    router.summarize("短い")
+    router.summarize("短い2")
+    with pytest.raises(SummaryError):
+        router.summarize("x" * 100)
+
+    fast, strong = router.stats
+    assert (fast.items, fast.failures) == (2, 0)
+    assert fast.usage.prompt_tokens == 2000 and fast.usage.completion_tokens == 400
+    assert fast.cost_usd == pytest.approx((2000 * 1.0 + 400 * 4.0) / 1_000_000)
+    assert (strong.items, strong.failures) == (0, 1)
+    assert strong.average_latency >= 0.0
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, List
+
+from raindrop_digest.models import RaindropItem, SummaryResult
+from raindrop_digest.near_duplicates import (
+    MinHasher,
+    NearDuplicateDetector,
+    NearDuplicateStore,
+    shingles,
+    similarity,
+)
+from raindrop_digest.orchestrator import _process_targets
+from raindrop_digest.summarizer import Summarizer
+
+ARTICLE = (
+    "新しいバージョンのデータベースでは、クエリプランナーが大幅に改善されました。"
+    "特に結合順序の選択が賢くなり、複雑な分析クエリの実行時間が平均で三割短縮されています。"
+    "また、レプリケーションの遅延を監視する仕組みが追加され、運用チームは障害の兆候を早期に把握できるようになりました。"
+    "アップグレード手順は従来と同じで、設定ファイルの互換性も保たれています。"
+    "ベンチマークの詳細な結果と移行時の注意点は公式ブログにまとめられています。"
+)
+OTHER = (
+    "今週末は各地で紅葉が見頃を迎え、山間部の観光地には多くの人が訪れる見込みです。"
+    "気象台によると、朝晩の冷え込みが強まるため、出かける際は防寒対策が必要とのことです。"
+    "道路の混雑も予想されるので、公共交通機関の利用が呼びかけられています。"
+    "地元の商店街では秋の味覚を楽しめる催しも開かれ、家族連れでにぎわいそうです。"
+)
+
+
+def _item(item_id: int) -> RaindropItem:
+    return RaindropItem(
+        id=item_id,
+        link=f"https://example.com/{item_id}",
+        title=f"記事{item_id}",
+        created=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        tags=[],
+    )
+
+
+def test_shingles_ignore_whitespace_and_width() -> None:
+    assert shingles("ＡＢＣ デ\nータ", size=3) == shingles("abcデータ", size=3)
+
+
+def test_signature_similarity_tracks_text_overlap() -> None:
+    hasher = MinHasher()
+    base = hasher.signature(ARTICLE)
+    mirrored = hasher.signature("【転載】" + ARTICLE.replace("。", "。\n") + "この記事は提携メディアからの転載です。")
+
+    assert similarity(base, mirrored) >= 0.8
+    assert similarity(base, hasher.signature(OTHER)) < 0.2
+
+
+def test_detector_groups_items_within_a_run() -> None:
+    detector = NearDuplicateDetector()
+
+    assert detector.check(_item(1), ARTICLE) is None
+    assert detector.check(_item(2), OTHER) is None
+    match = detector.check(_item(3), ARTICLE + "（AMP版）")
+
+    assert match is not None and match.original.id == 1
+    assert not match.previous_run
+    assert detector.check(_item(4), "短い") is None  # too short to compare
+    assert detector.in_run_duplicates == 1
+
+
+def test_detector_reuses_summaries_of_earlier_runs(tmp_path: Path) -> None:
+    store_path = tmp_path / "near_duplicates.sqlite3"
+    first = NearDuplicateDetector(store=NearDuplicateStore(store_path))
+    first.check(_item(1), ARTICLE)
+    first.record([SummaryResult(item=_item(1), status="success", summary="以前の要約")])
+
+    second = NearDuplicateDetector(store=NearDuplicateStore(store_path))
+    match = second.check(_item(9), ARTICLE)
+    assert match is not None and match.previous_run
+    assert (match.original.title, match.summary) == ("記事1", "以前の要約")
+    # The same bookmark coming back is summarized normally.
+    assert second.check(_item(1), ARTICLE) is None
+
+
+class CountingOpenAI:
+    def __init__(self) -> None:
+        self.texts: List[str] = []
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        self.texts.append(messages[-1]["content"])
+        message = type("msg", (), {"content": f"要約{len(self.texts)}"})
+        choice = type("choice", (), {"message": message})
+        return type("response", (), {"choices": [choice], "usage": None})
+
+
+def test_process_targets_summarizes_one_item_per_group() -> None:
+    bodies = {1: ARTICLE, 2: OTHER, 3: ARTICLE}
+
+    def fetch(url: str) -> str:
+        body = bodies[int(url.rsplit("/", 1)[-1])]
+        return f"<html><body><article><p>{body}</p></article></body></html>"
+
+    client = CountingOpenAI()
+    results = _process_targets(
+        [_item(1), _item(2), _item(3)],
+        Summarizer(api_key="dummy", client=client),
+        fetcher=fetch,
+        near_duplicates=NearDuplicateDetector(),
+    )
+
+    assert len(client.texts) == 2
+    assert all(r.is_success() for r in results)
+    assert results[2].duplicate_of is not None and results[2].duplicate_of.id == 1
+    assert results[2].summary == results[0].summary
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List
+
+import pytest
+
+from raindrop_digest.models import RaindropItem, TokenUsage
+from raindrop_digest.orchestrator import _process_targets
+from raindrop_digest.summarizer import SummaryError, SummaryRateLimitError
+from raindrop_digest.text_extractor import ExtractionError, ParsePool
+
+
+def _items(count: int) -> List[RaindropItem]:
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        RaindropItem(id=i, link=f"https://example.com/{i}", title=f"t{i}", created=now, tags=[])
+        for i in range(count)
+    ]
+
+
+class FakeSummarizer:
+    def __init__(self, delay: float = 0.0, fail: dict[str, Exception] | None = None):
+        self._delay = delay
+        self._fail = fail or {}
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def summarize(self, text: str) -> str:
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self._delay)
+            if text in self._fail:
+                raise self._fail[text]
+            return f"summary of {text}"
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def summarize_with_usage(self, text: str) -> tuple[str, TokenUsage]:
+        return self.summarize(text), TokenUsage(prompt_tokens=10, completion_tokens=5, calls=1)
+
+
+def _fetcher(delays: dict[str, float] | None = None, fail: set[str] | None = None):
+    def fetch(url: str) -> str:
+        time.sleep((delays or {}).get(url, 0.0))
+        if url in (fail or set()):
+            raise ExtractionError(f"cannot fetch {url}")
+        return f"<html><body><article><p>{url.rsplit('/', 1)[-1]}</p></article></body></html>"
+
+    return fetch
+
+
+def test_process_targets_uses_the_page_title_for_untitled_items() -> None:
+    items = _items(3)
+    items[1].title = ""
+    items[2].title = items[2].link
+
+    def fetch(url: str) -> str:
+        name = url.rsplit("/", 1)[-1]
+        return f"<html><head><title>Page {name}</title></head><body><article><p>{name}</p></article></body></html>"
+
+    results = _process_targets(items, FakeSummarizer(), fetcher=fetch)  # type: ignore[arg-type]
+
+    assert [r.item.title for r in results] == ["t0", "Page 1", "Page 2"]
+
+
+@pytest.mark.parametrize(("fetch_concurrency", "summary_concurrency"), [(1, 1), (4, 2)])
+def test_process_targets_keeps_input_order(fetch_concurrency: int, summary_concurrency: int) -> None:
+    items = _items(6)
+    # Earlier items finish last so completion order differs from input order.
+    delays = {item.link: 0.01 * (6 - item.id) for item in items}
+    results = _process_targets(
+        items,
+        FakeSummarizer(),  # type: ignore[arg-type]
+        fetch_concurrency=fetch_concurrency,
+        summary_concurrency=summary_concurrency,
+        fetcher=_fetcher(delays),
+    )
+    assert [r.item.id for r in results] == [item.id for item in items]
+    assert all(r.is_success() for r in results)
+    assert results[3].summary == "summary of 3"
+
+
+def test_process_targets_classifies_failures_concurrently() -> None:
+    items = _items(4)
+    summarizer = FakeSummarizer(
+        fail={"1": SummaryRateLimitError("OpenAI rate limit: slow down"), "2": SummaryError("bad")}
+    )
+    results = _process_targets(
+        items,
+        summarizer,  # type: ignore[arg-type]
+        fetch_concurrency=3,
+        summary_concurrency=3,
+        fetcher=_fetcher(fail={items[3].link}),
+    )
+    assert [r.status for r in results] == ["success", "failed", "failed", "failed"]
+    assert results[1].error == "OpenAI rate limit: slow down"
+    assert results[1].source_length == 1
+    assert results[2].error == "bad"
+    assert results[3].error == f"cannot fetch {items[3].link}"
+    assert results[3].source_length is None
+
+
+def test_process_targets_bounds_summary_concurrency() -> None:
+    summarizer = FakeSummarizer(delay=0.02)
+    _process_targets(
+        _items(8),
+        summarizer,  # type: ignore[arg-type]
+        fetch_concurrency=8,
+        summary_concurrency=2,
+        fetcher=_fetcher(),
+    )
+    assert summarizer.max_active == 2
+
+
+def test_process_targets_single_worker_per_stage_by_default() -> None:
+    summarizer = FakeSummarizer(delay=0.005)
+    _process_targets(_items(4), summarizer, fetcher=_fetcher())  # type: ignore[arg-type]
+    assert summarizer.max_active == 1
+
+
+def test_process_targets_reports_unsupported_source_without_fetching() -> None:
+    fetched: list[str] = []
+    item = _items(1)[0]
+    item.link = "https://x.com/user/status/1"
+    results = _process_targets(
+        [item],
+        FakeSummarizer(),  # type: ignore[arg-type]
+        fetcher=lambda url: fetched.append(url) or "",
+    )
+    assert fetched == []
+    assert results[0].status == "failed"
+    assert results[0].error is not None and results[0].error.startswith("Xリンクは非対応です")
+
+
+def test_process_targets_parses_in_process_pool() -> None:
+    pool = ParsePool(workers=2)
+    try:
+        pool.warm_up()
+        results = _process_targets(
+            _items(3),
+            FakeSummarizer(),  # type: ignore[arg-type]
+            fetcher=_fetcher(),
+            parse_pool=pool,
+        )
+    finally:
+        pool.close()
+    assert [r.summary for r in results] == ["summary of 0", "summary of 1", "summary of 2"]
+
+
+class FakeBatchSummarizer:
+    def __init__(self):
+        self.requests: list = []
+
+    def summarize_many(self, requests, fallback):
+        self.requests = list(requests)
+        outcomes = {}
+        for item_id, text in requests:
+            if text == "2":
+                outcomes[item_id] = SummaryError("batch failed")
+            elif text == "3":  # left unanswered by the batch
+                outcomes[item_id] = fallback(item_id, text)
+            else:
+                outcomes[item_id] = (f"batch summary of {text}", TokenUsage(calls=1))
+        return outcomes
+
+
+def test_process_targets_with_batch_summarizer_skips_summary_stage() -> None:
+    items = _items(4)
+    batch = FakeBatchSummarizer()
+    results = _process_targets(
+        items,
+        FakeSummarizer(fail={"0": SummaryError("must not be called")}),  # type: ignore[arg-type]
+        fetcher=_fetcher(fail={items[1].link}),
+        batch_summarizer=batch,  # type: ignore[arg-type]
+    )
+    assert [item_id for item_id, _ in batch.requests] == [0, 2, 3]
+    assert [r.status for r in results] == ["success", "failed", "failed", "success"]
+    assert results[0].summary == "batch summary of 0"
+    assert results[0].token_usage == TokenUsage(calls=1)
+    assert results[3].summary == "summary of 3"
+    assert results[3].token_usage == TokenUsage(prompt_tokens=10, completion_tokens=5, calls=1)
+    assert results[2].error == "batch failed"
+
+
+def test_process_targets_starts_before_the_input_stream_ends(caplog: pytest.LogCaptureFixture) -> None:
+    items = _items(3)
+    summarized_before_last_page = threading.Event()
+    summarizer = FakeSummarizer()
+
+    def paged_items():
+        yield items[0]
+        # The first item gets summarized while "later pages" are still loading.
+        deadline = time.monotonic() + 2
+        while summarizer.max_active == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if summarizer.max_active:
+            summarized_before_last_page.set()
+        yield from items[1:]
+
+    with caplog.at_level("INFO", logger="raindrop_digest.orchestrator"):
+        results = _process_targets(paged_items(), summarizer, fetcher=_fetcher())  # type: ignore[arg-type]
+
+    assert [r.item.id for r in results] == [0, 1, 2]
+    assert summarized_before_last_page.is_set()
+    assert "Time to first summary" in caplog.text
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, List, Optional
+
+import pytest
+
+from raindrop_digest.failover import FailoverSummarizer
+from raindrop_digest.models import RaindropItem
+from raindrop_digest.orchestrator import _process_targets
+from raindrop_digest.packed_summarizer import PackedSummarizer
+from raindrop_digest.summarizer import Summarizer, SummaryError
+from raindrop_digest.summary_cache import SummaryCache
+
+
+class PackingOpenAI:
+    """Answers packed JSON requests, optionally skipping some article ids."""
+
+    def __init__(self, skip_ids: Optional[List[str]] = None, raw_packed_content: Optional[str] = None):
+        self.skip_ids = set(skip_ids or [])
+        self.raw_packed_content = raw_packed_content
+        self.requests: List[dict] = []
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        self.requests.append({"messages": messages, **kwargs})
+        user = messages[-1]["content"]
+        if kwargs.get("response_format"):
+            articles = json.loads(user)["articles"]
+            content = self.raw_packed_content or json.dumps(
+                {
+                    "summaries": [
+                        {"id": a["id"], "summary": f"まとめ:{a['text']}"}
+                        for a in articles
+                        if a["id"] not in self.skip_ids
+                    ]
+                },
+                ensure_ascii=False,
+            )
+            usage = type("usage", (), {"prompt_tokens": 300, "completion_tokens": 90})
+        else:
+            content = f"単独:{user}"
+            usage = type("usage", (), {"prompt_tokens": 100, "completion_tokens": 30})
+        message = type("msg", (), {"content": content})
+        choice = type("choice", (), {"message": message})
+        return type("response", (), {"choices": [choice], "usage": usage})
+
+
+def test_packs_texts_into_one_json_request() -> None:
+    client = PackingOpenAI()
+    packer = PackedSummarizer(Summarizer(api_key="dummy", client=client), max_items=5)
+
+    outcomes = packer.summarize_many(["A", "B", "C"])
+
+    assert [summary for summary, _usage in outcomes] == ["まとめ:A", "まとめ:B", "まとめ:C"]  # type: ignore[misc]
+    assert len(client.requests) == 1
+    assert client.requests[0]["response_format"] == {"type": "json_object"}
+    assert "複数記事の同時要約" in client.requests[0]["messages"][0]["content"]
+    usages = [usage for _summary, usage in outcomes]  # type: ignore[misc]
+    assert sum(u.prompt_tokens for u in usages) == 300
+    assert sum(u.completion_tokens for u in usages) == 90
+    assert sum(u.calls for u in usages) == 1
+
+
+def test_unanswered_items_are_retried_individually() -> None:
+    client = PackingOpenAI(skip_ids=["2"])
+    packer = PackedSummarizer(Summarizer(api_key="dummy", client=client))
+
+    outcomes = packer.summarize_many(["A", "B", "C"])
+
+    assert [summary for summary, _usage in outcomes] == ["まとめ:A", "単独:B", "まとめ:C"]  # type: ignore[misc]
+    assert len(client.requests) == 2
+    assert packer.unanswered_items == 1
+
+
+def test_log_stats_compares_packed_requests_with_one_per_item(caplog: pytest.LogCaptureFixture) -> None:
+    packer = PackedSummarizer(Summarizer(api_key="dummy", client=PackingOpenAI()))
+    packer.summarize_many(["A", "B", "C"])
+
+    with caplog.at_level(logging.INFO):
+        packer.log_stats()
+
+    assert (packer.packed_requests, packer.packed_items, packer.packed_usage.prompt_tokens) == (1, 3, 300)
+    assert packer.single_prompt_tokens_estimate > 0
+    assert "requests=1 items=3 unanswered=0 requests_saved=2 prompt=300" in caplog.text
+
+
+class DownOpenAI:
+    """Every call fails with a 503."""
+
+    def __init__(self) -> None:
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        error = Exception("service unavailable")
+        error.status_code = 503  # type: ignore[attr-defined]
+        raise error
+
+
+def test_pack_answered_by_a_fallback_is_cached_under_the_fallback_model(tmp_path: Path) -> None:
+    cache = SummaryCache(tmp_path / "summaries.sqlite3")
+    primary = Summarizer(api_key="dummy", model="gpt-primary", client=DownOpenAI(), cache=cache, max_attempts=1)
+    backup = Summarizer(api_key="dummy", model="gpt-backup", client=PackingOpenAI(), cache=cache, max_attempts=1)
+    chain = FailoverSummarizer([("primary", primary), ("backup", backup)], failure_threshold=1)
+
+    outcomes = PackedSummarizer(chain).summarize_many(["A", "B"])
+
+    assert [summary for summary, _usage in outcomes] == ["まとめ:A", "まとめ:B"]  # type: ignore[misc]
+    assert primary.cached_summary("A") is None
+    assert backup.cached_summary("A") == "まとめ:A"
+
+
+def test_invalid_json_falls_back_to_single_requests() -> None:
+    client = PackingOpenAI(raw_packed_content="not json")
+    packer = PackedSummarizer(Summarizer(api_key="dummy", client=client), max_items=2)
+
+    outcomes = packer.summarize_many(["A", "B", "C"])
+
+    # One pack of two (unparseable) plus a lone remainder, then two retries.
+    assert [summary for summary, _usage in outcomes] == ["単独:A", "単独:B", "単独:C"]  # type: ignore[misc]
+    assert len(client.requests) == 4
+
+
+def test_packed_summaries_are_cached_per_article(tmp_path: Path) -> None:
+    client = PackingOpenAI()
+    cache = SummaryCache(tmp_path / "s.sqlite3")
+    summarizer = Summarizer(api_key="dummy", client=client, cache=cache)
+    PackedSummarizer(summarizer).summarize_many(["A", "B"])
+
+    assert summarizer.summarize("B") == "まとめ:B"
+    assert len(client.requests) == 1
+
+
+def test_single_failures_are_returned_per_item() -> None:
+    class FailingOpenAI(PackingOpenAI):
+        def create(self, model: str, messages: List[Any], **kwargs: Any):
+            raise RuntimeError("boom")
+
+    packer = PackedSummarizer(Summarizer(api_key="dummy", client=FailingOpenAI(), max_attempts=1))
+
+    outcomes = packer.summarize_many(["A", "B"])
+
+    assert all(isinstance(outcome, SummaryError) for outcome in outcomes)
+
+
+def test_process_targets_packs_short_items_only() -> None:
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    items = [
+        RaindropItem(id=i, link=f"https://example.com/{i}", title=str(i), created=now, tags=[])
+        for i in range(4)
+    ]
+    bodies = {0: "短い記事です。", 1: "長い記事です。" * 300, 2: "別の短い記事。", 3: "三つ目の短い記事。"}
+
+    def fetch(url: str) -> str:
+        body = bodies[int(url.rsplit("/", 1)[-1])]
+        return f"<html><body><article><p>{body}</p></article></body></html>"
+
+    client = PackingOpenAI()
+    summarizer = Summarizer(api_key="dummy", client=client)
+    results = _process_targets(
+        items, summarizer, fetcher=fetch, packer=PackedSummarizer(summarizer, max_items=5)
+    )
+
+    assert [r.item.id for r in results] == [0, 1, 2, 3]
+    assert all(r.is_success() for r in results)
+    assert results[1].summary.startswith("単独:")  # type: ignore[union-attr]
+    assert all(results[i].summary.startswith("まとめ:") for i in (0, 2, 3))  # type: ignore[union-attr]
+    packed_requests = [r for r in client.requests if r.get("response_format")]
+    assert len(packed_requests) == 1
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from raindrop_digest.pipeline import Finished, Stage, StagedPipeline
+
+
+def test_pipeline_returns_results_in_input_order() -> None:
+    def slow_for_small(value: int) -> int:
+        time.sleep(0.005 * (10 - value))
+        return value * 2
+
+    pipeline = StagedPipeline(
+        [Stage("double", slow_for_small, workers=4), Stage("inc", lambda v: v + 1, workers=2)]
+    )
+    assert pipeline.run(range(10)) == [v * 2 + 1 for v in range(10)]
+
+
+def test_finished_skips_remaining_stages() -> None:
+    seen: list[int] = []
+
+    def second(value: int) -> int:
+        seen.append(value)
+        return value
+
+    pipeline = StagedPipeline(
+        [
+            Stage("first", lambda v: Finished("skipped") if v % 2 else v),
+            Stage("second", second),
+        ]
+    )
+    assert pipeline.run([0, 1, 2]) == [0, "skipped", 2]
+    assert seen == [0, 2]
+
+
+def test_stage_queues_are_bounded() -> None:
+    release = threading.Event()
+
+    def blocked(value: int) -> int:
+        release.wait(timeout=2)
+        return value
+
+    pipeline = StagedPipeline([Stage("fast", lambda v: v, workers=1), Stage("blocked", blocked, queue_size=2)])
+    runner = threading.Thread(target=pipeline.run, args=(range(20),))
+    runner.start()
+    time.sleep(0.1)
+    depths = pipeline.queue_depths()
+    release.set()
+    runner.join(timeout=5)
+
+    assert depths["blocked"] <= 2
+    assert pipeline.stats[1].max_queue_depth <= 2
+    assert pipeline.stats[1].processed == 20
+
+
+def test_stats_report_utilization_of_bottleneck_stage() -> None:
+    pipeline = StagedPipeline(
+        [Stage("cheap", lambda v: v), Stage("expensive", lambda v: time.sleep(0.01) or v)]
+    )
+    pipeline.run(range(10))
+    cheap, expensive = pipeline.stats
+    assert expensive.utilization(pipeline.elapsed_seconds) > cheap.utilization(pipeline.elapsed_seconds)
+    assert expensive.processed == 10
+
+
+def test_handler_errors_are_raised_after_the_run() -> None:
+    def boom(value: int) -> int:
+        if value == 1:
+            raise RuntimeError("boom")
+        return value
+
+    pipeline = StagedPipeline([Stage("boom", boom, workers=2)])
+    with pytest.raises(RuntimeError, match="boom"):
+        pipeline.run(range(4))
+    assert pipeline.stats[0].processed == 4
+
+
+def test_batched_stage_receives_lists_and_keeps_order() -> None:
+    batch_sizes: list[int] = []
+
+    def handle(values: list) -> list:
+        batch_sizes.append(len(values))
+        return [Finished(-v) if v == 3 else v * 10 for v in values]
+
+    pipeline = StagedPipeline(
+        [
+            Stage("batch", handle, batch_size=4, batch_wait_seconds=0.2),
+            Stage("inc", lambda v: v + 1),
+        ]
+    )
+    assert pipeline.run(range(7)) == [1, 11, 21, -3, 41, 51, 61]
+    assert sum(batch_sizes) == 7
+    assert max(batch_sizes) <= 4
+    assert pipeline.stats[0].processed == 7
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, List
+
+import pytest
+
+from raindrop_digest.models import RaindropItem, SummaryResult, TokenPrices, TokenUsage
+from raindrop_digest.orchestrator import _run_usage
+from raindrop_digest.packed_summarizer import _split_usage
+from raindrop_digest.summarizer import Summarizer
+
+
+class CachingOpenAI:
+    """Reports every prompt token after the first call as cached."""
+
+    def __init__(self) -> None:
+        self.requests: List[dict] = []
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        self.requests.append(kwargs)
+        cached = 0 if len(self.requests) == 1 else 1024
+        details = type("details", (), {"cached_tokens": cached})
+        usage = type("usage", (), {"prompt_tokens": 1200, "completion_tokens": 100, "prompt_tokens_details": details})
+        message = type("msg", (), {"content": "要約"})
+        choice = type("choice", (), {"message": message})
+        return type("response", (), {"choices": [choice], "usage": usage})
+
+
+def test_requests_share_a_stable_prefix_and_cache_key() -> None:
+    summarizer = Summarizer(api_key="dummy", client=CachingOpenAI(), prompt_cache_key=True)
+
+    first = summarizer.build_request("記事A")
+    second = summarizer.build_request("記事B")
+    chunk = summarizer.build_request("記事A", "別のプロンプト")
+
+    assert first["messages"][0] == second["messages"][0]
+    assert first["prompt_cache_key"] == second["prompt_cache_key"]
+    assert first["prompt_cache_key"].startswith("raindrop-digest-")
+    assert chunk["prompt_cache_key"] != first["prompt_cache_key"]
+    assert "prompt_cache_key" not in Summarizer(api_key="dummy", client=CachingOpenAI()).build_request("記事A")
+
+
+def test_reads_cached_tokens_from_usage() -> None:
+    summarizer = Summarizer(api_key="dummy", client=CachingOpenAI())
+
+    _summary, first = summarizer.summarize_with_usage("記事A")
+    _summary, second = summarizer.summarize_with_usage("記事B")
+
+    assert (first.cached_tokens, second.cached_tokens) == (0, 1024)
+    total = TokenUsage()
+    total.add(first)
+    total.add(second)
+    assert total.cache_hit_ratio == pytest.approx(1024 / 2400)
+
+
+def test_cached_tokens_are_billed_at_the_cached_price() -> None:
+    usage = TokenUsage(prompt_tokens=2000, completion_tokens=500, calls=1, cached_tokens=1000)
+
+    assert TokenPrices(input_per_mtok=2.0, output_per_mtok=8.0, cached_input_per_mtok=0.5).cost_usd(
+        usage
+    ) == pytest.approx((1000 * 2.0 + 1000 * 0.5 + 500 * 8.0) / 1_000_000)
+    assert TokenPrices(input_per_mtok=2.0).cost_usd(usage) == pytest.approx(2000 * 2.0 / 1_000_000)
+
+
+def test_packed_usage_split_keeps_cached_total() -> None:
+    shares = _split_usage(TokenUsage(prompt_tokens=300, completion_tokens=90, calls=1, cached_tokens=101), [1, 1, 1], [1, 1, 1])
+
+    assert sum(s.cached_tokens for s in shares) == 101
+
+
+def test_run_usage_sums_item_usage() -> None:
+    item = RaindropItem(id=1, link="https://example.com", title="t", created=datetime.now(timezone.utc), tags=[])
+    results = [
+        SummaryResult(item=item, status="success", token_usage=TokenUsage(100, 10, 1, 50)),
+        SummaryResult(item=item, status="failed"),
+        SummaryResult(item=item, status="success", token_usage=TokenUsage(300, 30, 1, 150)),
+    ]
+
+    assert _run_usage(results) == TokenUsage(prompt_tokens=400, completion_tokens=40, calls=2, cached_tokens=200)
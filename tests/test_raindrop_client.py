@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import httpx
+
+from raindrop_digest.config import JST
+from raindrop_digest.raindrop_client import PagingReport, RaindropClient, unsorted_search_query
+
+NOW = datetime(2025, 1, 10, 9, 0, tzinfo=JST)
+
+
+def _raw(item_id: int, hours_ago: float) -> dict:
+    created = (NOW - timedelta(hours=hours_ago)).astimezone(timezone.utc)
+    return {
+        "_id": item_id,
+        "link": f"https://example.com/{item_id}",
+        "title": str(item_id),
+        "created": created.isoformat().replace("+00:00", "Z"),
+        "tags": [],
+    }
+
+
+def _client(pages: List[List[dict]], requests: List[httpx.Request]) -> RaindropClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        page = int(request.url.params["page"])
+        return httpx.Response(200, json={"items": pages[page] if page < len(pages) else []})
+
+    return RaindropClient(token="dummy", transport=httpx.MockTransport(handler))
+
+
+def test_stops_paging_once_a_page_reaches_the_threshold() -> None:
+    pages = [
+        [_raw(1, 1), _raw(2, 2)],
+        [_raw(3, 20), _raw(4, 30)],  # crosses the 24h threshold
+        [_raw(5, 40), _raw(6, 50)],
+    ]
+    requests: List[httpx.Request] = []
+
+    items = _client(pages, requests).fetch_unsorted_items(perpage=2, threshold=NOW - timedelta(days=1))
+
+    assert [item.id for item in items] == [1, 2, 3, 4]
+    assert len(requests) == 2
+
+
+def test_pages_until_a_short_page_without_threshold() -> None:
+    pages = [[_raw(1, 1), _raw(2, 30)], [_raw(3, 40)]]
+    requests: List[httpx.Request] = []
+
+    items = _client(pages, requests).fetch_unsorted_items(perpage=2)
+
+    assert [item.id for item in items] == [1, 2, 3]
+    assert len(requests) == 2
+
+
+def test_sends_the_search_parameter() -> None:
+    requests: List[httpx.Request] = []
+    search = unsorted_search_query(NOW - timedelta(days=1))
+
+    _client([[_raw(1, 1)]], requests).fetch_unsorted_items(search=search)
+
+    assert requests[0].url.params["search"] == search
+
+
+def test_unsorted_search_query_starts_a_day_early_and_excludes_tags() -> None:
+    query = unsorted_search_query(datetime(2025, 1, 9, 8, 0, tzinfo=JST), excluded_tags=["配信済み", "two words"])
+
+    # 2025-01-09 08:00 JST is 2025-01-08 23:00 UTC.
+    assert query == 'created:>2025-01-07 -#"two words" -#配信済み'
+
+
+def test_iter_prefetches_the_next_page_in_the_background() -> None:
+    pages = [[_raw(1, 1), _raw(2, 2)], [_raw(3, 3)]]
+    requests: List[httpx.Request] = []
+    items = _client(pages, requests).iter_unsorted_items(perpage=2)
+
+    assert next(items).id == 1
+    deadline = time.monotonic() + 2
+    while len(requests) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Page 1 was requested while page 0 was still being consumed.
+    assert len(requests) == 2
+    assert [item.id for item in items] == [2, 3]
+
+
+def _counted_client(
+    count: int, perpage: int, failures: Dict[int, int], requests: List[int]
+) -> RaindropClient:
+    """Serves ``count`` items; page N answers 503 for its first ``failures[N]`` requests."""
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        with lock:
+            requests.append(page)
+            if failures.get(page, 0) > 0:
+                failures[page] -= 1
+                return httpx.Response(503)
+        ids = range(page * perpage, min((page + 1) * perpage, count))
+        return httpx.Response(200, json={"items": [_raw(i, 1) for i in ids], "count": count})
+
+    return RaindropClient(token="dummy", transport=httpx.MockTransport(handler), sleep=lambda _s: None)
+
+
+def test_fetches_every_page_from_the_count_without_a_page_cap() -> None:
+    requests: List[int] = []
+    report = PagingReport()
+
+    items = _counted_client(1030, 50, {}, requests).fetch_unsorted_items(report=report)
+
+    assert [item.id for item in items] == list(range(1030))
+    assert sorted(requests) == list(range(21))
+    assert (report.total_count, report.pages_expected, report.pages_fetched) == (1030, 21, 21)
+    assert report.complete
+
+
+def test_retries_a_failing_page_and_reports_one_that_never_succeeds() -> None:
+    requests: List[int] = []
+    report = PagingReport()
+    # Each page attempt makes two requests (the request itself retries a 503 once).
+    client = _counted_client(200, 50, {1: 2, 2: 6}, requests)
+
+    items = client.fetch_unsorted_items(report=report)
+
+    assert [item.id for item in items] == list(range(50)) + list(range(50, 100)) + list(range(150, 200))
+    assert requests.count(1) == 3
+    assert requests.count(2) == 6
+    assert report.missing_pages == [2]
+    assert not report.complete
+
+
+def test_reports_pages_shorter_than_the_count() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        items = [_raw(1, 1), _raw(2, 1)] if page == 0 else [_raw(3, 1)]
+        return httpx.Response(200, json={"items": items, "count": 6})
+
+    report = PagingReport()
+    client = RaindropClient(token="dummy", transport=httpx.MockTransport(handler))
+
+    assert [item.id for item in client.fetch_unsorted_items(perpage=2, report=report)] == [1, 2, 3]
+    assert report.partial_pages == [1, 2]
+
+
+def test_stops_after_a_failed_page_when_the_total_is_unknown() -> None:
+    requests: List[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        requests.append(page)
+        if page > 0:
+            raise httpx.ConnectError("unreachable", request=request)
+        return httpx.Response(200, json={"items": [_raw(i, 1) for i in range(50)]})
+
+    report = PagingReport()
+    client = RaindropClient(token="dummy", transport=httpx.MockTransport(handler), sleep=lambda _s: None)
+
+    assert len(client.fetch_unsorted_items(report=report)) == 50
+    assert set(requests) == {0, 1}
+    assert report.missing_pages == [1]
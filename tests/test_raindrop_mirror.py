@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Sequence, Set
+
+import httpx
+
+from raindrop_digest.config import JST
+from raindrop_digest.raindrop_client import PagingReport, RaindropClient
+from raindrop_digest.raindrop_mirror import RaindropMirror
+
+NOW = datetime(2025, 1, 10, 9, 0, tzinfo=JST)
+THRESHOLD = NOW - timedelta(days=3)
+
+
+def _raw(item_id: int, hours_ago: float, tags: Sequence[str] = (), link: str = "") -> dict:
+    created = (NOW - timedelta(hours=hours_ago)).astimezone(timezone.utc)
+    return {
+        "_id": item_id,
+        "link": link or f"https://example.com/{item_id}",
+        "title": str(item_id),
+        "created": created.isoformat().replace("+00:00", "Z"),
+        "tags": list(tags),
+    }
+
+
+class Unsorted:
+    """
+    Serves ``items`` newest first, one page per request, and single items by id
+    (in the collection given by ``moved``, Unsorted otherwise).
+    """
+
+    def __init__(self, items: List[dict]):
+        self.items = items
+        self.pages: List[int] = []
+        self.failing: Set[int] = set()
+        self.moved: Dict[int, int] = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.startswith("/rest/v1/raindrop/"):
+            item_id = int(request.url.path.rsplit("/", 1)[-1])
+            raw = next((raw for raw in self.items if raw["_id"] == item_id), None)
+            if raw is None:
+                return httpx.Response(404, json={"result": False})
+            collection = {"$id": self.moved.get(item_id, -1)}
+            return httpx.Response(200, json={"result": True, "item": {**raw, "collection": collection}})
+        page = int(request.url.params["page"])
+        perpage = int(request.url.params["perpage"])
+        self.pages.append(page)
+        if page in self.failing:
+            return httpx.Response(503)
+        ordered = sorted(self.items, key=lambda raw: raw["created"], reverse=True)
+        return httpx.Response(
+            200, json={"items": ordered[page * perpage : (page + 1) * perpage], "count": len(ordered)}
+        )
+
+    def client(self) -> RaindropClient:
+        return RaindropClient(token="dummy", transport=httpx.MockTransport(self), sleep=lambda _s: None)
+
+
+def test_targets_are_filtered_by_created_time_and_tags(tmp_path: Path) -> None:
+    unsorted = Unsorted([_raw(1, 1), _raw(2, 2, ["確認済み"]), _raw(3, 5, ["別タグ"]), _raw(4, 100)])
+    mirror = RaindropMirror(tmp_path / "mirror.sqlite3")
+
+    assert mirror.sync(unsorted.client(), THRESHOLD) == 4
+
+    assert [item.id for item in mirror.targets(THRESHOLD)] == [1, 3]
+    assert mirror.targets(THRESHOLD)[1].tags == ["別タグ"]
+
+
+def test_next_sync_lists_only_items_after_the_cursor(tmp_path: Path) -> None:
+    path = tmp_path / "mirror.sqlite3"
+    older = [_raw(i, 10 + i) for i in range(1, 61)]
+    unsorted = Unsorted(older)
+    RaindropMirror(path).sync(unsorted.client(), THRESHOLD)
+    assert unsorted.pages == [0, 1]
+
+    unsorted.items = [_raw(100, 0.5)] + older
+    unsorted.pages = []
+    mirror = RaindropMirror(path)
+    mirror.sync(unsorted.client(), THRESHOLD)
+
+    assert unsorted.pages == [0]  # page 0 already reaches the cursor
+    assert len(mirror) == 61
+    assert mirror.targets(THRESHOLD)[0].id == 100
+
+
+def test_write_back_is_mirrored_and_recent_sync_is_reused(tmp_path: Path) -> None:
+    unsorted = Unsorted([_raw(1, 1), _raw(2, 2)])
+    mirror = RaindropMirror(tmp_path / "mirror.sqlite3")
+    mirror.sync(unsorted.client(), THRESHOLD)
+
+    first = mirror.targets(THRESHOLD)[0]
+    mirror.record_write_back(first, "▼サマリー\n要約", ["配信済み"])
+    mirror.remove([2])
+
+    assert mirror.sync(unsorted.client(), THRESHOLD, max_age_seconds=60) == 0
+    assert mirror.targets(THRESHOLD) == []
+    assert len(unsorted.pages) == 1
+
+
+def test_incomplete_listing_keeps_the_cursor(tmp_path: Path) -> None:
+    unsorted = Unsorted([_raw(i, i) for i in range(1, 61)])
+    unsorted.failing = {1}
+    mirror = RaindropMirror(tmp_path / "mirror.sqlite3")
+    report = PagingReport()
+
+    assert mirror.sync(unsorted.client(), THRESHOLD, report=report, max_age_seconds=3600) == 50
+    assert report.missing_pages == [1]
+    assert mirror.cursor is None and mirror.synced_at is None
+
+    unsorted.failing = set()
+    unsorted.pages = []
+    mirror.sync(unsorted.client(), THRESHOLD, max_age_seconds=3600)
+
+    assert unsorted.pages == [0, 1]  # the missed page is listed again
+    assert len(mirror.targets(THRESHOLD)) == 60
+
+
+def test_sync_drops_items_no_longer_listed(tmp_path: Path) -> None:
+    unsorted = Unsorted([_raw(1, 1), _raw(2, 2)])
+    mirror = RaindropMirror(tmp_path / "mirror.sqlite3")
+    mirror.sync(unsorted.client(), THRESHOLD)
+
+    unsorted.items = [_raw(1, 1)]  # 2 was deleted in Raindrop
+    mirror.sync(unsorted.client(), THRESHOLD)
+
+    assert [item.id for item in mirror.targets(THRESHOLD)] == [1]
+
+
+def test_refresh_drops_targets_changed_in_raindrop(tmp_path: Path) -> None:
+    unsorted = Unsorted([_raw(i, 10 * i) for i in range(1, 5)])
+    mirror = RaindropMirror(tmp_path / "mirror.sqlite3")
+    mirror.sync(unsorted.client(), THRESHOLD)
+    # All older than the cursor window, so a sync would not see these changes.
+    unsorted.items = [_raw(1, 10), _raw(2, 20, ["配信済み"]), _raw(3, 30)]
+    unsorted.moved = {3: 12345}
+
+    assert mirror.refresh(unsorted.client(), THRESHOLD) == 3
+
+    assert [item.id for item in mirror.targets(THRESHOLD)] == [1]
+
+
+def test_target_groups_pick_one_item_per_canonical_url(tmp_path: Path) -> None:
+    unsorted = Unsorted(
+        [
+            _raw(1, 1, link="https://example.com/a?utm_source=x"),
+            _raw(2, 2),
+            _raw(3, 3, link="https://example.com/a"),
+        ]
+    )
+    mirror = RaindropMirror(tmp_path / "mirror.sqlite3")
+    mirror.sync(unsorted.client(), THRESHOLD)
+
+    groups = mirror.target_groups(THRESHOLD)
+
+    assert [[item.id for item in group] for group in groups.values()] == [[1, 3], [2]]
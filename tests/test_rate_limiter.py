@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from typing import Any, List
+
+import httpx
+import pytest
+from openai import RateLimitError
+
+from raindrop_digest.raindrop_client import RaindropClient, RaindropRateLimitError
+from raindrop_digest.rate_limiter import (
+    OpenAIRateLimiter,
+    RaindropRateLimiter,
+    TokenBucket,
+    backoff_delay,
+    parse_reset_duration,
+    retry_after_seconds,
+)
+from raindrop_digest.summarizer import Summarizer, SummaryRateLimitError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("20ms", 0.02), ("1s", 1.0), ("6m0s", 360.0), ("1h2m3.5s", 3723.5), ("2", 2.0), ("soon", None), (None, None)],
+)
+def test_parse_reset_duration(value: str | None, expected: float | None) -> None:
+    assert parse_reset_duration(value) == expected
+
+
+def test_retry_after_prefers_milliseconds_header() -> None:
+    assert retry_after_seconds({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert retry_after_seconds({"retry-after": "9"}) == 9.0
+    assert retry_after_seconds({}) is None
+
+
+def test_backoff_delay_is_jittered_and_respects_retry_after() -> None:
+    assert backoff_delay(3, base=1.0, rng=lambda: 0.5) == 4.0
+    assert backoff_delay(10, base=1.0, cap=5.0, rng=lambda: 1.0) == 5.0
+    assert backoff_delay(0, base=1.0, retry_after=7.0, rng=lambda: 0.1) == 7.0
+
+
+def test_token_bucket_queues_reservations() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(2, 1.0, clock=clock)
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+    clock.now = 10
+    assert bucket.reserve(1) == 0
+
+
+def test_limiter_paces_to_tokens_per_minute() -> None:
+    clock = FakeClock()
+    limiter = OpenAIRateLimiter(tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        limiter.acquire(300)
+    # 1200 tokens against 600/min: the last two requests wait 30s each.
+    assert clock.now == pytest.approx(60.0)
+    assert limiter.throttled_requests == 2
+
+
+def test_limiter_learns_limits_and_pauses_from_headers() -> None:
+    clock = FakeClock()
+    limiter = OpenAIRateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.update_from_headers(
+        {
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+        }
+    )
+    assert limiter.acquire(10) == pytest.approx(2.0)
+
+
+class RateLimitedOpenAI:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        self.calls += 1
+        if self.calls <= self.failures:
+            request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+            response = httpx.Response(429, request=request, headers={"retry-after": "3"})
+            raise RateLimitError("slow down", response=response, body=None)
+        message = type("msg", (), {"content": "要約"})
+        return type("response", (), {"choices": [type("choice", (), {"message": message})]})
+
+
+def test_summarizer_retries_rate_limit_after_retry_after() -> None:
+    clock = FakeClock()
+    limiter = OpenAIRateLimiter(clock=clock, sleep=clock.sleep)
+    client = RateLimitedOpenAI(failures=2)
+    summarizer = Summarizer(api_key="dummy", client=client, rate_limiter=limiter, sleep=clock.sleep)
+
+    assert summarizer.summarize("本文") == "要約"
+    assert client.calls == 3
+    # Two Retry-After waits of 3s each; the shared pause makes the limiter wait too.
+    assert clock.now >= 6.0
+
+
+def test_summarizer_gives_up_after_max_attempts() -> None:
+    clock = FakeClock()
+    client = RateLimitedOpenAI(failures=10)
+    summarizer = Summarizer(api_key="dummy", client=client, max_attempts=3, sleep=clock.sleep)
+    with pytest.raises(SummaryRateLimitError):
+        summarizer.summarize("本文")
+    assert client.calls == 3
+
+
+def test_raindrop_limiter_slows_down_as_remaining_runs_out() -> None:
+    clock = FakeClock()
+    limiter = RaindropRateLimiter(120, clock=clock, wall_clock=lambda: 1_700_000_000.0, sleep=clock.sleep)
+
+    limiter.update_from_headers({"x-ratelimit-limit": "120", "x-ratelimit-remaining": "1"})
+    assert limiter.acquire() == 0.0
+    assert limiter.acquire() == pytest.approx(0.5)  # refills at 2 requests per second
+
+    limiter.update_from_headers({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "1700000030"})
+    assert limiter.acquire() == pytest.approx(30.0)
+    assert limiter.throttled_requests == 2
+
+
+def _raindrop(responses: List[httpx.Response], clock: FakeClock) -> RaindropClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    limiter = RaindropRateLimiter(clock=clock, wall_clock=lambda: 1_700_000_000.0, sleep=clock.sleep)
+    return RaindropClient(token="dummy", transport=httpx.MockTransport(handler), rate_limiter=limiter)
+
+
+def test_raindrop_client_waits_for_the_advertised_reset_after_429() -> None:
+    clock = FakeClock()
+    ok = httpx.Response(200, json={"items": [], "count": 0})
+    client = _raindrop([httpx.Response(429, headers={"X-RateLimit-Reset": "1700000042"}), ok], clock)
+
+    assert client.fetch_unsorted_items() == []
+    assert clock.now == pytest.approx(42.0)
+    assert (client.rate_limiter.rate_limited_responses, client.rate_limiter.waited_seconds) == (1, pytest.approx(42.0))
+
+
+def test_raindrop_client_gives_up_when_429_persists() -> None:
+    clock = FakeClock()
+    client = _raindrop([httpx.Response(429, headers={"Retry-After": "5"}) for _ in range(4)], clock)
+
+    with pytest.raises(RaindropRateLimitError):
+        client.delete_item(1)
+    assert clock.now == pytest.approx(15.0)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+import httpx
+import pytest
+
+from raindrop_digest import config
+from raindrop_digest.models import ExtractedContent, RaindropItem, SummaryResult, TokenUsage
+from raindrop_digest.orchestrator import (
+    PendingWriteBackError,
+    _finish_pending_write_back,
+    _journal_path,
+    _process_targets,
+    _write_back,
+)
+from raindrop_digest.raindrop_client import RaindropClient
+from raindrop_digest.run_journal import RunJournal, load_state
+from raindrop_digest.summarizer import SummaryConnectionError
+from raindrop_digest.writeback import RaindropWriteBack
+
+NOW = datetime(2025, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def _items(count: int) -> List[RaindropItem]:
+    return [
+        RaindropItem(id=i, link=f"https://example.com/{i}", title=f"t{i}", created=NOW, tags=[])
+        for i in range(count)
+    ]
+
+
+def _start(path: Path) -> RunJournal:
+    return RunJournal.start(path, now=NOW, threshold=NOW - timedelta(days=3))
+
+
+class FlakySummarizer:
+    def __init__(self, failing: set[str] = frozenset()):
+        self.failing = failing
+        self.texts: List[str] = []
+
+    def summarize_with_usage(self, text: str) -> tuple[str, TokenUsage]:
+        self.texts.append(text)
+        if text in self.failing:
+            raise SummaryConnectionError("timeout")
+        return f"summary of {text}", TokenUsage(prompt_tokens=10, completion_tokens=5, calls=1)
+
+
+def test_state_survives_reload_and_ignores_a_torn_last_line(tmp_path: Path) -> None:
+    path = tmp_path / "run_journal.jsonl"
+    journal = _start(path)
+    item = _items(1)[0]
+    journal.extracted(item, ExtractedContent(text="本文", source="web", length=2))
+    journal.summarized(SummaryResult(item=item, status="success", summary="要約"))
+    journal.close()
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('{"run": "')  # crashed mid-write
+
+    state = load_state(path)
+
+    assert state is not None and state.now == NOW
+    assert state.extracted[0].text == "本文"
+    assert state.summarized[0].summary == "要約"
+    assert RunJournal.resume(path) is not None
+
+
+def test_resumed_run_skips_journaled_fetches_and_summaries(tmp_path: Path) -> None:
+    path = tmp_path / "run_journal.jsonl"
+    fetched: List[str] = []
+
+    def fetch(url: str) -> str:
+        fetched.append(url)
+        return f"<html><body><article><p>{url.rsplit('/', 1)[-1]}</p></article></body></html>"
+
+    first = FlakySummarizer(failing={"1"})
+    journal = _start(path)
+    _process_targets(_items(3), first, fetcher=fetch, journal=journal)
+    journal.close()
+
+    fetched.clear()
+    second = FlakySummarizer()
+    resumed = RunJournal.resume(path)
+    results = _process_targets(_items(3), second, fetcher=fetch, journal=resumed)
+
+    assert fetched == []  # 0 and 2 were summarized, 1 was extracted
+    assert second.texts == ["1"]
+    assert [r.summary for r in results] == ["summary of 0", "summary of 1", "summary of 2"]
+
+
+def _writeback(failing_path: str = "") -> RaindropWriteBack:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == failing_path:
+            return httpx.Response(400)
+        return httpx.Response(200, json={"result": True, "modified": 2})
+
+    return RaindropWriteBack(RaindropClient(token="dummy", transport=httpx.MockTransport(handler)))
+
+
+def test_mailed_run_only_finishes_the_write_back(tmp_path: Path) -> None:
+    path = tmp_path / "run_journal.jsonl"
+    journal = _start(path)
+    results = [SummaryResult(item=item, status="success", summary=f"要約{item.id}") for item in _items(2)]
+    journal.mailed(results)
+    _write_back(results, _writeback("/rest/v1/raindrop/1"), mirror=None, journal=journal)
+    journal.close()
+
+    resumed = RunJournal.resume(path)
+    assert resumed is not None and resumed.state.mailed is not None
+    assert [r.summary for r in resumed.state.mailed] == ["要約0", "要約1"]
+    assert resumed.state.written_back == {0}
+
+    _write_back(resumed.state.mailed[1:], _writeback(), mirror=None, journal=resumed)
+    resumed.close()
+    assert RunJournal.resume(path) is None
+
+
+def test_new_run_keeps_the_journal_while_mailed_items_fail_to_write_back(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    journal = _start(_journal_path())
+    results = [SummaryResult(item=item, status="success", summary=f"要約{item.id}") for item in _items(2)]
+    journal.mailed(results)
+    journal.written_back(0)
+    journal.close()
+
+    with pytest.raises(PendingWriteBackError):
+        _finish_pending_write_back(_writeback("/rest/v1/raindrop/1"), mirror=None)
+
+    pending = RunJournal.resume(_journal_path())
+    assert pending is not None and pending.state.written_back == {0}
+    pending.close()
+
+    _finish_pending_write_back(_writeback(), mirror=None)
+    assert RunJournal.resume(_journal_path()) is None
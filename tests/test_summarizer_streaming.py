@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, List, Optional
+
+import pytest
+
+from raindrop_digest.summarizer import StreamingTimeouts, Summarizer, SummaryTimeoutError
+
+
+def _chunk(content: Optional[str] = None, usage: Any = None) -> Any:
+    choices = [] if content is None else [type("choice", (), {"delta": type("delta", (), {"content": content})})]
+    return type("chunk", (), {"choices": choices, "usage": usage})
+
+
+class FakeStream:
+    """Yields ``parts``; ``hang_after`` blocks after that many chunks until closed."""
+
+    def __init__(self, parts: List[str], hang_after: Optional[int] = None):
+        self.parts = parts
+        self.hang_after = hang_after
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for idx, part in enumerate(self.parts):
+            if idx == self.hang_after:
+                self.closed.wait(5)
+                raise RuntimeError("connection closed")
+            yield _chunk(part)
+        yield _chunk(usage=type("usage", (), {"prompt_tokens": 40, "completion_tokens": len(self.parts)}))
+
+    def close(self) -> None:
+        self.closed.set()
+
+
+class StreamingOpenAI:
+    def __init__(self, streams: List[FakeStream]):
+        self.streams = streams
+        self.requests: List[dict] = []
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        self.requests.append(kwargs)
+        return self.streams[len(self.requests) - 1]
+
+
+TIMEOUTS = StreamingTimeouts(first_token_seconds=0.2, stall_seconds=0.1)
+
+
+def test_streams_and_joins_deltas_with_usage() -> None:
+    client = StreamingOpenAI([FakeStream(["要", "約", "です"])])
+    summarizer = Summarizer(api_key="dummy", client=client, streaming=TIMEOUTS)
+
+    summary, usage = summarizer.summarize_with_usage("本文")
+
+    assert summary == "要約です"
+    assert (usage.prompt_tokens, usage.completion_tokens, usage.calls) == (40, 3, 1)
+    assert client.requests[0]["stream"] is True
+    assert client.requests[0]["stream_options"] == {"include_usage": True}
+
+
+@pytest.mark.parametrize("hang_after", [0, 2])
+def test_cancels_and_retries_a_stalled_stream(hang_after: int) -> None:
+    stalled = FakeStream(["要", "約", "です"], hang_after=hang_after)
+    client = StreamingOpenAI([stalled, FakeStream(["再試行"])])
+    summarizer = Summarizer(api_key="dummy", client=client, streaming=TIMEOUTS, max_attempts=2)
+
+    assert summarizer.summarize("本文") == "再試行"
+    assert stalled.closed.is_set()
+    assert len(client.requests) == 2
+
+
+def test_raises_timeout_when_every_attempt_stalls() -> None:
+    client = StreamingOpenAI([FakeStream(["a"], hang_after=0), FakeStream(["b"], hang_after=0)])
+    summarizer = Summarizer(api_key="dummy", client=client, streaming=TIMEOUTS, max_attempts=2)
+
+    with pytest.raises(SummaryTimeoutError, match="no token within"):
+        summarizer.summarize("本文")
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any, List
+
+from raindrop_digest.summarizer import Summarizer
+from raindrop_digest.summary_cache import SummaryCache
+
+
+class CountingOpenAI:
+    def __init__(self):
+        self.calls = 0
+        self.chat = type("chat", (), {"completions": self})
+
+    def create(self, model: str, messages: List[Any], **kwargs: Any):
+        self.calls += 1
+        message = type("msg", (), {"content": f"要約{self.calls}"})
+        choice = type("choice", (), {"message": message})
+        return type("response", (), {"choices": [choice]})
+
+
+def test_hit_skips_openai_call(tmp_path: Path) -> None:
+    client = CountingOpenAI()
+    cache = SummaryCache(tmp_path / "s.sqlite3")
+    summarizer = Summarizer(api_key="dummy", client=client, cache=cache)
+
+    assert summarizer.summarize("同じ本文") == "要約1"
+    assert summarizer.summarize("同じ本文\n") == "要約1"
+    assert client.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_survives_reopen_and_is_keyed_by_model_and_prompt(tmp_path: Path) -> None:
+    path = tmp_path / "s.sqlite3"
+    client = CountingOpenAI()
+    Summarizer(api_key="dummy", client=client, cache=SummaryCache(path)).summarize("本文")
+
+    reopened = SummaryCache(path)
+    Summarizer(api_key="dummy", client=client, cache=reopened).summarize("本文")
+    assert client.calls == 1
+
+    Summarizer(api_key="dummy", model="gpt-5-mini", client=client, cache=reopened).summarize("本文")
+    Summarizer(api_key="dummy", client=client, system_prompt="別のプロンプト", cache=reopened).summarize("本文")
+    assert client.calls == 3
+
+
+def test_evicts_by_age_and_entry_count(tmp_path: Path) -> None:
+    path = tmp_path / "s.sqlite3"
+    cache = SummaryCache(path)
+    for idx in range(4):
+        cache.put(f"k{idx}", "m", f"s{idx}")
+    old = time.time() - 10 * 24 * 60 * 60
+    cache._conn.execute("UPDATE summaries SET created_at = ?, last_used_at = ? WHERE key = 'k0'", (old, old))
+    cache._conn.execute("UPDATE summaries SET last_used_at = ? WHERE key = 'k1'", (old,))
+    cache._conn.commit()
+    cache.close()
+
+    reopened = SummaryCache(path, max_age_days=7, max_entries=2)
+    assert reopened.get("k0") is None  # too old
+    assert reopened.get("k1") is None  # least recently used beyond max_entries
+    assert reopened.get("k2") == "s2"
+    assert reopened.get("k3") == "s3"
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from raindrop_digest.text_compactor import compact_text, trim_to_token_budget
+from raindrop_digest.text_extractor import parse_html
+from raindrop_digest.utils import estimate_tokens
+
+
+def test_collapses_whitespace_and_blank_lines() -> None:
+    result = compact_text("  見出し　　です  \n\n\n\n\t本文   text​ here\n\n")
+    assert result.text == "見出し です\n\n本文 text here"
+    assert result.chars_saved > 0
+    assert result.tokens_saved > 0
+
+
+def test_drops_boilerplate_and_repeated_lines() -> None:
+    text = "\n".join(
+        [
+            "Share",
+            "Tweet",
+            "本当の本文はここから始まります。",
+            "広告",
+            "本当の本文はここから始まります。",
+            "Sign up for our newsletter",
+            "Copyright law changed last year",
+            "}",
+            "}",
+            "© 2025 Example Inc.",
+            "関連記事",
+        ]
+    )
+    assert compact_text(text).text == "\n".join(
+        ["本当の本文はここから始まります。", "Copyright law changed last year", "}", "}"]
+    )
+
+
+def test_trims_to_estimated_token_budget() -> None:
+    text = "あ" * 10 + "b" * 8
+    assert trim_to_token_budget(text, 100) == text
+    assert trim_to_token_budget(text, 11) == "あ" * 10 + "bbbb"
+    assert estimate_tokens(compact_text("日本語" * 100, max_tokens=50).text) == 50
+
+
+def test_parse_html_applies_compaction_before_trimming() -> None:
+    paragraph = "<p>本文の段落です。" + "内容" * 40 + "</p>"
+    html_text = (
+        "<html><body><article>"
+        + "<p>Share</p><p>Tweet</p>"
+        + paragraph * 3
+        + "<p>" + "続きの本文。" * 50 + "</p>"
+        + "</article></body></html>"
+    )
+
+    content = parse_html(html_text, "https://example.com/a", max_tokens=200)
+
+    assert "Share" not in content.text
+    assert content.text.count("本文の段落です。") == 1
+    assert estimate_tokens(content.text) <= 200
+    assert content.chars_saved > 0 and content.tokens_saved > 0
@@ -3,7 +3,7 @@ from __future__ import annotations
 import httpx
 import pytest
 
-from raindrop_digest.text_extractor import ExtractionError, fetch_html
+from raindrop_digest.text_extractor import ExtractionError, HtmlFetcher, ParsePool, fetch_html
 
 
 def test_fetch_html_retries_with_alternate_user_agent_on_403(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -64,3 +64,51 @@ def test_fetch_html_wraps_request_error(monkeypatch: pytest.MonkeyPatch) -> None
         fetch_html("https://example.com/article", transport=transport)
 
     assert "HTTP request failed" in str(excinfo.value)
+
+
+def test_parse_pool_returns_extracted_content_and_errors() -> None:
+    pool = ParsePool(workers=1)
+    try:
+        content = pool.parse(
+            '<html><head><meta property="og:image" content="/hero.png" /></head>'
+            "<body><article><p>本文です。</p></article></body></html>",
+            "https://example.com/article",
+        )
+        with pytest.raises(ExtractionError, match="empty"):
+            pool.parse("<html><body></body></html>", "https://example.com/empty")
+    finally:
+        pool.close()
+    assert content.text == "本文です。"
+    assert content.hero_image_url == "https://example.com/hero.png"
+
+
+def test_html_fetcher_reuses_one_client_and_switches_user_agent_per_request(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.delenv("HTTP_USER_AGENT", raising=False)
+    seen: list[tuple[str, str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(
+            (request.url.path, request.headers["User-Agent"], request.headers.get("Accept-Encoding", ""))
+        )
+        if request.url.path == "/blocked" and len(seen) == 1:
+            return httpx.Response(403, request=request)
+        return httpx.Response(200, request=request, text=f"<html>{request.url.path}</html>")
+
+    with HtmlFetcher(transport=httpx.MockTransport(handler)) as fetcher:
+        assert fetch_html("https://example.com/blocked", fetcher=fetcher) == "<html>/blocked</html>"
+        assert fetcher.fetch("https://example.com/next") == "<html>/next</html>"
+
+    assert [path for path, _, _ in seen] == ["/blocked", "/blocked", "/next"]
+    # The fallback UA applies to the retry only; the next URL starts from the first candidate.
+    assert seen[0][1] != seen[1][1]
+    assert seen[2][1] == seen[0][1]
+    assert "gzip" in seen[0][2]
+
+
+def test_html_fetcher_falls_back_to_http1_without_h2(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("raindrop_digest.text_extractor._http2_available", lambda: False)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, request=request, text="ok"))
+    with HtmlFetcher(transport=transport, http2=True) as fetcher:
+        assert fetcher.fetch("https://example.com/") == "ok"
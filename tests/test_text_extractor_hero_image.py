@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from raindrop_digest.text_extractor import _extract_hero_image_url
+from raindrop_digest.text_extractor import (
+    _extract_hero_image_url,
+    _extract_page_metadata,
+    _parse_document,
+    parse_html,
+)
 
 
 def test_extract_hero_image_url_prefers_og_image_and_resolves_relative():
@@ -23,3 +28,42 @@ def test_extract_hero_image_url_skips_tracking_pixels():
     result = _extract_hero_image_url(html_text, "https://example.com/article")
     assert result == "https://example.com/hero.jpg"
 
+
+def test_extract_hero_image_url_prefers_og_over_earlier_twitter_card():
+    html_text = """
+    <html><head>
+      <meta name="twitter:image" content="https://example.com/twitter.jpg" />
+      <link rel="image_src" href="https://example.com/link.jpg" />
+      <meta property="og:image:secure_url" content="https://example.com/og.jpg" />
+    </head><body></body></html>
+    """
+    result = _extract_hero_image_url(html_text, "https://example.com/article")
+    assert result == "https://example.com/og.jpg"
+
+
+def test_parse_html_reads_title_and_hero_image_from_single_tree():
+    html_text = """
+    <html><head>
+      <title> Page title </title>
+      <meta property="og:title" content="OG title" />
+      <meta property="og:image" content="/hero.png" />
+    </head><body><article><p>本文の段落です。</p></article></body></html>
+    """
+    content = parse_html(html_text, "https://example.com/article")
+    assert content.title == "Page title"
+    assert content.hero_image_url == "https://example.com/hero.png"
+    assert content.text == "本文の段落です。"
+
+
+def test_page_metadata_falls_back_to_og_title():
+    tree = _parse_document(
+        """
+        <html><head>
+          <meta property="og:title" content="OG title" />
+          <meta name="description" content="Plain description" />
+        </head><body></body></html>
+        """
+    )
+    metadata = _extract_page_metadata(tree, "https://example.com/")
+    assert metadata.title == "OG title"
+    assert metadata.hero_image_url is None
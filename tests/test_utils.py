@@ -3,7 +3,14 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 
 from raindrop_digest.models import RaindropItem
-from raindrop_digest.utils import append_note, filter_new_items, threshold_from_now, trim_text
+from raindrop_digest.utils import (
+    append_note,
+    estimate_tokens,
+    filter_new_items,
+    split_text_chunks,
+    threshold_from_now,
+    trim_text,
+)
 
 JST = timezone(timedelta(hours=9))
 
@@ -42,3 +49,18 @@ def test_trim_text_respects_limit():
     text = "a" * 5
     assert trim_text(text, 10) == text
     assert trim_text(text, 3) == "aaa"
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("日本語テキスト") == 7
+    assert estimate_tokens("日本 abcd") == 2 + 2
+
+
+def test_split_text_chunks_packs_paragraphs_and_splits_sentences():
+    assert split_text_chunks("短い本文", 100) == ["短い本文"]
+    assert split_text_chunks("p1\n\np2\n\n\np3", 6) == ["p1\n\np2", "p3"]
+    assert split_text_chunks("あいう。えお。かきくけこ。", 7) == ["あいう。えお。", "かきくけこ。"]
+    assert split_text_chunks("One. Two. Three.", 10) == ["One. Two.", "Three."]
+    assert split_text_chunks("x" * 12, 5) == ["xxxxx", "xxxxx", "xx"]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional, Set, Tuple
+
+import httpx
+
+from raindrop_digest.models import RaindropItem
+from raindrop_digest.raindrop_client import RaindropClient
+from raindrop_digest.writeback import ItemUpdate, RaindropWriteBack
+
+
+def _item(item_id: int) -> RaindropItem:
+    return RaindropItem(
+        id=item_id,
+        link=f"https://example.com/{item_id}",
+        title=str(item_id),
+        created=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        tags=["既存"],
+        note="メモ",
+    )
+
+
+class FakeRaindrop:
+    """
+    Records (method, path, body); requests to ``failing`` paths answer 400.
+    Bulk calls report ``modified`` when set; items in ``trashed`` are looked up as in Trash.
+    """
+
+    def __init__(
+        self, failing: Set[str] = frozenset(), modified: Optional[int] = None, trashed: Set[int] = frozenset()
+    ):
+        self.failing = failing
+        self.modified = modified
+        self.trashed = trashed
+        self.calls: List[Tuple[str, str, dict]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else {}
+        with self._lock:
+            self.calls.append((request.method, request.url.path, body))
+        if request.url.path in self.failing:
+            return httpx.Response(400, json={"result": False})
+        if request.method == "GET":
+            item_id = int(request.url.path.rsplit("/", 1)[-1])
+            raw = {"_id": item_id, "link": "https://example.com", "created": "2025-01-01T00:00:00Z"}
+            raw["collection"] = {"$id": -99 if item_id in self.trashed else -1}
+            return httpx.Response(200, json={"result": True, "item": raw})
+        modified = self.modified if self.modified is not None and "ids" in body else len(body.get("ids", [])) or 1
+        return httpx.Response(200, json={"result": True, "modified": modified})
+
+    def client(self) -> RaindropClient:
+        return RaindropClient(token="dummy", transport=httpx.MockTransport(self))
+
+
+def _updates() -> List[ItemUpdate]:
+    return [
+        ItemUpdate(_item(1), "▼サマリー\n要約1", ["配信済み"]),
+        ItemUpdate(_item(2), "要約失敗", ["配信済み", "要約失敗"]),
+        ItemUpdate(_item(3), "▼サマリー\n要約3", ["配信済み"]),
+    ]
+
+
+def test_tags_go_out_in_bulk_and_notes_per_item() -> None:
+    raindrop = FakeRaindrop()
+
+    report = RaindropWriteBack(raindrop.client(), chunk_size=2).apply(_updates())
+
+    bulk = [(path, body) for method, path, body in raindrop.calls if path == "/rest/v1/raindrops/-1"]
+    assert sorted((body["tags"], body["ids"]) for _path, body in bulk) == [
+        (["要約失敗", "配信済み"], [2]),
+        (["配信済み"], [1, 3]),
+    ]
+    notes = {path: body for method, path, body in raindrop.calls if path.startswith("/rest/v1/raindrop/")}
+    assert notes["/rest/v1/raindrop/1"] == {"note": "▼サマリー\n要約1"}
+    assert all("tags" not in body for body in notes.values())
+    assert (report.tagged, report.notes_written, report.api_calls, report.failures) == (3, 3, 5, {})
+
+
+def test_failed_bulk_update_falls_back_per_item_and_reports_failed_ids() -> None:
+    raindrop = FakeRaindrop(failing={"/rest/v1/raindrops/-1", "/rest/v1/raindrop/3"})
+
+    report = RaindropWriteBack(raindrop.client()).apply(_updates())
+
+    item_1 = [body for _m, path, body in raindrop.calls if path == "/rest/v1/raindrop/1"]
+    assert sorted(item_1[0]["tags"]) == ["既存", "配信済み"]
+    assert report.tagged == 2
+    assert list(report.failures) == [3]
+
+
+def test_deletes_in_bulk_with_per_item_fallback() -> None:
+    raindrop = FakeRaindrop()
+    assert RaindropWriteBack(raindrop.client()).delete([4, 5]).deleted == 2
+    assert raindrop.calls == [("DELETE", "/rest/v1/raindrops/-1", {"ids": [4, 5]})]
+
+    raindrop = FakeRaindrop(failing={"/rest/v1/raindrops/-1", "/rest/v1/raindrop/5"})
+    report = RaindropWriteBack(raindrop.client()).delete([4, 5])
+    assert (report.deleted, list(report.failures)) == (1, [5])
+
+
+def test_partial_bulk_updates_fall_back_per_item() -> None:
+    raindrop = FakeRaindrop(modified=1)
+
+    report = RaindropWriteBack(raindrop.client()).apply(_updates()[::2])
+
+    per_item = {path: body for _m, path, body in raindrop.calls if path.startswith("/rest/v1/raindrop/")}
+    assert sorted(per_item["/rest/v1/raindrop/1"]["tags"]) == ["既存", "配信済み"]
+    assert sorted(per_item["/rest/v1/raindrop/3"]["tags"]) == ["既存", "配信済み"]
+    assert (report.tagged, report.failures) == (2, {})
+
+    raindrop = FakeRaindrop(modified=1, trashed={4})
+    report = RaindropWriteBack(raindrop.client()).delete([4, 5])
+
+    assert [(m, p) for m, p, _b in raindrop.calls if m == "DELETE"] == [
+        ("DELETE", "/rest/v1/raindrops/-1"),
+        ("DELETE", "/rest/v1/raindrop/5"),
+    ]
+    assert (report.deleted, report.failures) == (2, {})